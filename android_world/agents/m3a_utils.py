@@ -19,7 +19,7 @@ import base64
 import json
 import math
 import re
-from typing import Any, Optional
+from typing import Any, Iterable, Iterator, Optional
 from android_world.env import representation_utils
 import cv2
 import numpy as np
@@ -413,7 +413,9 @@ def generate_single_task_html_for_m3a(task_result: dict[str, Any]) -> str:
 
 
 def generate_eval_html_report(
-    task_results: list[dict[str, Any]], agent_type: str, fail_only: bool = False
+    task_results: Iterable[dict[str, Any]],
+    agent_type: str,
+    fail_only: bool = False,
 ) -> str:
   """Generate evaluation results report as a html string.
 
@@ -438,6 +440,10 @@ def generate_eval_html_report(
     #   )
     # webbrowser.open_new_tab(output_path)
 
+  For large runs, prefer `iter_eval_html_report` with
+  `Checkpointer.iter_episodes`, which does not hold the report or the episodes
+  in memory.
+
   Args:
     task_results: List of task results obtained by running the suite_utils's run
       function with the agent.
@@ -447,6 +453,34 @@ def generate_eval_html_report(
   Returns:
     Html string for the result report.
   """
+  return ''.join(iter_eval_html_report(task_results, agent_type, fail_only))
+
+
+def iter_eval_html_report(
+    task_results: Iterable[dict[str, Any]],
+    agent_type: str,
+    fail_only: bool = False,
+) -> Iterator[str]:
+  """Yields the evaluation results report as html chunks, one per task.
+
+  Sample usage:
+    # checkpointer = checkpointer_lib.IncrementalCheckpointer(result_path)
+    # with open(output_path, 'w') as f:
+    #   f.writelines(iter_eval_html_report(
+    #       checkpointer.iter_episodes(), 'M3A'))
+
+  Args:
+    task_results: Task results, e.g. from `Checkpointer.iter_episodes`. They
+      are consumed lazily.
+    agent_type: Indicate which agent generate the task_results above.
+    fail_only: Indicate if the report should only contain failed cases.
+
+  Yields:
+    Consecutive pieces of the html report.
+
+  Raises:
+    ValueError: If the agent type is not supported.
+  """
   if agent_type == 'M3A':
     single_result_html_generation = generate_single_task_html_for_m3a
   elif agent_type == 'T3A':
@@ -455,7 +489,7 @@ def generate_eval_html_report(
     print('Currently only supports results obtained by M3A or T3A.')
     raise ValueError('Unsupported agent type.')
 
-  html_str = (
+  yield (
       '<html><body style="word-wrap: break-word; background-color: #d9ead3;">'
   )
 
@@ -466,13 +500,12 @@ def generate_eval_html_report(
         and task_result['is_successful']
     ):
       continue
-    html_str += (
+    yield (
         f'<p>===============================<br>Task {str(index+1)}:'
         f' {task_result["task_template"]}<br>'
         + single_result_html_generation(task_result)
     )
-  html_str += '</body></html>'
-  return html_str
+  yield '</body></html>'
 
 
 def generate_single_task_html_for_gpt4_text(task_result: dict[str, Any]) -> str:
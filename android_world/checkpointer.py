@@ -15,19 +15,44 @@
 """Checkpointer class."""
 
 import abc
+import base64
+import dataclasses
 import datetime
 import gzip
+import hashlib
 import io
+import json
 import os
 import pickle
-from typing import Any
+import queue
+import struct
+import threading
+from typing import Any, Callable, Iterator
+import urllib.parse
+import uuid
+import zlib
 
 from absl import logging
+from android_world import constants
+import numpy as np
 
 INSTANCE_SEPARATOR = '_'
 
 Episode = dict[str, Any]
 
+# Episode fields kept in memory during a run and used for resuming from a
+# checkpoint.
+METADATA_FIELDS = (
+    constants.EpisodeConstants.GOAL,
+    constants.EpisodeConstants.TASK_TEMPLATE,
+    constants.EpisodeConstants.INSTANCE_ID,
+    constants.EpisodeConstants.IS_SUCCESSFUL,
+    constants.EpisodeConstants.EPISODE_LENGTH,
+    constants.EpisodeConstants.RUN_TIME,
+    constants.EpisodeConstants.EXCEPTION_INFO,
+    constants.EpisodeConstants.AUX_DATA,
+)
+
 
 def sort_key(filename: str) -> tuple[str, int|str]:
   """Returns the sort key for a filenames.
@@ -88,6 +113,41 @@ def _unzip_and_read_pickle(file_path: str) -> Any:
     return pickle.load(f_in)
 
 
+def _atomic_write(file_path: str, data: bytes) -> None:
+  """Writes data to a temporary file and renames it to file_path.
+
+  A crash mid-write leaves at most a stray temporary file, never a truncated
+  file_path.
+
+  Args:
+      file_path: The destination path.
+      data: The bytes to write.
+  """
+  tmp_path = f'{file_path}.tmp{os.getpid()}.{threading.get_ident()}'
+  try:
+    with open(tmp_path, 'wb') as f:
+      f.write(data)
+    os.replace(tmp_path, file_path)
+  except BaseException:
+    if os.path.exists(tmp_path):
+      os.remove(tmp_path)
+    raise
+
+
+def _encode_manifest_value(value: Any) -> Any:
+  """Encodes a field value as JSON, pickling anything but plain scalars."""
+  if value is None or isinstance(value, (bool, int, float, str)):
+    return value
+  return {'__pickle__': base64.b64encode(pickle.dumps(value)).decode('ascii')}
+
+
+def _decode_manifest_value(value: Any) -> Any:
+  """Inverse of `_encode_manifest_value`."""
+  if isinstance(value, dict):
+    return pickle.loads(base64.b64decode(value['__pickle__']))
+  return value
+
+
 class Checkpointer(abc.ABC):
   """Saves and loads the results of an evaluation run."""
 
@@ -99,6 +159,39 @@ class Checkpointer(abc.ABC):
   def load(self, fields: list[str] | None = None) -> list[Episode]:
     """Loads all episodes from disk."""
 
+  def iter_episodes(
+      self,
+      fields: list[str] | None = None,
+      task_filter: Callable[[str], bool] | None = None,
+  ) -> Iterator[Episode]:
+    """Yields episodes one at a time, in the same order as `load`.
+
+    The default implementation materializes all episodes with `load`;
+    checkpointers that store task groups separately override it to only hold
+    one task group in memory at a time.
+
+    Args:
+      fields: If set, only these fields of each episode are returned.
+      task_filter: Predicate on task group names, i.e. the `task_name` passed
+        to `save_episodes`, such as "ContactsAddContact_0". Task groups for
+        which it returns False are skipped without being read.
+
+    Raises:
+      NotImplementedError: If `task_filter` is set and not supported.
+    """
+    if task_filter is not None:
+      raise NotImplementedError(
+          f'{type(self).__name__} does not support task_filter.'
+      )
+    yield from self.load(fields)
+
+  def flush(self) -> None:
+    """Blocks until all saved episodes have been written."""
+
+  def close(self) -> None:
+    """Flushes and releases any resources held by the checkpointer."""
+    self.flush()
+
 
 class IncrementalCheckpointer(Checkpointer):
   """Saves and loads the results of an evaluation run.
@@ -107,13 +200,25 @@ class IncrementalCheckpointer(Checkpointer):
   checkpointer to save the results of an evaluation run task by task, rather
   than saving the entire dataset at once.
 
+  Next to the episode files, an append-only manifest (manifest.jsonl) records
+  the `METADATA_FIELDS` of every saved episode, together with the size and
+  modification time of the file it came from. Loads that only request
+  metadata fields, such as resuming a run, are answered from the manifest
+  without decompressing any episode file. Files missing from the manifest or
+  changed since they were recorded are read once and added to it, so
+  directories written before the manifest existed are indexed on first load.
+
   Attributes:
       directory: The directory to store the task data.
   """
 
+  MANIFEST_FILENAME = 'manifest.jsonl'
+
   def __init__(self, directory: str) -> None:
     self.directory = directory
     os.makedirs(directory, exist_ok=True)
+    self._manifest_path = os.path.join(directory, self.MANIFEST_FILENAME)
+    self._manifest_lock = threading.Lock()
 
   def save_episodes(self, task_episodes: list[Episode], task_name: str):
     """Saves a task group to disk.
@@ -123,32 +228,160 @@ class IncrementalCheckpointer(Checkpointer):
         task_name: The unique identifier for the task group.
     """
     filename = os.path.join(self.directory, f'{task_name}.pkl.gz')
-    with open(filename, 'wb') as f:
-      compressed = _gzip_pickle(task_episodes)
-      f.write(compressed)
+    _atomic_write(filename, _gzip_pickle(task_episodes))
+    self._append_manifest_entry(task_name, os.stat(filename), task_episodes)
     logging.info('Wrote task episodes for %s to %s', task_name, filename)
 
   def load(self, fields: list[str] | None = None) -> list[Episode]:
     """Loads all task groups from disk."""
+    return list(self.iter_episodes(fields))
+
+  def iter_episodes(
+      self,
+      fields: list[str] | None = None,
+      task_filter: Callable[[str], bool] | None = None,
+  ) -> Iterator[Episode]:
+    """Yields episodes one task group file at a time.
+
+    Args:
+      fields: If set, only these fields of each episode are returned.
+      task_filter: Predicate on task group names; files of task groups for
+        which it returns False are not read.
+    """
+    if fields is not None and set(fields) <= set(METADATA_FIELDS):
+      yield from self._iter_from_manifest(fields, task_filter)
+      return
     # Keep same order as runtime.
     directories = os.listdir(self.directory)
     directories.sort(key=sort_key)
 
-    data = []
     for filename in directories:
-      if filename.endswith('.pkl.gz'):
-        try:
-          task_group_id = filename[:-7]  # Remove ".pkl.gz" extension
-          task_group = self._load_task_group(task_group_id)
-          if fields is not None:
-            task_group = [
-                {field: episode[field] for field in fields}
-                for episode in task_group
-            ]
-          data.extend(task_group)
-        except Exception as e:  # pylint: disable=broad-exception-caught
-          logging.info('Unable to load %s with exception: %s', filename, e)
-    return data
+      if not filename.endswith('.pkl.gz'):
+        continue
+      task_group_id = filename[:-7]  # Remove ".pkl.gz" extension
+      if task_filter is not None and not task_filter(task_group_id):
+        continue
+      try:
+        task_group = self._load_task_group(task_group_id)
+        if fields is not None:
+          task_group = [
+              {field: episode[field] for field in fields}
+              for episode in task_group
+          ]
+      except Exception as e:  # pylint: disable=broad-exception-caught
+        logging.info('Unable to load %s with exception: %s', filename, e)
+        continue
+      yield from task_group
+
+  def _iter_from_manifest(
+      self,
+      fields: list[str],
+      task_filter: Callable[[str], bool] | None = None,
+  ) -> Iterator[Episode]:
+    """Yields metadata fields from the manifest, indexing unrecorded files."""
+    entries = self._read_manifest()
+    with os.scandir(self.directory) as it:
+      files = {
+          entry.name: entry.stat()
+          for entry in it
+          if entry.name.endswith('.pkl.gz') and entry.is_file()
+      }
+
+    for filename in sorted(files, key=sort_key):
+      task_group_id = filename[:-7]  # Remove ".pkl.gz" extension
+      if task_filter is not None and not task_filter(task_group_id):
+        continue
+      stat = files[filename]
+      entry = entries.get(task_group_id)
+      try:
+        if (
+            entry is None
+            or entry['size'] != stat.st_size
+            or entry['mtime_ns'] != stat.st_mtime_ns
+        ):
+          logging.info('Indexing %s into the checkpoint manifest.', filename)
+          entry = self._append_manifest_entry(
+              task_group_id, stat, self._load_task_group(task_group_id)
+          )
+        task_group = [
+            {field: episode['fields'][field] for field in fields}
+            for episode in entry['episodes']
+        ]
+      except Exception as e:  # pylint: disable=broad-exception-caught
+        logging.info('Unable to load %s with exception: %s', filename, e)
+        continue
+      yield from task_group
+
+  def _read_manifest(self) -> dict[str, dict[str, Any]]:
+    """Returns the latest manifest entry of each task group."""
+    entries = {}
+    try:
+      with open(self._manifest_path, 'r') as f:
+        for line in f:
+          try:
+            entry = json.loads(line)
+          except json.JSONDecodeError:
+            # A partial line from an interrupted write; the file it describes
+            # is re-indexed.
+            continue
+          entries[entry['task_name']] = entry
+    except FileNotFoundError:
+      pass
+    for entry in entries.values():
+      for episode in entry['episodes']:
+        episode['fields'] = {
+            k: _decode_manifest_value(v) for k, v in episode['fields'].items()
+        }
+    return entries
+
+  def _append_manifest_entry(
+      self,
+      task_name: str,
+      stat: os.stat_result,
+      task_episodes: list[Episode],
+  ) -> dict[str, Any]:
+    """Records a task group in the manifest and returns the decoded entry."""
+    episodes = []
+    for episode in task_episodes:
+      exception_info = episode.get(constants.EpisodeConstants.EXCEPTION_INFO)
+      instance_name = None
+      if (
+          constants.EpisodeConstants.TASK_TEMPLATE in episode
+          and constants.EpisodeConstants.INSTANCE_ID in episode
+      ):
+        instance_name = (
+            episode[constants.EpisodeConstants.TASK_TEMPLATE]
+            + INSTANCE_SEPARATOR
+            + str(episode[constants.EpisodeConstants.INSTANCE_ID])
+        )
+      episodes.append({
+          'instance_name': instance_name,
+          'status': 'failed' if exception_info is not None else 'completed',
+          'has_exception': exception_info is not None,
+          'fields': {k: episode[k] for k in METADATA_FIELDS if k in episode},
+      })
+    entry = {
+        'task_name': task_name,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'episodes': episodes,
+    }
+    line = json.dumps({
+        **entry,
+        'episodes': [
+            {
+                **episode,
+                'fields': {
+                    k: _encode_manifest_value(v)
+                    for k, v in episode['fields'].items()
+                },
+            }
+            for episode in episodes
+        ],
+    })
+    with self._manifest_lock, open(self._manifest_path, 'a') as f:
+      f.write(line + '\n')
+    return entry
 
   def _load_task_group(self, task_group_id: str) -> list[Episode]:
     """Loads a single task group from disk."""
@@ -163,6 +396,359 @@ class IncrementalCheckpointer(Checkpointer):
       return []
 
 
+@dataclasses.dataclass(frozen=True)
+class _BlobRef:
+  """Reference to an array stored in a content-addressed blob store."""
+
+  digest: str
+
+
+class ColumnarCheckpointer(Checkpointer):
+  """Saves episodes as metadata columns plus a deduplicated screenshot store.
+
+  The directory layout is:
+
+    columns/{field}.pkl: One append-only file per top-level episode field
+      (goal, task_template, is_successful, run_time, ...). Each record holds
+      the values of that field for all episodes of one task group.
+    episode_data/{task_name}.pkl.gz: The `episode_data` of a task group, with
+      every large numpy array replaced by a reference into the blob store.
+    blobs/{digest[:2]}/{digest}.npy.gz: Arrays keyed by the sha256 of their
+      dtype, shape and contents, so identical screenshots across steps and
+      episodes are stored once.
+
+  `load(fields=[...])` only reads the column files of the requested fields, and
+  only touches episode data and blobs if `episode_data` is requested.
+
+  Attributes:
+    directory: The directory to store the task data.
+  """
+
+  # Records in the fields column mark a save as complete; they are written
+  # last.
+  _FIELDS_COLUMN = '__fields__'
+  # Each column record is the marker, then its length and CRC32, then the
+  # pickled record. A reader skips records that fail the check and finds the
+  # next one by its marker, so a record cut short by a crash does not hide
+  # the records appended after it.
+  _RECORD_MARKER = b'\x00awrec\xff\x01'
+  _RECORD_HEADER = struct.Struct('<II')
+  # Arrays smaller than this are kept inline in the episode data.
+  _MIN_BLOB_BYTES = 1024
+
+  def __init__(self, directory: str) -> None:
+    self.directory = directory
+    self._columns_dir = os.path.join(directory, 'columns')
+    self._episode_data_dir = os.path.join(directory, 'episode_data')
+    self._blobs_dir = os.path.join(directory, 'blobs')
+    for d in (self._columns_dir, self._episode_data_dir, self._blobs_dir):
+      os.makedirs(d, exist_ok=True)
+
+  def save_episodes(self, task_episodes: list[Episode], task_name: str):
+    """Saves a task group to disk, replacing any previous save of it.
+
+    Args:
+        task_episodes: The task's episodes to save.
+        task_name: The unique identifier for the task group.
+    """
+    save_id = uuid.uuid4().hex
+    episode_fields = [list(episode.keys()) for episode in task_episodes]
+    columns = dict.fromkeys(f for fields in episode_fields for f in fields)
+    episode_data_field = constants.EpisodeConstants.EPISODE_DATA
+
+    if episode_data_field in columns:
+      episode_data = [
+          self._externalize_arrays(episode.get(episode_data_field))
+          for episode in task_episodes
+      ]
+      _atomic_write(
+          self._episode_data_path(task_name), _gzip_pickle(episode_data)
+      )
+    for field in columns:
+      if field == episode_data_field:
+        continue
+      values = [episode.get(field) for episode in task_episodes]
+      self._append_record(field, (task_name, save_id, values))
+    self._append_record(
+        self._FIELDS_COLUMN, (task_name, save_id, episode_fields)
+    )
+    logging.info(
+        'Wrote task episodes for %s to %s', task_name, self.directory
+    )
+
+  def load(self, fields: list[str] | None = None) -> list[Episode]:
+    """Loads all task groups from disk, reading only the requested fields."""
+    return list(self.iter_episodes(fields))
+
+  def iter_episodes(
+      self,
+      fields: list[str] | None = None,
+      task_filter: Callable[[str], bool] | None = None,
+  ) -> Iterator[Episode]:
+    """Yields episodes one task group at a time.
+
+    The requested metadata columns are read up front; episode data and
+    screenshots are only read for the task group being yielded.
+
+    Args:
+      fields: If set, only these fields of each episode are returned.
+      task_filter: Predicate on task group names; task groups for which it
+        returns False are skipped.
+    """
+    saves = {
+        task_name: (save_id, episode_fields)
+        for task_name, save_id, episode_fields in self._read_column(
+            self._FIELDS_COLUMN
+        )
+        if task_filter is None or task_filter(task_name)
+    }
+    # Episodes missing a requested field are an error, mirroring
+    # IncrementalCheckpointer; full loads return whatever each episode has.
+    projected = fields is not None
+    if fields is None:
+      fields = list(
+          dict.fromkeys(
+              field
+              for _, episode_fields in saves.values()
+              for fields_of_episode in episode_fields
+              for field in fields_of_episode
+          )
+      )
+
+    episode_data_field = constants.EpisodeConstants.EPISODE_DATA
+    columns = {}
+    for field in fields:
+      if field == episode_data_field:
+        continue
+      columns[field] = {}
+      try:
+        for task_name, save_id, values in self._read_column(field):
+          if task_name in saves and saves[task_name][0] == save_id:
+            columns[field][task_name] = values
+      except Exception as e:  # pylint: disable=broad-exception-caught
+        logging.info('Unable to read column %s with exception: %s', field, e)
+
+    for task_name in sorted(saves, key=sort_key):
+      _, episode_fields = saves[task_name]
+      try:
+        task_group = [{} for _ in episode_fields]
+        for field in fields:
+          if field == episode_data_field:
+            values = self._load_episode_data(task_name)
+          elif task_name in columns[field]:
+            values = columns[field][task_name]
+          elif any(field in available for available in episode_fields):
+            raise KeyError(f'No readable {field} record.')
+          else:
+            values = [None] * len(task_group)
+          for episode, available, value in zip(
+              task_group, episode_fields, values
+          ):
+            if field in available:
+              episode[field] = value
+            elif projected:
+              raise KeyError(field)
+      except Exception as e:  # pylint: disable=broad-exception-caught
+        logging.info('Unable to load %s with exception: %s', task_name, e)
+        continue
+      yield from task_group
+
+  def _column_path(self, field: str) -> str:
+    return os.path.join(
+        self._columns_dir, urllib.parse.quote(field, safe='') + '.pkl'
+    )
+
+  def _episode_data_path(self, task_name: str) -> str:
+    return os.path.join(self._episode_data_dir, f'{task_name}.pkl.gz')
+
+  def _blob_path(self, digest: str) -> str:
+    return os.path.join(self._blobs_dir, digest[:2], f'{digest}.npy.gz')
+
+  def _append_record(self, field: str, record: Any) -> None:
+    payload = pickle.dumps(record)
+    header = self._RECORD_HEADER.pack(len(payload), zlib.crc32(payload))
+    with open(self._column_path(field), 'ab') as f:
+      f.write(self._RECORD_MARKER + header + payload)
+
+  def _read_column(self, field: str) -> Iterator[Any]:
+    """Yields the intact records of a column, oldest first."""
+    try:
+      with open(self._column_path(field), 'rb') as f:
+        data = f.read()
+    except FileNotFoundError:
+      return
+    start = data.find(self._RECORD_MARKER)
+    while start != -1:
+      payload = self._record_payload(data, start)
+      if payload is not None:
+        try:
+          record = pickle.loads(payload)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+          logging.info('Skipping unreadable record in %s: %s', field, e)
+        else:
+          yield record
+          start = data.find(
+              self._RECORD_MARKER,
+              start
+              + len(self._RECORD_MARKER)
+              + self._RECORD_HEADER.size
+              + len(payload),
+          )
+          continue
+      # The record may have been cut short by a crash, with the next record
+      # starting inside it.
+      logging.info('Skipping damaged record in %s at byte %d.', field, start)
+      start = data.find(self._RECORD_MARKER, start + 1)
+
+  def _record_payload(self, data: bytes, start: int) -> bytes | None:
+    """Returns the payload of the record at `start`, or None if damaged."""
+    header_start = start + len(self._RECORD_MARKER)
+    payload_start = header_start + self._RECORD_HEADER.size
+    if payload_start > len(data):
+      return None
+    length, checksum = self._RECORD_HEADER.unpack_from(data, header_start)
+    payload = data[payload_start : payload_start + length]
+    if len(payload) != length or zlib.crc32(payload) != checksum:
+      return None
+    return payload
+
+  def _externalize_arrays(self, value: Any) -> Any:
+    """Replaces large arrays in nested containers with blob references."""
+    if isinstance(value, np.ndarray) and value.nbytes >= self._MIN_BLOB_BYTES:
+      return self._put_blob(value)
+    elif isinstance(value, dict):
+      return {k: self._externalize_arrays(v) for k, v in value.items()}
+    elif isinstance(value, (list, tuple)):
+      return type(value)(self._externalize_arrays(v) for v in value)
+    return value
+
+  def _put_blob(self, array: np.ndarray) -> _BlobRef:
+    """Stores an array in the blob store if it is not already there."""
+    array = np.ascontiguousarray(array)
+    hasher = hashlib.sha256()
+    hasher.update(f'{array.dtype.str}{array.shape}'.encode())
+    hasher.update(array.data)
+    digest = hasher.hexdigest()
+    path = self._blob_path(digest)
+    if not os.path.exists(path):
+      os.makedirs(os.path.dirname(path), exist_ok=True)
+      buffer = io.BytesIO()
+      np.save(buffer, array, allow_pickle=False)
+      _atomic_write(path, gzip.compress(buffer.getvalue(), compresslevel=5))
+    return _BlobRef(digest)
+
+  def _load_episode_data(self, task_name: str) -> list[Any]:
+    """Loads a task group's episode data and resolves blob references."""
+    blob_cache = {}
+
+    def resolve(value: Any) -> Any:
+      if isinstance(value, _BlobRef):
+        if value.digest not in blob_cache:
+          with open(self._blob_path(value.digest), 'rb') as f:
+            blob_cache[value.digest] = gzip.decompress(f.read())
+        # Each reference gets its own array so callers can modify it safely.
+        return np.load(io.BytesIO(blob_cache[value.digest]), allow_pickle=False)
+      elif isinstance(value, dict):
+        return {k: resolve(v) for k, v in value.items()}
+      elif isinstance(value, (list, tuple)):
+        return type(value)(resolve(v) for v in value)
+      return value
+
+    return resolve(_unzip_and_read_pickle(self._episode_data_path(task_name)))
+
+
+class AsyncCheckpointer(Checkpointer):
+  """Writes episodes with a wrapped checkpointer on a background thread.
+
+  `save_episodes` enqueues the episodes and returns immediately, so pickling
+  and compression overlap with running the next task. The queue is bounded:
+  once `max_pending` task groups are waiting, `save_episodes` blocks until the
+  writer catches up. Episodes must not be modified after they are saved.
+
+  Errors raised by the wrapped checkpointer are re-raised by the next call to
+  `save_episodes`, `flush` or `close`.
+  """
+
+  def __init__(self, checkpointer: Checkpointer, max_pending: int = 4) -> None:
+    """Initializes the checkpointer and starts the writer thread.
+
+    Args:
+      checkpointer: The checkpointer that performs the writes, e.g. an
+        IncrementalCheckpointer.
+      max_pending: The maximum number of task groups waiting to be written
+        before `save_episodes` blocks.
+    """
+    self._checkpointer = checkpointer
+    self._queue: queue.Queue[tuple[list[Episode], str] | None] = queue.Queue(
+        maxsize=max_pending
+    )
+    self._error: Exception | None = None
+    self._closed = False
+    self._thread = threading.Thread(
+        target=self._write_loop, name='AsyncCheckpointer', daemon=True
+    )
+    self._thread.start()
+
+  def _write_loop(self) -> None:
+    while (item := self._queue.get()) is not None:
+      task_episodes, task_name = item
+      try:
+        self._checkpointer.save_episodes(task_episodes, task_name)
+      except Exception as e:  # pylint: disable=broad-exception-caught
+        logging.exception('Failed to write task episodes for %s.', task_name)
+        self._error = e
+      finally:
+        self._queue.task_done()
+    self._queue.task_done()
+
+  def _raise_pending_error(self) -> None:
+    if self._error is not None:
+      error, self._error = self._error, None
+      raise error
+
+  def save_episodes(self, task_episodes: list[Episode], task_name: str):
+    """Enqueues a task group to be written, blocking if the queue is full.
+
+    Args:
+        task_episodes: The task's episodes to save.
+        task_name: The unique identifier for the task group.
+
+    Raises:
+        ValueError: If the checkpointer has been closed.
+    """
+    if self._closed:
+      raise ValueError('Cannot save episodes to a closed checkpointer.')
+    self._raise_pending_error()
+    self._queue.put((task_episodes, task_name))
+
+  def load(self, fields: list[str] | None = None) -> list[Episode]:
+    """Waits for pending writes, then loads all episodes from disk."""
+    self.flush()
+    return self._checkpointer.load(fields=fields)
+
+  def iter_episodes(
+      self,
+      fields: list[str] | None = None,
+      task_filter: Callable[[str], bool] | None = None,
+  ) -> Iterator[Episode]:
+    """Waits for pending writes, then yields episodes from disk."""
+    self.flush()
+    yield from self._checkpointer.iter_episodes(fields, task_filter)
+
+  def flush(self) -> None:
+    self._queue.join()
+    self._raise_pending_error()
+    self._checkpointer.flush()
+
+  def close(self) -> None:
+    if not self._closed:
+      self._closed = True
+      self._queue.put(None)
+      self._thread.join()
+    self._raise_pending_error()
+    self._checkpointer.close()
+
+
 class NullCheckpointer(Checkpointer):
   """Checkpointer that does nothing."""
 
@@ -176,6 +762,14 @@ class NullCheckpointer(Checkpointer):
     del fields
     return []
 
+  def iter_episodes(
+      self,
+      fields: list[str] | None = None,
+      task_filter: Callable[[str], bool] | None = None,
+  ) -> Iterator[Episode]:
+    del fields, task_filter
+    yield from ()
+
 
 def create_run_directory(location: str) -> str:
   """Creates the UUID directory name to save run results.
@@ -0,0 +1,118 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks checkpointers on synthetic, screenshot-heavy episodes.
+
+Simulates a suite loop: each episode "runs" for --task_seconds and is then
+saved. Reports the wall time the loop spends blocked in `save_episodes`, which
+is time the emulator sits idle.
+
+  python -m android_world.checkpointer_benchmark --num_episodes=20
+"""
+
+from collections.abc import Sequence
+import tempfile
+import time
+
+from absl import app
+from absl import flags
+from android_world import checkpointer as checkpointer_lib
+from android_world import constants
+import numpy as np
+
+_NUM_EPISODES = flags.DEFINE_integer(
+    'num_episodes', 20, 'Number of episodes to save.'
+)
+_NUM_STEPS = flags.DEFINE_integer('num_steps', 10, 'Steps per episode.')
+_TASK_SECONDS = flags.DEFINE_float(
+    'task_seconds', 0.5, 'Simulated time to run each episode.'
+)
+_HEIGHT = flags.DEFINE_integer('height', 2400, 'Screenshot height.')
+_WIDTH = flags.DEFINE_integer('width', 1080, 'Screenshot width.')
+
+
+def _make_episode(
+    rng: np.random.Generator, instance_id: int
+) -> checkpointer_lib.Episode:
+  """Creates an episode with noisy screenshots, which compress poorly."""
+  shape = (_HEIGHT.value, _WIDTH.value, 3)
+  screenshots = [
+      rng.integers(0, 32, size=shape, dtype=np.uint8)
+      for _ in range(_NUM_STEPS.value)
+  ]
+  return {
+      constants.EpisodeConstants.GOAL: 'Synthetic goal',
+      constants.EpisodeConstants.TASK_TEMPLATE: 'SyntheticTask',
+      constants.EpisodeConstants.INSTANCE_ID: instance_id,
+      constants.EpisodeConstants.IS_SUCCESSFUL: 1.0,
+      constants.EpisodeConstants.EPISODE_LENGTH: _NUM_STEPS.value,
+      constants.EpisodeConstants.RUN_TIME: _TASK_SECONDS.value,
+      constants.EpisodeConstants.EXCEPTION_INFO: None,
+      constants.EpisodeConstants.EPISODE_DATA: {
+          'raw_screenshot': screenshots,
+          constants.STEP_NUMBER: list(range(_NUM_STEPS.value)),
+      },
+  }
+
+
+def _run(
+    name: str,
+    checkpointer: checkpointer_lib.Checkpointer,
+    episodes: list[checkpointer_lib.Episode],
+) -> None:
+  """Runs the simulated suite loop and prints timings."""
+  blocked = []
+  start = time.perf_counter()
+  for episode in episodes:
+    time.sleep(_TASK_SECONDS.value)
+    save_start = time.perf_counter()
+    checkpointer.save_episodes(
+        [episode],
+        episode[constants.EpisodeConstants.TASK_TEMPLATE]
+        + checkpointer_lib.INSTANCE_SEPARATOR
+        + str(episode[constants.EpisodeConstants.INSTANCE_ID]),
+    )
+    blocked.append(time.perf_counter() - save_start)
+  checkpointer.close()
+  total = time.perf_counter() - start
+  print(
+      f'{name:>12}: blocked per episode {np.mean(blocked) * 1e3:8.1f} ms'
+      f' (p90 {np.percentile(blocked, 90) * 1e3:8.1f} ms),'
+      f' total {total:6.2f} s'
+  )
+
+
+def main(argv: Sequence[str]) -> None:
+  if len(argv) > 1:
+    raise app.UsageError('Too many command-line arguments.')
+  rng = np.random.default_rng(0)
+  episodes = [_make_episode(rng, i) for i in range(_NUM_EPISODES.value)]
+  with tempfile.TemporaryDirectory() as sync_dir:
+    _run(
+        'synchronous',
+        checkpointer_lib.IncrementalCheckpointer(sync_dir),
+        episodes,
+    )
+  with tempfile.TemporaryDirectory() as async_dir:
+    _run(
+        'async',
+        checkpointer_lib.AsyncCheckpointer(
+            checkpointer_lib.IncrementalCheckpointer(async_dir)
+        ),
+        episodes,
+    )
+
+
+if __name__ == '__main__':
+  app.run(main)
@@ -14,8 +14,14 @@
 
 import os
 import tempfile
+import threading
+from typing import Any
+from unittest import mock
 from absl.testing import absltest
 from android_world import checkpointer
+import numpy as np
+
+_MANIFEST_FILENAME = checkpointer.IncrementalCheckpointer.MANIFEST_FILENAME
 
 
 class CheckpointerTest(absltest.TestCase):
@@ -85,6 +91,362 @@ class CheckpointerTest(absltest.TestCase):
     expected_data = [{'key1': 'value1'}]
     self.assertEqual(expected_data, loaded_data)
 
+  def _metadata_episode(self, instance_id: int, **kwargs) -> dict[str, Any]:
+    return {
+        'goal': 'Some goal',
+        'task_template': 'Task',
+        'instance_id': instance_id,
+        'is_successful': 1.0,
+        'episode_length': 3,
+        'run_time': 1.5,
+        'exception_info': None,
+        'aux_data': {'tuple': (1, 2)},
+        'episode_data': {'step_number': [0, 1, 2]},
+    } | kwargs
+
+  def test_load_metadata_fields_from_manifest(self) -> None:
+    """Tests that metadata loads do not decompress episode files."""
+    episodes = [
+        self._metadata_episode(0),
+        self._metadata_episode(1, is_successful=np.nan, exception_info='Err'),
+    ]
+    for i, episode in enumerate(episodes):
+      self.checkpointer.save_episodes([episode], f'Task_{i}')
+    fields = list(checkpointer.METADATA_FIELDS)
+
+    with mock.patch.object(
+        checkpointer, '_unzip_and_read_pickle', autospec=True
+    ) as mock_read:
+      loaded_data = checkpointer.IncrementalCheckpointer(
+          self.temp_dir.name
+      ).load(fields=fields)
+
+    mock_read.assert_not_called()
+    self.assertLen(loaded_data, 2)
+    self.assertEqual(loaded_data[0], {k: episodes[0][k] for k in fields})
+    self.assertTrue(np.isnan(loaded_data[1]['is_successful']))
+    self.assertEqual(loaded_data[1]['exception_info'], 'Err')
+
+  def test_manifest_is_rebuilt_from_existing_files(self) -> None:
+    """Tests that files not in the manifest are indexed on load."""
+    self.checkpointer.save_episodes([self._metadata_episode(0)], 'Task_0')
+    self.checkpointer.save_episodes([self._metadata_episode(1)], 'Task_1')
+    manifest = os.path.join(self.temp_dir.name, _MANIFEST_FILENAME)
+    os.remove(manifest)
+
+    loaded_data = self.checkpointer.load(fields=['instance_id'])
+
+    self.assertCountEqual(
+        loaded_data, [{'instance_id': 0}, {'instance_id': 1}]
+    )
+    with mock.patch.object(
+        checkpointer, '_unzip_and_read_pickle', autospec=True
+    ) as mock_read:
+      self.assertCountEqual(
+          self.checkpointer.load(fields=['instance_id']), loaded_data
+      )
+    mock_read.assert_not_called()
+
+  def test_manifest_ignores_stale_entries(self) -> None:
+    """Tests that a file replaced outside the checkpointer is re-indexed."""
+    self.checkpointer.save_episodes([self._metadata_episode(0)], 'Task_0')
+    other = checkpointer.IncrementalCheckpointer(
+        os.path.join(self.temp_dir.name, 'other')
+    )
+    other.save_episodes(
+        [self._metadata_episode(0, goal='A much longer, different goal')],
+        'Task_0',
+    )
+    os.replace(
+        os.path.join(self.temp_dir.name, 'other', 'Task_0.pkl.gz'),
+        os.path.join(self.temp_dir.name, 'Task_0.pkl.gz'),
+    )
+
+    loaded_data = self.checkpointer.load(fields=['goal'])
+
+    self.assertEqual(loaded_data, [{'goal': 'A much longer, different goal'}])
+
+  def test_manifest_skips_partial_lines(self) -> None:
+    """Tests that a truncated manifest line does not break loading."""
+    self.checkpointer.save_episodes([self._metadata_episode(0)], 'Task_0')
+    manifest = os.path.join(self.temp_dir.name, _MANIFEST_FILENAME)
+    with open(manifest, 'a') as f:
+      f.write('{"task_name": "Task_1", "si')
+
+    self.assertEqual(
+        self.checkpointer.load(fields=['instance_id']), [{'instance_id': 0}]
+    )
+
+  def test_iter_episodes_is_lazy(self) -> None:
+    """Tests that episodes are read one task group at a time."""
+    for i in range(3):
+      self.checkpointer.save_episodes([{'key': i}], f'Task_{i}')
+
+    with mock.patch.object(
+        checkpointer,
+        '_unzip_and_read_pickle',
+        wraps=checkpointer._unzip_and_read_pickle,
+    ) as mock_read:
+      iterator = self.checkpointer.iter_episodes()
+      first = next(iterator)
+      self.assertEqual(mock_read.call_count, 1)
+      rest = list(iterator)
+
+    self.assertCountEqual([first] + rest, [{'key': i} for i in range(3)])
+
+  def test_iter_episodes_task_filter_skips_files(self) -> None:
+    """Tests that filtered-out task groups are never unpickled."""
+    self.checkpointer.save_episodes([{'key': 'a'}], 'TaskA_0')
+    self.checkpointer.save_episodes([{'key': 'b'}], 'TaskB_0')
+
+    with mock.patch.object(
+        checkpointer,
+        '_unzip_and_read_pickle',
+        wraps=checkpointer._unzip_and_read_pickle,
+    ) as mock_read:
+      episodes = list(
+          self.checkpointer.iter_episodes(
+              task_filter=lambda name: name.startswith('TaskB')
+          )
+      )
+
+    self.assertEqual(episodes, [{'key': 'b'}])
+    mock_read.assert_called_once()
+
+
+class ColumnarCheckpointerTest(absltest.TestCase):
+
+  def setUp(self) -> None:
+    super().setUp()
+    self.temp_dir = tempfile.TemporaryDirectory()
+    self.checkpointer = checkpointer.ColumnarCheckpointer(
+        directory=self.temp_dir.name
+    )
+
+  def tearDown(self) -> None:
+    super().tearDown()
+    self.temp_dir.cleanup()
+
+  def _episode(self, instance_id: int, screenshot: np.ndarray):
+    return {
+        'goal': 'Some goal',
+        'task_template': 'Task',
+        'instance_id': instance_id,
+        'is_successful': 1.0,
+        'run_time': 1.5,
+        'exception_info': None,
+        'episode_data': {
+            'raw_screenshot': [screenshot, screenshot.copy()],
+            'step_number': [0, 1],
+        },
+    }
+
+  def _count_blobs(self) -> int:
+    return sum(
+        len(files)
+        for _, _, files in os.walk(os.path.join(self.temp_dir.name, 'blobs'))
+    )
+
+  def test_save_and_load_valid_data(self) -> None:
+    task_group1 = [{'key': 'value1'}]
+    task_group2 = [{'key': 'value2', 'other': [1, 2]}]
+    self.checkpointer.save_episodes(task_group1, 'task_group1')
+    self.checkpointer.save_episodes(task_group2, 'task_group2')
+    loaded_data = self.checkpointer.load()
+    self.assertEqual(loaded_data, task_group1 + task_group2)
+
+  def test_load_empty_directory(self) -> None:
+    self.assertEqual([], self.checkpointer.load())
+
+  def test_overwrite_existing_task_group(self) -> None:
+    self.checkpointer.save_episodes([{'initial_key': 'a'}], 'task_group')
+    new_data = [{'new_key': 'b'}, {'new_key': 'c'}]
+    self.checkpointer.save_episodes(new_data, 'task_group')
+    self.assertEqual(new_data, self.checkpointer.load())
+
+  def test_load_is_sorted_by_instance(self) -> None:
+    for i in [10, 2, 1]:
+      self.checkpointer.save_episodes([{'i': i}], f'Task_{i}')
+    self.assertEqual(
+        [e['i'] for e in self.checkpointer.load(fields=['i'])], [1, 2, 10]
+    )
+
+  def test_identical_screenshots_are_stored_once(self) -> None:
+    screenshot = np.full((64, 64, 3), 7, dtype=np.uint8)
+    self.checkpointer.save_episodes([self._episode(0, screenshot)], 'Task_0')
+    self.checkpointer.save_episodes([self._episode(1, screenshot)], 'Task_1')
+    self.assertEqual(self._count_blobs(), 1)
+
+    loaded = self.checkpointer.load()
+
+    self.assertLen(loaded, 2)
+    for episode in loaded:
+      for frame in episode['episode_data']['raw_screenshot']:
+        np.testing.assert_array_equal(frame, screenshot)
+    self.assertEqual(loaded[1]['episode_data']['step_number'], [0, 1])
+
+  def test_load_fields_does_not_read_episode_data(self) -> None:
+    screenshot = np.zeros((64, 64, 3), dtype=np.uint8)
+    self.checkpointer.save_episodes([self._episode(0, screenshot)], 'Task_0')
+
+    with mock.patch.object(
+        checkpointer, '_unzip_and_read_pickle', autospec=True
+    ) as mock_read:
+      loaded = self.checkpointer.load(fields=['instance_id', 'run_time'])
+
+    mock_read.assert_not_called()
+    self.assertEqual(loaded, [{'instance_id': 0, 'run_time': 1.5}])
+
+  def test_load_missing_field_skips_task_group(self) -> None:
+    self.checkpointer.save_episodes([{'key1': 'value1'}], 'task_group1')
+    self.checkpointer.save_episodes(
+        [{'key1': 'value1', 'key2': 'value2'}], 'task_group2'
+    )
+    self.assertEqual(
+        self.checkpointer.load(fields=['key2']), [{'key2': 'value2'}]
+    )
+
+  def test_iter_episodes_task_filter(self) -> None:
+    screenshot = np.zeros((64, 64, 3), dtype=np.uint8)
+    self.checkpointer.save_episodes([self._episode(0, screenshot)], 'Task_0')
+    self.checkpointer.save_episodes([self._episode(1, screenshot)], 'Task_1')
+
+    episodes = list(
+        self.checkpointer.iter_episodes(
+            fields=['instance_id', 'episode_data'],
+            task_filter=lambda name: name == 'Task_1',
+        )
+    )
+
+    self.assertLen(episodes, 1)
+    self.assertEqual(episodes[0]['instance_id'], 1)
+    np.testing.assert_array_equal(
+        episodes[0]['episode_data']['raw_screenshot'][0], screenshot
+    )
+
+  def test_ignores_interrupted_save(self) -> None:
+    self.checkpointer.save_episodes([{'key': 'value1'}], 'task_group')
+    with open(
+        os.path.join(self.temp_dir.name, 'columns', 'key.pkl'), 'ab'
+    ) as f:
+      f.write(b'\x80\x04truncated')
+    self.assertEqual(self.checkpointer.load(), [{'key': 'value1'}])
+
+  def test_reads_records_appended_after_a_truncated_one(self) -> None:
+    self.checkpointer.save_episodes(
+        [{'goal': 'goal1', 'instance_id': 1}], 'Task_1'
+    )
+    goal_column = os.path.join(self.temp_dir.name, 'columns', 'goal.pkl')
+    # A crash cuts the record short, then a later run appends to the file.
+    os.truncate(goal_column, os.path.getsize(goal_column) - 3)
+    self.checkpointer.save_episodes(
+        [{'goal': 'goal2', 'instance_id': 2}], 'Task_2'
+    )
+
+    self.assertEqual(
+        self.checkpointer.load(fields=['goal', 'instance_id']),
+        [{'goal': 'goal2', 'instance_id': 2}],
+    )
+
+  def test_skips_records_with_bad_checksums(self) -> None:
+    self.checkpointer.save_episodes([{'key': 'value1'}], 'Task_1')
+    self.checkpointer.save_episodes([{'key': 'value2'}], 'Task_2')
+    key_column = os.path.join(self.temp_dir.name, 'columns', 'key.pkl')
+    with open(key_column, 'r+b') as f:
+      data = f.read()
+      f.seek(data.index(b'value1'))
+      f.write(b'VALUE1')
+
+    self.assertEqual(self.checkpointer.load(), [{'key': 'value2'}])
+
+
+class AsyncCheckpointerTest(absltest.TestCase):
+
+  def setUp(self) -> None:
+    super().setUp()
+    self.temp_dir = tempfile.TemporaryDirectory()
+    self.checkpointer = checkpointer.AsyncCheckpointer(
+        checkpointer.IncrementalCheckpointer(directory=self.temp_dir.name),
+        max_pending=2,
+    )
+
+  def tearDown(self) -> None:
+    super().tearDown()
+    self.checkpointer.close()
+    self.temp_dir.cleanup()
+
+  def test_save_and_load_valid_data(self) -> None:
+    task_groups = [[{'key': f'value{i}'}] for i in range(5)]
+    for i, task_group in enumerate(task_groups):
+      self.checkpointer.save_episodes(task_group, f'Task_{i}')
+    loaded_data = self.checkpointer.load()
+    self.assertCountEqual(loaded_data, [g[0] for g in task_groups])
+
+  def test_flush_writes_pending_episodes(self) -> None:
+    self.checkpointer.save_episodes([{'key': 'value'}], 'task_group')
+    self.checkpointer.flush()
+    self.assertTrue(
+        os.path.exists(os.path.join(self.temp_dir.name, 'task_group.pkl.gz'))
+    )
+
+  def test_save_blocks_when_queue_is_full(self) -> None:
+    release = threading.Event()
+    wrapped = mock.create_autospec(checkpointer.Checkpointer, instance=True)
+    wrapped.save_episodes.side_effect = lambda *_: release.wait()
+    async_checkpointer = checkpointer.AsyncCheckpointer(wrapped, max_pending=1)
+    # One group is being written and one is queued.
+    async_checkpointer.save_episodes([], 'a')
+    async_checkpointer.save_episodes([], 'b')
+
+    blocked = threading.Thread(
+        target=async_checkpointer.save_episodes, args=([], 'c')
+    )
+    blocked.start()
+    blocked.join(timeout=0.2)
+    self.assertTrue(blocked.is_alive())
+
+    release.set()
+    blocked.join()
+    async_checkpointer.close()
+    self.assertEqual(wrapped.save_episodes.call_count, 3)
+
+  def test_write_error_is_raised_on_flush(self) -> None:
+    wrapped = mock.create_autospec(checkpointer.Checkpointer, instance=True)
+    wrapped.save_episodes.side_effect = OSError('disk full')
+    async_checkpointer = checkpointer.AsyncCheckpointer(wrapped)
+    async_checkpointer.save_episodes([], 'a')
+
+    with self.assertRaises(OSError):
+      async_checkpointer.flush()
+    async_checkpointer.close()
+
+  def test_iter_episodes_flushes_first(self) -> None:
+    self.checkpointer.save_episodes([{'key': 'value'}], 'task_group')
+    self.assertEqual(
+        list(self.checkpointer.iter_episodes()), [{'key': 'value'}]
+    )
+
+  def test_save_after_close_raises(self) -> None:
+    self.checkpointer.close()
+    with self.assertRaises(ValueError):
+      self.checkpointer.save_episodes([], 'task_group')
+
+  def test_interrupted_write_keeps_previous_file(self) -> None:
+    incremental = checkpointer.IncrementalCheckpointer(self.temp_dir.name)
+    incremental.save_episodes([{'key': 'old'}], 'task_group')
+
+    with mock.patch.object(
+        checkpointer, '_gzip_pickle', return_value=b'new', autospec=True
+    ), mock.patch.object(os, 'replace', side_effect=KeyboardInterrupt):
+      with self.assertRaises(KeyboardInterrupt):
+        incremental.save_episodes([{'key': 'new'}], 'task_group')
+
+    self.assertEqual(incremental.load(), [{'key': 'old'}])
+    self.assertCountEqual(
+        os.listdir(self.temp_dir.name),
+        ['task_group.pkl.gz', _MANIFEST_FILENAME],
+    )
+
 
 if __name__ == '__main__':
   absltest.main()
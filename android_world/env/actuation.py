@@ -17,12 +17,31 @@
 import copy
 import logging
 import time
-from typing import Any
+from typing import Any, Optional
 from android_env import env_interface
 from android_world.env import adb_utils
 from android_world.env import android_world_controller
 from android_world.env import json_action
 from android_world.env import representation_utils
+from android_world.env import spatial_index
+from android_world.env import text_index
+
+# Bounds on the interval between UI polls while waiting for an element.
+_MIN_POLL_INTERVAL_SEC = 0.05
+_MAX_POLL_INTERVAL_SEC = 1.0
+
+
+def _describe_element(screen_elements: list[Any], index: Optional[int]) -> str:
+  """Returns a short description of a UI element for logging."""
+  if index is None:
+    return 'no element'
+  element = screen_elements[index]
+  return (
+      f'element {index} ({element.class_name},'
+      f' text={element.text!r},'
+      f' content_description={element.content_description!r},'
+      f' resource={element.resource_id or element.resource_name!r})'
+  )
 
 
 def execute_adb_action(
@@ -30,6 +49,8 @@ def execute_adb_action(
     screen_elements: list[Any],  # list[UIElement]
     screen_size: tuple[int, int],
     env: env_interface.AndroidEnvInterface,
+    batch_text_input: bool = False,
+    ui_index: Optional[spatial_index.UIElementIndex] = None,
 ) -> None:
   """Execute an action based on a JSONAction object.
 
@@ -38,7 +59,13 @@ def execute_adb_action(
       screen_elements: List of UI elements on the screen.
       screen_size: The (width, height) of the screen.
       env: The environment to execute the action in.
+      batch_text_input: Whether `input_text` actions type text in chunks
+        instead of word-by-word; see `adb_utils.type_text`.
+      ui_index: Spatial index over `screen_elements`, used to log which
+        elements coordinate actions land on. Built if not given.
   """
+  if ui_index is None:
+    ui_index = spatial_index.UIElementIndex(screen_elements)
   if action.action_type in ['click', 'double_tap', 'long_press']:
     idx = action.index
     x = action.x
@@ -62,6 +89,14 @@ def execute_adb_action(
         adb_utils.long_press(x, y, env)
     elif x is not None and y is not None:
       x, y = int(x), int(y)
+      if logging.getLogger().isEnabledFor(logging.INFO):
+        logging.info(
+            '%s at (%d, %d) lands on %s.',
+            action.action_type,
+            x,
+            y,
+            _describe_element(screen_elements, ui_index.element_at(x, y)),
+        )
       if action.action_type == 'click':
         adb_utils.tap_screen(x, y, env)
       elif action.action_type == 'double_tap':
@@ -80,7 +115,13 @@ def execute_adb_action(
         # First focus on enter text UI element.
         click_action = copy.deepcopy(action)
         click_action.action_type = 'click'
-        execute_adb_action(click_action, screen_elements, screen_size, env)
+        execute_adb_action(
+            click_action,
+            screen_elements,
+            screen_size,
+            env,
+            ui_index=ui_index,
+        )
         time.sleep(1.0)
 
       if action.clear_text:
@@ -101,7 +142,9 @@ def execute_adb_action(
         )
         time.sleep(1.0)
 
-      adb_utils.type_text(text, env, timeout_sec=10)
+      adb_utils.type_text(
+          text, env, timeout_sec=10, batched=batch_text_input
+      )
       adb_utils.press_enter_button(env)
     else:
       logging.warning(
@@ -149,6 +192,15 @@ def execute_adb_action(
       x_min, y_min, x_max, y_max = (0, 0, screen_width, screen_height)
 
     start_x, start_y = (x_min + x_max) // 2, (y_min + y_max) // 2
+    if not action.index and logging.getLogger().isEnabledFor(logging.INFO):
+      logging.info(
+          'Scrolling from (%d, %d), nearest scrollable is %s.',
+          start_x,
+          start_y,
+          _describe_element(
+              screen_elements, ui_index.nearest_scrollable(start_x, start_y)
+          ),
+      )
     direction = action.direction
     if direction == 'down':
       end_x, end_y = (x_min + x_max) // 2, y_min
@@ -251,22 +303,22 @@ def _wait_and_find_click_element(
     env: android_world_controller.AndroidWorldController,
     case_sensitive: bool,
     dist_threshold: int = 1,  # Allow one character difference.
+    timeout_sec: float = 10.0,
 ) -> json_action.JSONAction:
   """Wait for the screen to update until "element_text" appears."""
-  ui_elements = env.get_ui_elements()
-  element, distance = _find_target_element(
-      ui_elements, target_text, case_sensitive
-  )
-  start = time.time()
-  current = time.time()
-  while current - start < 10:
-    if distance <= dist_threshold:
-      return json_action.JSONAction(action_type='click', index=element)
-    ui_elements = env.get_ui_elements()
+  deadline = time.monotonic() + timeout_sec
+  delay = _MIN_POLL_INTERVAL_SEC
+  while True:
     element, distance = _find_target_element(
-        ui_elements, target_text, case_sensitive
+        env.get_ui_elements(), target_text, case_sensitive, dist_threshold
     )
-    current = time.time()
+    if distance <= dist_threshold:
+      return json_action.JSONAction(action_type='click', index=element)
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+      break
+    time.sleep(min(delay, remaining))
+    delay = min(delay * 2, _MAX_POLL_INTERVAL_SEC)
   raise ValueError(f'Target text "{target_text}" not found.')
 
 
@@ -274,41 +326,13 @@ def _find_target_element(
     ui_elements: list[representation_utils.UIElement],
     target_text: str,
     case_sensitive: bool,
+    dist_threshold: Optional[int] = None,
 ) -> tuple[int, int]:
-  """Determine the UI element with the closest match to target_text, by looking at the `text` and `content_description` of each UI element."""
-  best_match_index = -1
-  lowest_distance = int(1e9)
-
-  for i, element in enumerate(ui_elements):
-    for attr in [element.text, element.content_description]:
-      if attr is not None:
-        if case_sensitive:
-          distance = _levenshtein_distance(target_text, attr)
-        else:
-          distance = _levenshtein_distance(target_text.lower(), attr.lower())
-        if distance < lowest_distance:
-          lowest_distance = distance
-          best_match_index = i
-
-  return (best_match_index, lowest_distance)
-
+  """Determine the UI element with the closest match to target_text, by looking at the `text` and `content_description` of each UI element.
 
-def _levenshtein_distance(s1: str, s2: str) -> int:
-  """Compute the Levenshtein distance between two strings."""
-  if len(s1) < len(s2):
-    s1, s2 = s2, s1
-
-  if not s2:
-    return len(s1)
-
-  previous_row = range(len(s2) + 1)
-  for i, c1 in enumerate(s1):
-    current_row = [i + 1]
-    for j, c2 in enumerate(s2):
-      insertions = previous_row[j + 1] + 1
-      deletions = current_row[j] + 1
-      substitutions = previous_row[j] + (c1 != c2)
-      current_row.append(min(insertions, deletions, substitutions))
-    previous_row = current_row
-
-  return previous_row[-1]
+  If `dist_threshold` is given, only elements within that edit distance are
+  considered.
+  """
+  return text_index.UIElementTextIndex(ui_elements, case_sensitive).find(
+      target_text, max_distance=dist_threshold
+  )
@@ -23,6 +23,7 @@ from android_world.env import adb_utils
 from android_world.env import android_world_controller
 from android_world.env import json_action
 from android_world.env import representation_utils
+from android_world.env import spatial_index
 
 
 @mock.patch.object(time, 'sleep')
@@ -57,14 +58,39 @@ class TestWaitAndFindClickElement(absltest.TestCase):
   ):
     """Test when the element is not found within the timeout period."""
     mock_create.return_value = (-1, float('inf'))
-    mock_sleep.side_effect = (
-        0,
-        11,
-    )  # Simulating 11 seconds have passed
-    with self.assertRaises(ValueError):
-      actuation._wait_and_find_click_element(
-          'target', mock.MagicMock(), case_sensitive=True
-      )
+    mock_sleep.side_effect = None
+    # Simulating 11 seconds have passed
+    with mock.patch.object(time, 'monotonic', side_effect=[0, 1, 11]):
+      with self.assertRaises(ValueError):
+        actuation._wait_and_find_click_element(
+            'target', mock.MagicMock(), case_sensitive=True
+        )
+    mock_sleep.assert_called_once_with(actuation._MIN_POLL_INTERVAL_SEC)
+
+  def test_polls_with_backoff(
+      self,
+      unused_mock_representation_utils,
+      unused_mock_get_a11y_tree,
+      mock_create,
+      mock_sleep,
+  ):
+    """Test that the interval between polls grows until the element shows."""
+    mock_create.side_effect = [(-1, 5)] * 6 + [(3, 1)]
+    mock_sleep.side_effect = None
+    env = mock.MagicMock()
+
+    action = actuation._wait_and_find_click_element(
+        'target', env, case_sensitive=True
+    )
+
+    self.assertEqual(
+        action, json_action.JSONAction(action_type='click', index=3)
+    )
+    self.assertEqual(env.get_ui_elements.call_count, 7)
+    self.assertEqual(
+        [c.args[0] for c in mock_sleep.call_args_list],
+        [0.05, 0.1, 0.2, 0.4, 0.8, 1.0],
+    )
 
 
 class TestCreateReferredClickAction(absltest.TestCase):
@@ -112,6 +138,25 @@ class TestCreateReferredClickAction(absltest.TestCase):
     )
     self.assertGreater(distance, 0)
 
+  def test_dist_threshold(self):
+    """Test that elements beyond the threshold are not returned."""
+    ui_elements = [
+        representation_utils.UIElement(text='targets', content_description=''),
+        representation_utils.UIElement(text='tar', content_description=''),
+    ]
+    self.assertEqual(
+        actuation._find_target_element(
+            ui_elements, 'target', case_sensitive=True, dist_threshold=1
+        ),
+        (0, 1),
+    )
+    self.assertEqual(
+        actuation._find_target_element(
+            ui_elements, 'tart', case_sensitive=True, dist_threshold=0
+        ),
+        (-1, int(1e9)),
+    )
+
 
 class ExecuteAdbActionTest(absltest.TestCase):
 
@@ -143,6 +188,37 @@ class ExecuteAdbActionTest(absltest.TestCase):
       )
       mock_tap_screen.assert_called_once_with(50, 50, self.mock_env)
 
+  def test_click_by_coordinates_logs_target_element(self):
+    action = json_action.JSONAction(action_type='click', x=10, y=20)
+    with (
+        mock.patch.object(adb_utils, 'tap_screen'),
+        self.assertLogs(level='INFO') as logs,
+    ):
+      actuation.execute_adb_action(
+          action, self.screen_elements, self.screen_size, self.mock_env
+      )
+
+    self.assertIn('click at (10, 20) lands on element 0', logs.output[0])
+
+  def test_scroll_logs_nearest_scrollable(self):
+    action = json_action.JSONAction(action_type='scroll', direction='down')
+    index = mock.create_autospec(spatial_index.UIElementIndex, instance=True)
+    index.nearest_scrollable.return_value = None
+    with (
+        mock.patch.object(adb_utils, 'issue_generic_request'),
+        self.assertLogs(level='INFO') as logs,
+    ):
+      actuation.execute_adb_action(
+          action,
+          self.screen_elements,
+          self.screen_size,
+          self.mock_env,
+          ui_index=index,
+      )
+
+    index.nearest_scrollable.assert_called_once_with(50, 50)
+    self.assertIn('nearest scrollable is no element', logs.output[0])
+
   def test_click_by_coordinate_floats(self):
     action = json_action.JSONAction(action_type='click', x=50.2, y=50.3)
     with mock.patch.object(adb_utils, 'tap_screen') as mock_tap_screen:
@@ -172,11 +248,28 @@ class ExecuteAdbActionTest(absltest.TestCase):
       )
       mock_tap_screen.assert_called_once_with(50, 50, self.mock_env)
       mock_type_text.assert_called_once_with(
-          'test input', self.mock_env, timeout_sec=10
+          'test input', self.mock_env, timeout_sec=10, batched=False
       )
       mock_press_enter_button.assert_called_once_with(self.mock_env)
       mock_issue_generic_request.assert_not_called()
 
+  def test_input_text_batched(self):
+    action = json_action.JSONAction(action_type='input_text', text='test input')
+    with (
+        mock.patch.object(adb_utils, 'type_text') as mock_type_text,
+        mock.patch.object(adb_utils, 'press_enter_button'),
+    ):
+      actuation.execute_adb_action(
+          action,
+          self.screen_elements,
+          self.screen_size,
+          self.mock_env,
+          batch_text_input=True,
+      )
+      mock_type_text.assert_called_once_with(
+          'test input', self.mock_env, timeout_sec=10, batched=True
+      )
+
   def test_input_text_with_clear_text(self):
     action = json_action.JSONAction(
         action_type='input_text', text='test input', x=50, y=50, clear_text=True
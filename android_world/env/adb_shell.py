@@ -0,0 +1,278 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Persistent `adb shell` session with pipelined, sentinel-framed commands.
+
+Every `adb_utils.issue_generic_request(['shell', ...])` normally spawns a new
+`adb` client process, which then opens a new shell on the device. A
+`ShellSession` keeps a single `adb shell` open and writes commands to its stdin.
+Each command's output is terminated by a unique sentinel line carrying its exit
+code, so several commands can be in flight at once and their outputs are
+matched back up in order.
+
+Sessions are attached to an environment with `attach_session`, after which
+`adb_utils.issue_generic_request` routes shell commands through it.
+"""
+
+import collections
+from concurrent import futures
+import dataclasses
+import subprocess
+import threading
+from typing import Any, Optional, Sequence
+import uuid
+import weakref
+
+from absl import logging
+from android_env import env_interface
+from android_env.wrappers import base_wrapper
+
+_READ_CHUNK_BYTES = 65536
+
+
+class ShellSessionError(RuntimeError):
+  """Raised when a shell session is closed or its output cannot be framed."""
+
+
+class CommandNotSentError(ShellSessionError):
+  """Raised when a command could not be sent, so it never ran."""
+
+
+@dataclasses.dataclass(frozen=True)
+class ShellResult:
+  """Output of a single command run through a `ShellSession`."""
+
+  output: bytes
+  exit_code: int
+
+
+class ShellSession:
+  """A long-lived shell process that runs commands sent to its stdin.
+
+  Each command runs in its own subshell with stdin redirected from /dev/null,
+  so commands cannot change the session's working directory or environment,
+  nor consume the input meant for later commands.
+  """
+
+  def __init__(
+      self,
+      command: Sequence[str],
+      env_vars: Optional[dict[str, str]] = None,
+  ):
+    """Starts the shell process.
+
+    Args:
+      command: The command that opens the shell, e.g. `['adb', '-s',
+        'emulator-5554', 'shell']`.
+      env_vars: Environment variables for the shell process. Defaults to the
+        current environment.
+    """
+    self._sentinel = f'__aw_shell_{uuid.uuid4().hex}__'.encode()
+    self._marker = b'\n' + self._sentinel + b' '
+    self._process = subprocess.Popen(
+        list(command),
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        env=env_vars,
+    )
+    # Re-entrant so a failed write can fail the session while holding it.
+    self._write_lock = threading.RLock()
+    self._pending: collections.deque[futures.Future[ShellResult]] = (
+        collections.deque()
+    )
+    self._error: Optional[ShellSessionError] = None
+    self._reader = threading.Thread(
+        target=self._read_loop, name='adb-shell-session-reader', daemon=True
+    )
+    self._reader.start()
+
+  @property
+  def alive(self) -> bool:
+    """Whether the session can accept commands."""
+    return self._error is None and self._process.poll() is None
+
+  def submit(self, command: str) -> futures.Future[ShellResult]:
+    """Sends a command without waiting for it to finish.
+
+    Args:
+      command: The shell command line, as it would be passed to `adb shell`.
+
+    Returns:
+      A future that resolves to the command's `ShellResult`, or fails with
+      `ShellSessionError` if the session dies first.
+
+    Raises:
+      CommandNotSentError: If the session is already closed or the command
+        cannot be written to it.
+    """
+    framed = (
+        f'( {command}\n) </dev/null 2>&1; printf'
+        f" '\\n{self._sentinel.decode()} %d\\n' $?\n"
+    ).encode()
+    future = futures.Future()
+    with self._write_lock:
+      if self._error is not None:
+        raise CommandNotSentError(str(self._error)) from self._error
+      self._pending.append(future)
+      try:
+        self._process.stdin.write(framed)
+        self._process.stdin.flush()
+      except (OSError, ValueError) as e:
+        self._fail(ShellSessionError(f'Failed to write to shell: {e}'))
+        raise CommandNotSentError(str(self._error)) from e
+    return future
+
+  def run(self, command: str, timeout: Optional[float] = None) -> ShellResult:
+    """Runs a command and waits for its result.
+
+    A command that times out leaves the output stream in an unknown state, so
+    the session is closed.
+
+    Args:
+      command: The shell command line.
+      timeout: Seconds to wait for the command. None waits indefinitely.
+
+    Returns:
+      The command's output and exit code.
+
+    Raises:
+      CommandNotSentError: If the command could not be sent.
+      ShellSessionError: If the session fails or the command times out after
+        the command was sent, so it may have run.
+    """
+    future = self.submit(command)
+    try:
+      return future.result(timeout=timeout)
+    except futures.TimeoutError as e:
+      self.close()
+      raise ShellSessionError(
+          f'Command timed out after {timeout} seconds: {command!r}'
+      ) from e
+
+  def close(self) -> None:
+    """Terminates the shell and fails any commands still in flight."""
+    logging.info('Closing adb shell session.')
+    self._fail(ShellSessionError('Shell session closed.'))
+    if self._process.poll() is None:
+      try:
+        self._process.stdin.close()
+      except OSError:
+        pass
+      self._process.terminate()
+      try:
+        self._process.wait(timeout=5)
+      except subprocess.TimeoutExpired:
+        self._process.kill()
+
+  def _fail(self, error: ShellSessionError) -> None:
+    """Marks the session as dead and fails all pending commands."""
+    with self._write_lock:
+      if self._error is None:
+        self._error = error
+      while self._pending:
+        future = self._pending.popleft()
+        if not future.done():
+          future.set_exception(self._error)
+
+  def _read_loop(self) -> None:
+    """Splits stdout on sentinel lines and resolves pending commands."""
+    # The buffer always starts with the newline that ended the previous sentinel
+    # line (or a synthetic one), followed by the next command's output.
+    buffer = bytearray(b'\n')
+    search_from = 0
+    while True:
+      chunk = self._process.stdout.read1(_READ_CHUNK_BYTES)
+      if not chunk:
+        self._fail(ShellSessionError('Shell exited.'))
+        return
+      buffer += chunk
+      while True:
+        start = buffer.find(self._marker, search_from)
+        if start < 0:
+          # Only rescan the tail that could hold a partial marker.
+          search_from = max(0, len(buffer) - len(self._marker))
+          break
+        search_from = start
+        end = buffer.find(b'\n', start + len(self._marker))
+        if end < 0:
+          break
+        output = bytes(buffer[1:start])
+        try:
+          exit_code = int(buffer[start + len(self._marker) : end])
+        except ValueError:
+          self._fail(ShellSessionError('Malformed sentinel line.'))
+          return
+        del buffer[:end]
+        search_from = 0
+        with self._write_lock:
+          future = self._pending.popleft() if self._pending else None
+        if future is None:
+          self._fail(ShellSessionError('Received output with no command.'))
+          return
+        future.set_result(ShellResult(output=output, exit_code=exit_code))
+
+
+def _base_env(
+    env: env_interface.AndroidEnvInterface,
+) -> env_interface.AndroidEnvInterface:
+  """Returns the innermost environment under any wrappers."""
+  while isinstance(env, base_wrapper.BaseWrapper):
+    env = env._env  # pylint: disable=protected-access
+  return env
+
+
+_SESSIONS: weakref.WeakKeyDictionary[Any, ShellSession] = (
+    weakref.WeakKeyDictionary()
+)
+_SESSIONS_LOCK = threading.Lock()
+
+
+def attach_session(
+    env: env_interface.AndroidEnvInterface, session: ShellSession
+) -> None:
+  """Routes shell commands for `env`, and anything wrapping it, to `session`.
+
+  Any session previously attached to the environment is closed.
+
+  Args:
+    env: The environment, or any wrapper around it.
+    session: The session to route through.
+  """
+  with _SESSIONS_LOCK:
+    previous = _SESSIONS.get(_base_env(env))
+    _SESSIONS[_base_env(env)] = session
+  if previous is not None and previous is not session:
+    previous.close()
+
+
+def detach_session(env: env_interface.AndroidEnvInterface) -> None:
+  """Closes and detaches the session attached to `env`, if any."""
+  with _SESSIONS_LOCK:
+    session = _SESSIONS.pop(_base_env(env), None)
+  if session is not None:
+    session.close()
+
+
+def get_session(
+    env: env_interface.AndroidEnvInterface,
+) -> Optional[ShellSession]:
+  """Returns the live session attached to `env`, if any."""
+  if not _SESSIONS:
+    return None
+  with _SESSIONS_LOCK:
+    session = _SESSIONS.get(_base_env(env))
+  if session is None or not session.alive:
+    return None
+  return session
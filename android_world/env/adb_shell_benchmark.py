@@ -0,0 +1,137 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks adb shell requests with and without a persistent shell session.
+
+A fake `adb` script stands in for the real binary: it strips adb's global
+options and runs `shell` commands with the local /bin/sh, optionally sleeping
+first to model the cost of opening a shell on the device. Requests go through
+android_env's own `AdbController`, exactly as `env.execute_adb_call` does.
+
+  python -m android_world.env.adb_shell_benchmark --num_calls=500
+"""
+
+from collections.abc import Sequence
+import os
+import stat
+import tempfile
+import time
+
+from absl import app
+from absl import flags
+from android_env.components import adb_call_parser
+from android_env.components import adb_controller
+from android_env.components import config_classes
+from android_env.proto import adb_pb2
+from android_world.env import adb_shell
+from android_world.env import adb_utils
+
+_NUM_CALLS = flags.DEFINE_integer(
+    'num_calls', 500, 'Number of shell requests per measurement.'
+)
+_CONNECT_LATENCY_SEC = flags.DEFINE_float(
+    'connect_latency_sec',
+    0.0,
+    'Simulated time for the fake adb to open a shell on the device.',
+)
+
+_FAKE_ADB = """\
+#!/bin/sh
+while [ $# -gt 0 ]; do
+  case "$1" in
+    -P|-s) shift 2 ;;
+    *) break ;;
+  esac
+done
+[ "$1" = shell ] || exit 0
+shift
+sleep {latency}
+if [ $# -eq 0 ]; then exec /bin/sh; fi
+exec /bin/sh -c "$*"
+"""
+
+# Shaped like the helpers in adb_utils, e.g. `get_orientation`.
+_COMMAND = [
+    'shell',
+    'echo mCurrentRotation=ROTATION_90 | grep mCurrentRotation',
+]
+
+
+class _FakeEnv:
+  """Minimal environment that executes adb calls like AndroidEnv does."""
+
+  def __init__(self, adb_path: str):
+    self.adb_controller = adb_controller.AdbController(
+        config_classes.AdbControllerConfig(
+            adb_path=adb_path, device_name='fake-device'
+        )
+    )
+    self._parser = adb_call_parser.AdbCallParser(self.adb_controller)
+
+  def execute_adb_call(self, call: adb_pb2.AdbRequest) -> adb_pb2.AdbResponse:
+    return self._parser.parse(call)
+
+
+def _report(name: str, num_calls: int, elapsed: float) -> None:
+  print(
+      f'{name:>28}: {num_calls / elapsed:9.1f} calls/s'
+      f' ({elapsed / num_calls * 1e3:7.2f} ms/call)'
+  )
+
+
+def _run_sequential(name: str, env: _FakeEnv) -> None:
+  """Issues requests one after another through `issue_generic_request`."""
+  start = time.perf_counter()
+  for _ in range(_NUM_CALLS.value):
+    response = adb_utils.issue_generic_request(_COMMAND, env)
+    assert response.generic.output == b'mCurrentRotation=ROTATION_90\n'
+  _report(name, _NUM_CALLS.value, time.perf_counter() - start)
+
+
+def _run_pipelined(session: adb_shell.ShellSession) -> None:
+  """Submits all requests at once and then collects the results."""
+  command = ' '.join(_COMMAND[1:])
+  start = time.perf_counter()
+  pending = [session.submit(command) for _ in range(_NUM_CALLS.value)]
+  for future in pending:
+    assert future.result().output == b'mCurrentRotation=ROTATION_90\n'
+  elapsed = time.perf_counter() - start
+  _report('shell session (pipelined)', _NUM_CALLS.value, elapsed)
+
+
+def main(argv: Sequence[str]) -> None:
+  if len(argv) > 1:
+    raise app.UsageError('Too many command-line arguments.')
+  with tempfile.TemporaryDirectory() as tmp_dir:
+    adb_path = os.path.join(tmp_dir, 'adb')
+    with open(adb_path, 'w') as f:
+      f.write(_FAKE_ADB.format(latency=_CONNECT_LATENCY_SEC.value))
+    os.chmod(adb_path, os.stat(adb_path).st_mode | stat.S_IEXEC)
+    env = _FakeEnv(adb_path)
+
+    _run_sequential('one adb process per call', env)
+
+    session = adb_shell.ShellSession(
+        env.adb_controller.command_prefix() + ['shell']
+    )
+    adb_shell.attach_session(env, session)
+    try:
+      _run_sequential('shell session (sequential)', env)
+      _run_pipelined(session)
+    finally:
+      adb_shell.detach_session(env)
+
+
+if __name__ == '__main__':
+  app.run(main)
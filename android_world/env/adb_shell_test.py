@@ -0,0 +1,123 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for adb_shell, using a local shell in place of `adb shell`."""
+
+from unittest import mock
+
+from absl.testing import absltest
+from android_env import env_interface
+from android_env.wrappers import base_wrapper
+from android_world.env import adb_shell
+
+
+class ShellSessionTest(absltest.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.session = adb_shell.ShellSession(['/bin/sh'])
+    self.addCleanup(self.session.close)
+
+  def test_run_returns_output_and_exit_code(self):
+    result = self.session.run('echo hello; echo world', timeout=5)
+
+    self.assertEqual(result, adb_shell.ShellResult(b'hello\nworld\n', 0))
+
+  def test_run_preserves_output_without_trailing_newline(self):
+    self.assertEqual(self.session.run('printf abc', timeout=5).output, b'abc')
+    self.assertEqual(self.session.run('true', timeout=5).output, b'')
+
+  def test_run_merges_stderr_and_reports_failure(self):
+    result = self.session.run('echo oops >&2; exit 3', timeout=5)
+
+    self.assertEqual(result, adb_shell.ShellResult(b'oops\n', 3))
+    self.assertTrue(self.session.alive)
+
+  def test_pipelined_commands_resolve_in_order(self):
+    futures = [self.session.submit(f'echo {i}') for i in range(50)]
+
+    outputs = [future.result(timeout=5).output for future in futures]
+
+    self.assertEqual(outputs, [f'{i}\n'.encode() for i in range(50)])
+
+  def test_commands_are_isolated(self):
+    self.session.run('cd /; FOO=bar; export FOO', timeout=5)
+
+    self.assertNotEqual(self.session.run('pwd', timeout=5).output, b'/\n')
+    self.assertEqual(self.session.run('echo "$FOO"', timeout=5).output, b'\n')
+    # Commands cannot read the session's own stdin.
+    self.assertEqual(self.session.run('cat', timeout=5).output, b'')
+
+  def test_large_output(self):
+    result = self.session.run('yes line | head -n 100000', timeout=10)
+
+    self.assertEqual(result.output, b'line\n' * 100000)
+
+  def test_timeout_closes_session(self):
+    with self.assertRaises(adb_shell.ShellSessionError):
+      self.session.run('sleep 5', timeout=0.1)
+
+    self.assertFalse(self.session.alive)
+    with self.assertRaises(adb_shell.CommandNotSentError):
+      self.session.submit('echo hello')
+
+  def test_shell_exit_fails_pending_commands(self):
+    future = self.session.submit('kill -9 $$')
+
+    with self.assertRaises(adb_shell.ShellSessionError):
+      future.result(timeout=5)
+    self.assertFalse(self.session.alive)
+
+
+class SessionRegistryTest(absltest.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.env = mock.create_autospec(env_interface.AndroidEnvInterface)
+    self.wrapped_env = base_wrapper.BaseWrapper(self.env)
+
+  def test_session_is_shared_through_wrappers(self):
+    session = mock.create_autospec(adb_shell.ShellSession, instance=True)
+    session.alive = True
+
+    adb_shell.attach_session(self.wrapped_env, session)
+    self.addCleanup(adb_shell.detach_session, self.env)
+
+    self.assertIs(adb_shell.get_session(self.env), session)
+    self.assertIs(adb_shell.get_session(self.wrapped_env), session)
+
+  def test_dead_session_is_not_returned(self):
+    session = mock.create_autospec(adb_shell.ShellSession, instance=True)
+    session.alive = False
+
+    adb_shell.attach_session(self.env, session)
+    self.addCleanup(adb_shell.detach_session, self.env)
+
+    self.assertIsNone(adb_shell.get_session(self.env))
+
+  def test_attach_replaces_and_detach_closes(self):
+    first = mock.create_autospec(adb_shell.ShellSession, instance=True)
+    second = mock.create_autospec(adb_shell.ShellSession, instance=True)
+
+    adb_shell.attach_session(self.env, first)
+    adb_shell.attach_session(self.env, second)
+    first.close.assert_called_once()
+
+    adb_shell.detach_session(self.wrapped_env)
+    second.close.assert_called_once()
+    self.assertIsNone(adb_shell.get_session(self.env))
+
+
+if __name__ == '__main__':
+  absltest.main()
@@ -14,21 +14,28 @@
 
 """Utilties to interact with the environment using adb."""
 
+import dataclasses
 import os
 import re
 import time
-from typing import Any, Callable, Collection, Iterable, Literal, Optional, TypeVar
+from typing import Any, Callable, Collection, Iterable, Iterator, Literal, Optional, TypeVar
 import unicodedata
 from absl import logging
 from android_env import env_interface
 from android_env.components import errors
 from android_env.proto import adb_pb2
+from android_world.env import adb_shell
 import immutabledict
 
 T = TypeVar('T')
 
 _DEFAULT_TIMEOUT_SECS = 10
 
+# Maximum length of text sent in one `adb shell input text` call when typing in
+# batched mode. Older adb versions limit shell command lines to 1024 bytes; this
+# leaves room for the `input text` prefix.
+_MAX_TEXT_CHUNK_CHARS = 1000
+
 # pylint: disable=line-too-long
 # Maps app names to the activity that should be launched to open the app.
 _PATTERN_TO_ACTIVITY = immutabledict.immutabledict({
@@ -507,10 +514,105 @@ def _split_words_and_newlines(text: str) -> Iterable[str]:
       yield '\n'
 
 
+def _chunk_line(line: str, max_chars: int) -> Iterator[tuple[str, str]]:
+  """Splits a line of text into chunks for `adb shell input text`.
+
+  Chunks are split between words where possible; words that are too long on
+  their own are split between characters.
+
+  Args:
+    line: A line of text, without newlines.
+    max_chars: Maximum length of a chunk after formatting with
+      `_adb_text_format`.
+
+  Yields:
+    (raw, formatted) pairs, where raw is the part of `line` in the chunk.
+  """
+  raw_chunk, chunk = '', ''
+  for token in _split_words_and_newlines(line):
+    raw_token = ' ' if token == '%s' else token
+    formatted = _adb_text_format(token)
+    if len(formatted) > max_chars:
+      pieces = [(c, _adb_text_format(c)) for c in raw_token]
+    else:
+      pieces = [(raw_token, formatted)]
+    for raw_piece, piece in pieces:
+      if chunk and len(chunk) + len(piece) > max_chars:
+        yield raw_chunk, chunk
+        raw_chunk, chunk = '', ''
+      raw_chunk += raw_piece
+      chunk += piece
+  if chunk:
+    yield raw_chunk, chunk
+
+
+def _type_chunk(
+    chunk: str,
+    env: env_interface.AndroidEnvInterface,
+    timeout_sec: Optional[float],
+) -> bool:
+  """Types a chunk formatted with `_adb_text_format`.
+
+  `input text` prints nothing once it typed the text, but it can report an
+  error, e.g. an exception on the device, while adb still succeeds. So its
+  output is checked as well as the status.
+
+  Args:
+    chunk: The formatted chunk.
+    env: The environment.
+    timeout_sec: A timeout to use for this operation.
+
+  Returns:
+    Whether the chunk was typed.
+  """
+  logging.info('Attempting to type chunk: %r', chunk)
+  try:
+    response = issue_generic_request(
+        ['shell', 'input', 'text', chunk], env, timeout_sec
+    )
+  except errors.AdbControllerError as e:
+    logging.warning('Failed to type chunk %r: %s', chunk, e)
+    return False
+  if response.status != adb_pb2.AdbResponse.Status.OK:
+    return False
+  output = response.generic.output.decode('utf-8', errors='replace').strip()
+  if output:
+    logging.warning('Typing chunk %r reported: %s', chunk, output)
+    return False
+  return True
+
+
+def _type_text_batched(
+    text: str,
+    env: env_interface.AndroidEnvInterface,
+    timeout_sec: Optional[float],
+    max_chunk_chars: int,
+) -> None:
+  """Types text in as few adb calls as possible; see `type_text`."""
+  lines = text.split('\n')
+  for i, line in enumerate(lines):
+    chunks = list(_chunk_line(line, max_chunk_chars))
+    for j, (_, chunk) in enumerate(chunks):
+      if not _type_chunk(chunk, env, timeout_sec):
+        logging.warning(
+            'Failed to type chunk %r; typing the rest word-by-word.', chunk
+        )
+        remaining = ''.join(raw for raw, _ in chunks[j:])
+        if i < len(lines) - 1:
+          remaining += '\n' + '\n'.join(lines[i + 1 :])
+        type_text(remaining, env, timeout_sec)
+        return
+    if i < len(lines) - 1:
+      logging.info('Found \\n, pressing enter button.')
+      press_enter_button(env)
+
+
 def type_text(
     text: str,
     env: env_interface.AndroidEnvInterface,
     timeout_sec: Optional[float] = _DEFAULT_TIMEOUT_SECS,
+    batched: bool = False,
+    max_chunk_chars: int = _MAX_TEXT_CHUNK_CHARS,
 ) -> None:
   """Issues an AdbRequest to type the specified text string word-by-word.
 
@@ -519,12 +621,22 @@ def type_text(
   out and word-by-word fixes this, while allowing us to keep a lot timeout per
   word.
 
+  In batched mode each line is instead typed in chunks of up to
+  `max_chunk_chars` formatted characters, which takes one adb call per chunk
+  rather than two per word. If a chunk fails or `input` reports an error for
+  it, the rest of the text, including that chunk, is typed word-by-word.
+
   Args:
     text: The text string to be typed.
     env: The environment.
     timeout_sec: A timeout to use for this operation. Note: For longer texts,
       this should be longer as it takes longer to type.
+    batched: Whether to type in chunks rather than word-by-word.
+    max_chunk_chars: Maximum chunk length in batched mode.
   """
+  if batched:
+    _type_text_batched(text, env, timeout_sec, max_chunk_chars)
+    return
   words = _split_words_and_newlines(text)
   for word in words:
     if word == '\n':
@@ -558,6 +670,10 @@ def issue_generic_request(
   # or
   issue_generic_request('shell ls', env)
 
+  Shell requests are routed through the persistent shell session attached to
+  `env` with `adb_shell.attach_session`, if there is one, falling back to a
+  one-off adb call if the command could not be sent to the session.
+
   Args:
     args: Set of arguments to be issued with the ABD broadcast. Can also be a
       string.
@@ -573,6 +689,13 @@ def issue_generic_request(
   else:
     args_str = ' '.join(args)
 
+  if len(args) > 1 and args[0] == 'shell':
+    session = adb_shell.get_session(env)
+    if session is not None:
+      response = _issue_shell_request(session, args_str, env, timeout_sec)
+      if response is not None:
+        return response
+
   response = env.execute_adb_call(
       adb_pb2.AdbRequest(
           generic=adb_pb2.AdbRequest.GenericRequest(args=args),
@@ -585,6 +708,58 @@ def issue_generic_request(
   return response
 
 
+def _issue_shell_request(
+    session: adb_shell.ShellSession,
+    args_str: str,
+    env: env_interface.AndroidEnvInterface,
+    timeout_sec: Optional[float],
+) -> Optional[adb_pb2.AdbResponse]:
+  """Runs an `adb shell` request through a persistent shell session.
+
+  Args:
+    session: The session to run the command in.
+    args_str: The full request, starting with "shell ". `adb` joins shell
+      arguments with spaces, so the remainder is the exact command line.
+    env: The environment the session is attached to.
+    timeout_sec: A timeout to use for this operation.
+
+  Returns:
+    The adb response, or None if the command could not be sent and the request
+    should be issued the regular way instead. The session is detached in that
+    case.
+
+  Raises:
+    errors.AdbControllerError: If the command exits with a non-zero status, as
+      the regular path does, or if the session fails after the command was
+      sent. The command may have run then, so it is not retried.
+  """
+  command = args_str[len('shell ') :]
+  try:
+    result = session.run(command, timeout=timeout_sec)
+  except adb_shell.CommandNotSentError as e:
+    logging.warning(
+        'adb shell session failed (%s); falling back to a one-off adb call.', e
+    )
+    adb_shell.detach_session(env)
+    return None
+  except adb_shell.ShellSessionError as e:
+    adb_shell.detach_session(env)
+    raise errors.AdbControllerError(
+        f'adb shell session failed running [adb {args_str}]: {e}'
+    ) from e
+  if result.exit_code != 0:
+    logging.error('Failed to issue generic adb request: %r', args_str)
+    raise errors.AdbControllerError(
+        f'Error executing adb command: [adb {args_str}]\n'
+        f'Exit code: {result.exit_code}\n'
+        f'adb stdout: [{result.output}]'
+    )
+  return adb_pb2.AdbResponse(
+      status=adb_pb2.AdbResponse.Status.OK,
+      generic=adb_pb2.AdbResponse.GenericResponse(output=result.output),
+  )
+
+
 def get_adb_activity(app_name: str) -> Optional[str]:
   """Get a mapping of regex patterns to ADB activities top Android apps."""
   for pattern, activity in _PATTERN_TO_ACTIVITY.items():
@@ -1026,6 +1201,10 @@ def toggle_airplane_mode(
 ) -> adb_pb2.AdbResponse:
   """Toggles airplane mode on or off.
 
+  If `env` is, or wraps, an `AndroidWorldController`, its airplane mode
+  watcher is invalidated so that the next a11y tree fetch checks airplane mode
+  again.
+
   Args:
     on_or_off: Whether to turn it on or off.
     env: The Android environment.
@@ -1039,9 +1218,14 @@ def toggle_airplane_mode(
   if on_or_off not in ('on', 'off'):
     raise ValueError('Must be one of on or off.')
   state = '1' if on_or_off == 'on' else '0'
-  return issue_generic_request(
-      ['shell', 'settings', 'put', 'global', 'airplane_mode_on', state], env
-  )
+  try:
+    return issue_generic_request(
+        ['shell', 'settings', 'put', 'global', 'airplane_mode_on', state], env
+    )
+  finally:
+    watcher = getattr(env, 'airplane_mode_watcher', None)
+    if watcher is not None:
+      watcher.invalidate()
 
 
 def install_apk(
@@ -1571,6 +1755,49 @@ def get_screen_size(env: env_interface.AndroidEnvInterface) -> tuple[int, int]:
   )
 
 
+def _parse_logical_screen_size(raw_output: str) -> tuple[int, int]:
+  """Parses the logical screen size from `dumpsys input` output."""
+  pattern = r'logicalFrame=\[0, 0, (\d+), (\d+)\]'
+  matches = re.findall(pattern, raw_output)
+  for m in matches:
+    if int(m[0]) == 0 and int(m[1]) == 0:
+      continue
+    width, height = (int(m[0]), int(m[1]))
+    return (width, height)
+  raise ValueError('Failed to get logical screen size.')
+
+
+def _parse_physical_frame(
+    raw_output: str,
+) -> Optional[tuple[int, int, int, int]]:
+  """Parses the first non-empty physical frame from `dumpsys input` output."""
+  pattern = r'physicalFrame=\[(\d+), (\d+), (\d+), (\d+)\]'
+  matches = re.findall(pattern, raw_output)
+  for m in matches:
+    if int(m[0]) == 0 and int(m[1]) == 0 and int(m[2]) == 0 and int(m[3]) == 0:
+      continue
+    return (int(m[0]), int(m[1]), int(m[2]), int(m[3]))
+  return None
+
+
+def _to_portrait_frame(
+    frame: tuple[int, int, int, int], orientation: int
+) -> tuple[int, int, int, int]:
+  """Converts a physical frame in the current orientation to portrait."""
+  if orientation == 0 or orientation == 2:
+    return frame
+  return (frame[1], frame[0], frame[3], frame[2])
+
+
+def _parse_orientation(raw_output: str) -> int:
+  """Parses the screen orientation from `dumpsys window` output."""
+  pattern = r'mCurrentRotation=ROTATION_(\d+)'
+  matches = re.findall(pattern, raw_output)
+  for m in matches:
+    return int(m) // 90
+  raise ValueError('Failed to get orientation.')
+
+
 def get_logical_screen_size(
     env: env_interface.AndroidEnvInterface,
 ) -> tuple[int, int]:
@@ -1591,14 +1818,7 @@ def get_logical_screen_size(
       'shell dumpsys input | grep logicalFrame', env
   )
   if response.status:
-    raw_output = response.generic.output.decode('utf-8')
-    pattern = r'logicalFrame=\[0, 0, (\d+), (\d+)\]'
-    matches = re.findall(pattern, raw_output)
-    for m in matches:
-      if int(m[0]) == 0 and int(m[1]) == 0:
-        continue
-      width, height = (int(m[0]), int(m[1]))
-      return (width, height)
+    return _parse_logical_screen_size(response.generic.output.decode('utf-8'))
   raise ValueError('Failed to get logical screen size.')
 
 
@@ -1618,21 +1838,9 @@ def get_physical_frame_boundary(
       'shell dumpsys input | grep physicalFrame', env
   )
   if response.status:
-    raw_output = response.generic.output.decode('utf-8')
-    pattern = r'physicalFrame=\[(\d+), (\d+), (\d+), (\d+)\]'
-    matches = re.findall(pattern, raw_output)
-    for m in matches:
-      if (
-          int(m[0]) == 0
-          and int(m[1]) == 0
-          and int(m[2]) == 0
-          and int(m[3]) == 0
-      ):
-        continue
-      orientation = get_orientation(env)
-      if orientation == 0 or orientation == 2:
-        return (int(m[0]), int(m[1]), int(m[2]), int(m[3]))
-      return (int(m[1]), int(m[0]), int(m[3]), int(m[2]))
+    frame = _parse_physical_frame(response.generic.output.decode('utf-8'))
+    if frame is not None:
+      return _to_portrait_frame(frame, get_orientation(env))
   raise ValueError('Failed to get physical frame boundary.')
 
 
@@ -1654,14 +1862,61 @@ def get_orientation(
       'shell dumpsys window | grep mCurrentRotation', env
   )
   if response.status:
-    raw_output = response.generic.output.decode('utf-8')
-    pattern = r'mCurrentRotation=ROTATION_(\d+)'
-    matches = re.findall(pattern, raw_output)
-    for m in matches:
-      return int(m) // 90
+    return _parse_orientation(response.generic.output.decode('utf-8'))
   raise ValueError('Failed to get orientation.')
 
 
+@dataclasses.dataclass(frozen=True)
+class ScreenGeometry:
+  """Screen geometry of the device.
+
+  Attributes:
+    logical_screen_size: See `get_logical_screen_size`.
+    orientation: See `get_orientation`.
+    physical_frame_boundary: See `get_physical_frame_boundary`.
+  """
+
+  logical_screen_size: tuple[int, int]
+  orientation: int
+  physical_frame_boundary: tuple[int, int, int, int]
+
+
+def get_screen_geometry(
+    env: env_interface.AndroidEnvInterface,
+) -> ScreenGeometry:
+  """Returns the logical size, orientation and physical frame in one adb call.
+
+  Args:
+    env: The AndroidEnv interface.
+
+  Returns:
+    The screen geometry.
+
+  Raises:
+    ValueError: If any of the values cannot be parsed.
+  """
+  response = issue_generic_request(
+      [
+          'shell',
+          'dumpsys input | grep -e logicalFrame -e physicalFrame;'
+          ' dumpsys window | grep mCurrentRotation',
+      ],
+      env,
+  )
+  if not response.status:
+    raise ValueError('Failed to get screen geometry.')
+  raw_output = response.generic.output.decode('utf-8')
+  orientation = _parse_orientation(raw_output)
+  frame = _parse_physical_frame(raw_output)
+  if frame is None:
+    raise ValueError('Failed to get physical frame boundary.')
+  return ScreenGeometry(
+      logical_screen_size=_parse_logical_screen_size(raw_output),
+      orientation=orientation,
+      physical_frame_boundary=_to_portrait_frame(frame, orientation),
+  )
+
+
 def set_screen_size(
     width: int,
     height: int,
@@ -1742,3 +1997,58 @@ def uiautomator_dump(env, timeout_sec: Optional[float] = 30) -> str:
   response = issue_generic_request(read_args, env, timeout_sec=timeout_sec)
 
   return response.generic.output.decode('utf-8')
+
+
+_UIAUTOMATOR_XML_END = '</hierarchy>'
+
+
+def _extract_uiautomator_xml(output: str) -> Optional[str]:
+  """Returns the XML document in `uiautomator dump` stream output, if any.
+
+  When dumping to a stream, uiautomator writes the status line
+  "UI hierchary dumped to: /dev/tty" (sic) right after the XML, without a
+  separating newline, and some builds print warnings before it.
+
+  Args:
+    output: The output of `uiautomator dump /dev/tty`.
+
+  Returns:
+    The XML document, or None if the output does not contain one.
+  """
+  start = output.find('<?xml')
+  if start < 0:
+    start = output.find('<hierarchy')
+  end = output.rfind(_UIAUTOMATOR_XML_END)
+  if start < 0 or end < start:
+    return None
+  return output[start : end + len(_UIAUTOMATOR_XML_END)]
+
+
+def uiautomator_dump_to_stdout(
+    env, timeout_sec: Optional[float] = 30
+) -> Optional[str]:
+  """Returns the UI hierarchy using a single adb call and no file on device.
+
+  Unlike `uiautomator_dump`, the hierarchy is written to the shell's output
+  rather than to /sdcard and read back.
+
+  Args:
+    env: The environment.
+    timeout_sec: A timeout to use for this operation.
+
+  Returns:
+    The UI hierarchy, or None if the device did not write it to the output,
+    e.g. because its uiautomator cannot dump to /dev/tty.
+  """
+  try:
+    response = issue_generic_request(
+        'shell uiautomator dump /dev/tty', env, timeout_sec=timeout_sec
+    )
+  except errors.AdbControllerError as e:
+    logging.info('uiautomator dump to /dev/tty failed: %s', e)
+    return None
+  if not response.status:
+    return None
+  return _extract_uiautomator_xml(
+      response.generic.output.decode('utf-8', errors='replace')
+  )
@@ -18,7 +18,9 @@ from unittest import mock
 
 from absl.testing import absltest
 from android_env import env_interface
+from android_env.components import errors
 from android_env.proto import adb_pb2
+from android_world.env import adb_shell
 from android_world.env import adb_utils
 
 
@@ -242,6 +244,82 @@ class AdbTypingTest(AdbTestSetup):
       self.assertLen(expected_calls, mock_execute_adb_call.call_count)
 
 
+class AdbBatchedTypingTest(AdbTestSetup):
+
+  def setUp(self):
+    issue_generic_request = adb_utils.issue_generic_request
+    super().setUp()
+    # Typed chunks and words both end up in `execute_adb_call`.
+    self.mock_issue_generic_request.side_effect = issue_generic_request
+    self.mock_execute_adb_call = self.mock_env.execute_adb_call
+    self.mock_execute_adb_call.return_value = adb_pb2.AdbResponse(
+        status=adb_pb2.AdbResponse.Status.OK
+    )
+
+  def _typed(self) -> list[str]:
+    typed = []
+    for call in self.mock_execute_adb_call.call_args_list:
+      request = call.args[0]
+      if request.HasField('input_text'):
+        typed.append(request.input_text.text)
+      elif request.HasField('generic'):
+        self.assertEqual(request.generic.args[:3], ['shell', 'input', 'text'])
+        typed.append(' '.join(request.generic.args[3:]))
+      else:
+        typed.append('<enter>')
+    return typed
+
+  def test_types_each_line_in_one_call(self):
+    adb_utils.type_text("Type some\nit's text", self.mock_env, batched=True)
+
+    self.assertEqual(
+        self._typed(), ['Type%ssome', '<enter>', "it\\'s%stext"]
+    )
+
+  def test_splits_long_lines(self):
+    adb_utils.type_text(
+        'aaa bbb ccccccccc', self.mock_env, batched=True, max_chunk_chars=7
+    )
+
+    self.assertEqual(self._typed(), ['aaa%s', 'bbb%scc', 'ccccccc'])
+
+  def test_falls_back_to_word_mode_on_failure(self):
+    ok = adb_pb2.AdbResponse(status=adb_pb2.AdbResponse.Status.OK)
+    failed = adb_pb2.AdbResponse(status=adb_pb2.AdbResponse.Status.TIMEOUT)
+    self.mock_execute_adb_call.side_effect = [ok, failed] + [ok] * 10
+
+    adb_utils.type_text(
+        'one two three\nfour', self.mock_env, batched=True, max_chunk_chars=7
+    )
+
+    self.assertEqual(
+        self._typed(),
+        [
+            'one%s',
+            'two%s',  # Failed, so retyped word-by-word below.
+            'two',
+            '%s',
+            'three',
+            '<enter>',
+            'four',
+        ],
+    )
+
+  def test_falls_back_to_word_mode_on_reported_error(self):
+    ok = adb_pb2.AdbResponse(status=adb_pb2.AdbResponse.Status.OK)
+    reported_error = adb_pb2.AdbResponse(
+        status=adb_pb2.AdbResponse.Status.OK,
+        generic=adb_pb2.AdbResponse.GenericResponse(
+            output=b'Exception occurred while executing: input\n'
+        ),
+    )
+    self.mock_execute_adb_call.side_effect = [reported_error] + [ok] * 10
+
+    adb_utils.type_text('one two', self.mock_env, batched=True)
+
+    self.assertEqual(self._typed(), ['one%stwo', 'one', '%s', 'two'])
+
+
 class TestExtractBroadcastData(absltest.TestCase):
 
   def test_successful_data_extraction(self):
@@ -261,6 +339,144 @@ class TestExtractBroadcastData(absltest.TestCase):
       adb_utils.extract_broadcast_data(raw_output)
 
 
+class ShellSessionRoutingTest(absltest.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.env = mock.create_autospec(env_interface.AndroidEnvInterface)
+    self.session = adb_shell.ShellSession(['/bin/sh'])
+    adb_shell.attach_session(self.env, self.session)
+    self.addCleanup(adb_shell.detach_session, self.env)
+
+  def test_shell_request_uses_session(self):
+    response = adb_utils.issue_generic_request(
+        ['shell', 'echo', 'hi'], self.env
+    )
+
+    self.assertEqual(response.status, adb_pb2.AdbResponse.Status.OK)
+    self.assertEqual(response.generic.output, b'hi\n')
+    self.env.execute_adb_call.assert_not_called()
+
+  def test_string_request_uses_session(self):
+    response = adb_utils.issue_generic_request('shell echo a | cat', self.env)
+
+    self.assertEqual(response.generic.output, b'a\n')
+    self.env.execute_adb_call.assert_not_called()
+
+  def test_non_shell_request_bypasses_session(self):
+    adb_utils.issue_generic_request(['root'], self.env)
+
+    self.env.execute_adb_call.assert_called_once()
+
+  def test_failed_command_raises_like_adb(self):
+    with self.assertRaises(errors.AdbControllerError):
+      adb_utils.issue_generic_request('shell exit 1', self.env)
+    self.assertIs(adb_shell.get_session(self.env), self.session)
+
+  def test_falls_back_when_command_not_sent(self):
+    fallback_response = adb_pb2.AdbResponse(
+        status=adb_pb2.AdbResponse.Status.OK
+    )
+    self.env.execute_adb_call.return_value = fallback_response
+    self.session.close()
+
+    response = adb_utils.issue_generic_request('shell echo hi', self.env)
+
+    self.assertIs(response, fallback_response)
+    self.env.execute_adb_call.assert_called_once()
+    self.assertIsNone(adb_shell.get_session(self.env))
+
+  def test_timeout_after_sending_is_not_retried(self):
+    with self.assertRaises(errors.AdbControllerError):
+      adb_utils.issue_generic_request(
+          'shell sleep 5', self.env, timeout_sec=0.1
+      )
+
+    self.env.execute_adb_call.assert_not_called()
+    self.assertIsNone(adb_shell.get_session(self.env))
+
+
+class ScreenGeometryTest(AdbTestSetup):
+
+  def test_get_screen_geometry_uses_one_call(self):
+    response = adb_pb2.AdbResponse(status=adb_pb2.AdbResponse.Status.OK)
+    response.generic.output = (
+        b'  logicalFrame=[0, 0, 0, 0]\n'
+        b'  physicalFrame=[0, 0, 0, 0]\n'
+        b'  logicalFrame=[0, 0, 2400, 1080]\n'
+        b'  physicalFrame=[0, 0, 2400, 1080]\n'
+        b'  mCurrentRotation=ROTATION_90\n'
+    )
+    self.mock_issue_generic_request.return_value = response
+
+    geometry = adb_utils.get_screen_geometry(self.mock_env)
+
+    self.assertEqual(
+        geometry,
+        adb_utils.ScreenGeometry(
+            logical_screen_size=(2400, 1080),
+            orientation=1,
+            physical_frame_boundary=(0, 0, 1080, 2400),
+        ),
+    )
+    self.mock_issue_generic_request.assert_called_once()
+
+  def test_get_screen_geometry_missing_values_raises(self):
+    response = adb_pb2.AdbResponse(status=adb_pb2.AdbResponse.Status.OK)
+    response.generic.output = b'  mCurrentRotation=ROTATION_0\n'
+    self.mock_issue_generic_request.return_value = response
+
+    with self.assertRaises(ValueError):
+      adb_utils.get_screen_geometry(self.mock_env)
+
+
+class UiautomatorDumpTest(AdbTestSetup):
+
+  def _respond(self, output: bytes) -> None:
+    response = adb_pb2.AdbResponse(status=adb_pb2.AdbResponse.Status.OK)
+    response.generic.output = output
+    self.mock_issue_generic_request.return_value = response
+
+  def test_dump_to_stdout_strips_status_line(self):
+    self._respond(
+        b"<?xml version='1.0' encoding='UTF-8' standalone='yes' ?>"
+        b'<hierarchy rotation="0"><node text="a" /></hierarchy>'
+        b'UI hierchary dumped to: /dev/tty\n'
+    )
+
+    xml_dump = adb_utils.uiautomator_dump_to_stdout(self.mock_env)
+
+    self.assertEqual(
+        xml_dump,
+        "<?xml version='1.0' encoding='UTF-8' standalone='yes' ?>"
+        '<hierarchy rotation="0"><node text="a" /></hierarchy>',
+    )
+    self.mock_issue_generic_request.assert_called_once_with(
+        'shell uiautomator dump /dev/tty', self.mock_env, timeout_sec=30
+    )
+
+  def test_dump_to_stdout_skips_leading_warnings(self):
+    self._respond(
+        b'WARNING: linker: unused DT entry\n'
+        b'<hierarchy rotation="0"><node /></hierarchy>\n'
+        b'UI hierchary dumped to: /dev/tty\n'
+    )
+
+    self.assertEqual(
+        adb_utils.uiautomator_dump_to_stdout(self.mock_env),
+        '<hierarchy rotation="0"><node /></hierarchy>',
+    )
+
+  def test_dump_to_stdout_unsupported(self):
+    self._respond(b'ERROR: could not get idle state.\n')
+    self.assertIsNone(adb_utils.uiautomator_dump_to_stdout(self.mock_env))
+
+    self.mock_issue_generic_request.side_effect = errors.AdbControllerError(
+        'exit code 1'
+    )
+    self.assertIsNone(adb_utils.uiautomator_dump_to_stdout(self.mock_env))
+
+
 class TestScreenUtils(absltest.TestCase):
 
   def test_parse_screen_size_response_success(self):
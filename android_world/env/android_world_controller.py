@@ -14,12 +14,15 @@
 
 """Controller for Android that adds UI tree information to the observation."""
 
+from collections.abc import Callable
 import contextlib
 import enum
 import os
+import re
 import time
 from typing import Any
 from typing import cast
+from typing import Literal
 from typing import Optional
 from absl import logging
 from android_env import env_interface
@@ -28,8 +31,10 @@ from android_env.components import config_classes
 from android_env.proto.a11y import android_accessibility_forest_pb2
 from android_env.wrappers import a11y_grpc_wrapper
 from android_env.wrappers import base_wrapper
+from android_world.env import adb_shell
 from android_world.env import adb_utils
 from android_world.env import representation_utils
+from android_world.env import text_index
 from android_world.utils import file_utils
 import dm_env
 
@@ -55,10 +60,50 @@ def _has_wrapper(
     return False
 
 
+def _enable_networking_if_airplane_mode(
+    env: a11y_grpc_wrapper.A11yGrpcWrapper,
+) -> None:
+  """Turns networking back on if airplane mode is on, as gRPC needs it."""
+  if adb_utils.retry(3)(adb_utils.check_airplane_mode)(env):
+    logging.warning(
+        'Airplane mode is on -- cannot retrieve a11y tree via gRPC. Turning'
+        ' it off...'
+    )
+    logging.info('Enabling networking...')
+    env.attempt_enable_networking()
+    time.sleep(1.0)
+
+
+class AirplaneModeWatcher:
+  """Remembers that networking is on so airplane mode isn't probed every fetch.
+
+  Airplane mode is only probed again after `invalidate`, which is called when
+  an a11y tree fetch fails or airplane mode is toggled with
+  `adb_utils.toggle_airplane_mode`.
+  """
+
+  def __init__(self):
+    self._networking_enabled = False
+    self.num_probes = 0
+
+  def invalidate(self) -> None:
+    """Forces the next `ensure_networking` call to probe airplane mode."""
+    self._networking_enabled = False
+
+  def ensure_networking(self, env: a11y_grpc_wrapper.A11yGrpcWrapper) -> None:
+    """Turns airplane mode off, unless networking is already known to be on."""
+    if self._networking_enabled:
+      return
+    self.num_probes += 1
+    _enable_networking_if_airplane_mode(env)
+    self._networking_enabled = True
+
+
 def get_a11y_tree(
     env: env_interface.AndroidEnvInterface,
     max_retries: int = 5,
     sleep_duration: float = 1.0,
+    airplane_mode_watcher: Optional[AirplaneModeWatcher] = None,
 ) -> android_accessibility_forest_pb2.AndroidAccessibilityForest:
   """Gets a11y tree.
 
@@ -66,6 +111,8 @@ def get_a11y_tree(
     env: AndroidEnv.
     max_retries: Maximum number of retries to get a11y tree.
     sleep_duration: Time to sleep between each retry in seconds.
+    airplane_mode_watcher: Tracks whether airplane mode needs to be checked. If
+      None, airplane mode is checked on every call.
 
   Returns:
     A11y tree.
@@ -78,24 +125,25 @@ def get_a11y_tree(
         'Must use a11y_grpc_wrapper.A11yGrpcWrapper to get the a11y tree.'
     )
   env = cast(a11y_grpc_wrapper.A11yGrpcWrapper, env)
-  if adb_utils.retry(3)(adb_utils.check_airplane_mode)(env):
-    logging.warning(
-        'Airplane mode is on -- cannot retrieve a11y tree via gRPC. Turning'
-        ' it off...'
-    )
-    logging.info('Enabling networking...')
-    env.attempt_enable_networking()
-    time.sleep(1.0)
+  if airplane_mode_watcher is None:
+    _enable_networking_if_airplane_mode(env)
+  else:
+    airplane_mode_watcher.ensure_networking(env)
 
   forest: Optional[
       android_accessibility_forest_pb2.AndroidAccessibilityForest
   ] = None
-  for _ in range(max_retries):
+  for attempt in range(max_retries):
     try:
       forest = env.accumulate_new_extras()['accessibility_tree'][-1]  # pytype:disable=attribute-error
       return forest
     except KeyError:
       logging.warning('Could not get a11y tree, retrying.')
+      if airplane_mode_watcher is not None and attempt == 0:
+        # Airplane mode may have been turned on since the last probe, e.g.
+        # through the Settings UI.
+        airplane_mode_watcher.invalidate()
+        airplane_mode_watcher.ensure_networking(env)
     time.sleep(sleep_duration)
 
   if forest is None:
@@ -122,6 +170,8 @@ OBSERVATION_KEY_FOREST = 'forest'
 # UI elements are specific nodes extracted from forest. See
 # representation_utils.forest_to_ui_elements for details.
 OBSERVATION_KEY_UI_ELEMENTS = 'ui_elements'
+# Seconds spent in each stage of `AndroidWorldController._process_timestep`.
+OBSERVATION_KEY_STAGE_LATENCIES = 'stage_latencies'
 
 
 class A11yMethod(enum.Enum):
@@ -137,6 +187,46 @@ class A11yMethod(enum.Enum):
   NONE = 'none'
 
 
+# Interval between checks of the UI while waiting for a condition on it.
+_WAIT_POLL_INTERVAL_SEC = 0.05
+
+# Consecutive failures of uiautomator to dump to stdout after which it is
+# assumed to be unsupported on the device and no longer tried.
+_MAX_UIAUTOMATOR_STDOUT_FAILURES = 3
+
+# The screen rotation uiautomator reports with its dump.
+_HIERARCHY_ROTATION = re.compile(r'<hierarchy\b[^>]*\brotation="(\d)"')
+
+
+def _forest_screen_layout(
+    forest: android_accessibility_forest_pb2.AndroidAccessibilityForest,
+) -> Optional[tuple[int, int]]:
+  """Returns the width and height spanned by the windows of a forest.
+
+  The width and height swap when the screen rotates between portrait and
+  landscape. Unlike the rotation reported by uiautomator, they do not change
+  when the screen turns upside down.
+
+  Args:
+    forest: The a11y forest.
+
+  Returns:
+    The extent of the windows, or None if the forest has no windows.
+  """
+  if not forest.windows:
+    return None
+  return (
+      max(window.bounds_in_screen.right for window in forest.windows),
+      max(window.bounds_in_screen.bottom for window in forest.windows),
+  )
+
+
+def _xml_dump_screen_layout(xml_dump: str) -> Optional[int]:
+  """Returns the rotation reported with a uiautomator dump, if any."""
+  match = _HIERARCHY_ROTATION.search(xml_dump)
+  return int(match.group(1)) if match else None
+
+
 def apply_a11y_forwarder_app_wrapper(
     env: env_interface.AndroidEnvInterface, install_a11y_forwarding_app: bool
 ) -> env_interface.AndroidEnvInterface:
@@ -174,12 +264,65 @@ class AndroidWorldController(base_wrapper.BaseWrapper):
     else:
       self._env = env
     self._a11y_method = a11y_method
+    self._shell_session_enabled = False
+    self._airplane_mode_watcher = AirplaneModeWatcher()
+    self._screen_geometry: Optional[adb_utils.ScreenGeometry] = None
+    self._geometry_cache_hits = 0
+    self._geometry_cache_misses = 0
+    # The screen layout seen with the last UI read; see `_note_screen_layout`.
+    self._screen_layout: Any = None
+    # Whether to try dumping to stdout, and how often in a row it failed.
+    self._uiautomator_dumps_to_stdout = True
+    self._uiautomator_stdout_failures = 0
 
   @property
   def device_screen_size(self) -> tuple[int, int]:
     """Returns the physical screen size of the device: (width, height)."""
     return adb_utils.get_screen_size(self._env)
 
+  @property
+  def screen_geometry(self) -> adb_utils.ScreenGeometry:
+    """Returns the logical size, orientation and physical frame of the screen.
+
+    The geometry is fetched with a single adb call and cached until the screen
+    size or orientation is changed through this controller, a read of the UI
+    shows that the screen rotated, or `invalidate_screen_geometry` is called.
+    """
+    if self._screen_geometry is None:
+      self._geometry_cache_misses += 1
+      self._screen_geometry = adb_utils.get_screen_geometry(self._env)
+    else:
+      self._geometry_cache_hits += 1
+    return self._screen_geometry
+
+  def invalidate_screen_geometry(self) -> None:
+    """Forces the next geometry read to query the device."""
+    self._screen_geometry = None
+
+  def _note_screen_layout(self, layout: Any) -> None:
+    """Invalidates the geometry if a read of the UI shows the screen rotated.
+
+    The screen can rotate without going through this controller, e.g. when an
+    app that locks its orientation is opened or closed.
+
+    Args:
+      layout: What the UI read shows about the screen's rotation, or None if
+        it shows nothing, in which case the geometry is always invalidated.
+    """
+    if layout is None or layout != self._screen_layout:
+      self.invalidate_screen_geometry()
+    self._screen_layout = layout
+
+  @property
+  def geometry_cache_hits(self) -> int:
+    """Number of geometry reads served from the cache."""
+    return self._geometry_cache_hits
+
+  @property
+  def geometry_cache_misses(self) -> int:
+    """Number of geometry reads that queried the device."""
+    return self._geometry_cache_misses
+
   @property
   def logical_screen_size(self) -> tuple[int, int]:
     """Returns the logical screen size of the device.
@@ -187,13 +330,63 @@ class AndroidWorldController(base_wrapper.BaseWrapper):
     This will be different with the physical size if orientation or resolution
     is changed.
     """
-    return adb_utils.get_logical_screen_size(self._env)
+    return self.screen_geometry.logical_screen_size
+
+  @property
+  def orientation(self) -> int:
+    """Returns the screen orientation; see `adb_utils.get_orientation`."""
+    return self.screen_geometry.orientation
+
+  @property
+  def physical_frame_boundary(self) -> tuple[int, int, int, int]:
+    """Returns the physical frame boundary in portrait orientation."""
+    return self.screen_geometry.physical_frame_boundary
+
+  def set_screen_size(self, width: int, height: int) -> None:
+    """Sets the logical screen size; see `adb_utils.set_screen_size`."""
+    try:
+      adb_utils.set_screen_size(width, height, self._env)
+    finally:
+      self.invalidate_screen_geometry()
+
+  def change_orientation(self, orientation: str) -> None:
+    """Changes the orientation; see `adb_utils.change_orientation`."""
+    try:
+      adb_utils.change_orientation(orientation, self._env)
+    finally:
+      self.invalidate_screen_geometry()
 
   @property
   def env(self) -> env_interface.AndroidEnvInterface:
     return self._env
 
+  def start_shell_session(self) -> None:
+    """Routes adb shell requests through a persistent `adb shell` session.
+
+    See `adb_shell.ShellSession`. Requests fall back to one-off adb calls if
+    the session fails.
+    """
+    # pylint: disable=protected-access
+    # pytype: disable=attribute-error
+    adb_controller = self.env._coordinator._simulator.create_adb_controller()
+    # pylint: enable=protected-access
+    # pytype: enable=attribute-error
+    session = adb_shell.ShellSession(adb_controller.command_prefix() + ['shell'])
+    adb_shell.attach_session(self, session)
+    self._shell_session_enabled = True
+
+  @property
+  def airplane_mode_watcher(self) -> AirplaneModeWatcher:
+    return self._airplane_mode_watcher
+
+  def toggle_airplane_mode(self, on_or_off: Literal['on', 'off']) -> None:
+    """Toggles airplane mode; see `adb_utils.toggle_airplane_mode`."""
+    adb_utils.toggle_airplane_mode(on_or_off, self)
+
   def refresh_env(self):
+    adb_shell.detach_session(self)
+    self.invalidate_screen_geometry()
+    self._airplane_mode_watcher.invalidate()
     # pylint: disable=protected-access
     # pytype: disable=attribute-error
     # Reconnect to emulator and reload a11y wrapper in case we lose connection.
@@ -204,11 +397,19 @@ class AndroidWorldController(base_wrapper.BaseWrapper):
     ).env
     # pylint: enable=protected-access
     # pytype: enable=attribute-error
+    if self._shell_session_enabled:
+      self.start_shell_session()
+
+  def close(self) -> None:
+    adb_shell.detach_session(self)
+    super().close()
 
   def _get_a11y_forest(
       self,
   ) -> android_accessibility_forest_pb2.AndroidAccessibilityForest:
-    return get_a11y_tree(self._env)
+    return get_a11y_tree(
+        self._env, airplane_mode_watcher=self._airplane_mode_watcher
+    )
 
   def get_a11y_forest(
       self,
@@ -232,25 +433,153 @@ class AndroidWorldController(base_wrapper.BaseWrapper):
           exclude_invisible_elements=True,
       )
     elif self._a11y_method == A11yMethod.UIAUTOMATOR:
-      return representation_utils.xml_dump_to_ui_elements(
-          adb_utils.uiautomator_dump(self._env)
+      return representation_utils.stream_xml_dump_to_ui_elements(
+          self._uiautomator_dump()
       )
     else:
       return []
 
+  def get_ui_fingerprint(self) -> int:
+    """Returns a hash of the current UI, without building UI elements.
+
+    The fingerprint changes whenever `get_ui_elements` would return different
+    elements; see `representation_utils.forest_fingerprint`.
+    """
+    if self._a11y_method == A11yMethod.A11Y_FORWARDER_APP:
+      return representation_utils.forest_fingerprint(
+          self.get_a11y_forest(),
+          exclude_invisible_elements=True,
+      )
+    elif self._a11y_method == A11yMethod.UIAUTOMATOR:
+      return hash(self._uiautomator_dump())
+    else:
+      return 0
+
+  def _latest_pushed_forest(
+      self,
+  ) -> Optional[android_accessibility_forest_pb2.AndroidAccessibilityForest]:
+    """Returns the last forest pushed by the a11y forwarder, if any.
+
+    Unlike `get_a11y_forest`, this never retries, sleeps or calls adb.
+    """
+    try:
+      return self._env.accumulate_new_extras()['accessibility_tree'][-1]  # pytype: disable=attribute-error
+    except (KeyError, IndexError):
+      return None
+
+  def wait_until(
+      self,
+      predicate: Callable[[list[representation_utils.UIElement]], bool],
+      timeout_sec: float = 10.0,
+  ) -> bool:
+    """Waits until the UI elements on screen satisfy a predicate.
+
+    With the a11y forwarder app, the predicate is checked once per forest the
+    forwarder pushes, so waiting makes no adb calls and costs nothing while the
+    screen does not change. With uiautomator, the UI is dumped for every check.
+
+    Args:
+      predicate: Called with the current UI elements.
+      timeout_sec: How long to wait, in seconds.
+
+    Returns:
+      Whether the predicate held before the timeout.
+    """
+    deadline = time.monotonic() + timeout_sec
+    forest = None
+    while True:
+      if self._a11y_method == A11yMethod.A11Y_FORWARDER_APP:
+        latest = (
+            self.get_a11y_forest()
+            if forest is None
+            else self._latest_pushed_forest()
+        )
+        if latest is not None and latest is not forest:
+          forest = latest
+          if predicate(
+              representation_utils.forest_to_ui_elements(
+                  forest, exclude_invisible_elements=True
+              )
+          ):
+            return True
+      elif predicate(self.get_ui_elements()):
+        return True
+      remaining = deadline - time.monotonic()
+      if remaining <= 0:
+        return False
+      time.sleep(min(_WAIT_POLL_INTERVAL_SEC, remaining))
+
+  def wait_for_text(
+      self,
+      text: str,
+      timeout_sec: float = 10.0,
+      case_sensitive: bool = False,
+  ) -> bool:
+    """Waits until an element with the given text is on screen.
+
+    Args:
+      text: The exact `text` or `content_description` to wait for.
+      timeout_sec: How long to wait, in seconds.
+      case_sensitive: Whether to match case.
+
+    Returns:
+      Whether the text appeared before the timeout.
+    """
+    return self.wait_until(
+        lambda elements: text_index.UIElementTextIndex(
+            elements, case_sensitive
+        ).find(text, max_distance=0)[0]
+        != -1,
+        timeout_sec,
+    )
+
+  def _uiautomator_dump(self) -> str:
+    """Returns the UI hierarchy from uiautomator, in one adb call if possible.
+
+    Dumping to stdout is tried first, falling back to a file on /sdcard. A
+    single failure may be transient, so dumping to stdout is only given up after
+    it failed several times in a row.
+    """
+    xml_dump = None
+    if self._uiautomator_dumps_to_stdout:
+      xml_dump = adb_utils.uiautomator_dump_to_stdout(self._env)
+      if xml_dump is not None:
+        self._uiautomator_stdout_failures = 0
+      else:
+        self._uiautomator_stdout_failures += 1
+      if self._uiautomator_stdout_failures >= _MAX_UIAUTOMATOR_STDOUT_FAILURES:
+        logging.warning(
+            'uiautomator cannot dump to stdout on this device; dumping to'
+            ' /sdcard instead.'
+        )
+        self._uiautomator_dumps_to_stdout = False
+    if xml_dump is None:
+      xml_dump = adb_utils.uiautomator_dump(self._env)
+    self._note_screen_layout(_xml_dump_screen_layout(xml_dump))
+    return xml_dump
+
   def _process_timestep(self, timestep: dm_env.TimeStep) -> dm_env.TimeStep:
     """Adds a11y tree info to the observation."""
+    start = time.perf_counter()
     if self._a11y_method == A11yMethod.A11Y_FORWARDER_APP:
       forest = self.get_a11y_forest()
+      self._note_screen_layout(_forest_screen_layout(forest))
+      forest_done = time.perf_counter()
       ui_elements = representation_utils.forest_to_ui_elements(
           forest,
           exclude_invisible_elements=True,
       )
     else:
       forest = None
+      forest_done = start
       ui_elements = self.get_ui_elements()
+    end = time.perf_counter()
     timestep.observation[OBSERVATION_KEY_FOREST] = forest
     timestep.observation[OBSERVATION_KEY_UI_ELEMENTS] = ui_elements
+    timestep.observation[OBSERVATION_KEY_STAGE_LATENCIES] = {
+        'a11y_forest': forest_done - start,
+        'ui_elements': end - forest_done,
+    }
     return timestep
 
   def pull_file(
@@ -308,8 +637,20 @@ def get_controller(
     console_port: int = 5554,
     adb_path: str = DEFAULT_ADB_PATH,
     grpc_port: int = 8554,
+    shell_session: bool = False,
 ) -> AndroidWorldController:
-  """Creates a controller by connecting to an existing Android environment."""
+  """Creates a controller by connecting to an existing Android environment.
+
+  Args:
+    console_port: The console port of the existing device.
+    adb_path: The location of the adb binary.
+    grpc_port: The port for gRPC communication with the emulator.
+    shell_session: Whether to route adb shell requests through a persistent
+      `adb shell` session; see `AndroidWorldController.start_shell_session`.
+
+  Returns:
+    The controller.
+  """
 
   config = config_classes.AndroidEnvConfig(
       task=config_classes.FilesystemTaskConfig(
@@ -326,4 +667,7 @@ def get_controller(
   )
   android_env_instance = loader.load(config)
   logging.info('Setting up AndroidWorldController.')
-  return AndroidWorldController(android_env_instance)
+  controller = AndroidWorldController(android_env_instance)
+  if shell_session:
+    controller.start_shell_session()
+  return controller
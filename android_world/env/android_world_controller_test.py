@@ -14,11 +14,14 @@
 
 import os
 import tempfile
+import time
 from unittest import mock
 
 from absl.testing import absltest
 from android_env import env_interface
+from android_env.proto.a11y import android_accessibility_forest_pb2
 from android_env.wrappers import a11y_grpc_wrapper
+from android_world.env import adb_shell
 from android_world.env import adb_utils
 from android_world.env import android_world_controller
 from android_world.env import representation_utils
@@ -102,6 +105,99 @@ class AndroidWorldControllerTest(absltest.TestCase):
 
     self.assertEqual(env.device_screen_size, (100, 200))
 
+  @mock.patch.object(adb_utils, 'get_screen_geometry')
+  def test_screen_geometry_is_cached(self, mock_get_screen_geometry):
+    geometry = adb_utils.ScreenGeometry((100, 200), 0, (0, 0, 100, 200))
+    mock_get_screen_geometry.return_value = geometry
+    mock_base_env = mock.Mock(spec=env_interface.AndroidEnvInterface)
+    env = android_world_controller.AndroidWorldController(mock_base_env)
+
+    self.assertEqual(env.logical_screen_size, (100, 200))
+    self.assertEqual(env.orientation, 0)
+    self.assertEqual(env.physical_frame_boundary, (0, 0, 100, 200))
+
+    mock_get_screen_geometry.assert_called_once_with(env.env)
+    self.assertEqual(env.geometry_cache_misses, 1)
+    self.assertEqual(env.geometry_cache_hits, 2)
+
+  @mock.patch.object(adb_utils, 'change_orientation')
+  @mock.patch.object(adb_utils, 'set_screen_size')
+  @mock.patch.object(adb_utils, 'get_screen_geometry')
+  def test_screen_changes_invalidate_geometry(
+      self,
+      mock_get_screen_geometry,
+      mock_set_screen_size,
+      mock_change_orientation,
+  ):
+    mock_base_env = mock.Mock(spec=env_interface.AndroidEnvInterface)
+    env = android_world_controller.AndroidWorldController(mock_base_env)
+
+    _ = env.orientation
+    env.set_screen_size(1080, 2400)
+    _ = env.orientation
+    env.change_orientation('landscape')
+    _ = env.orientation
+    env.invalidate_screen_geometry()
+    _ = env.orientation
+
+    mock_set_screen_size.assert_called_once_with(1080, 2400, env.env)
+    mock_change_orientation.assert_called_once_with('landscape', env.env)
+    self.assertEqual(mock_get_screen_geometry.call_count, 4)
+    self.assertEqual(env.geometry_cache_hits, 0)
+
+  @mock.patch.object(adb_utils, 'get_screen_geometry')
+  @mock.patch.object(android_world_controller, 'get_a11y_tree')
+  def test_geometry_is_invalidated_when_windows_rotate(
+      self, mock_get_a11y_tree, mock_get_screen_geometry
+  ):
+    mock_base_env = mock.Mock(spec=env_interface.AndroidEnvInterface)
+    env = android_world_controller.AndroidWorldController(mock_base_env)
+
+    def forest(width, height):
+      forest = android_accessibility_forest_pb2.AndroidAccessibilityForest()
+      window = forest.windows.add()
+      window.bounds_in_screen.right = width
+      window.bounds_in_screen.bottom = height
+      return forest
+
+    timestep = dm_env.TimeStep(
+        observation={}, reward=None, discount=None, step_type=None
+    )
+    for forest_size in [(100, 200), (100, 200), (200, 100), (200, 100)]:
+      mock_get_a11y_tree.return_value = forest(*forest_size)
+      env._process_timestep(timestep)
+      _ = env.orientation
+
+    # Fetched for the first state and again once the screen rotated.
+    self.assertEqual(mock_get_screen_geometry.call_count, 2)
+    self.assertEqual(env.geometry_cache_hits, 2)
+
+  @mock.patch.object(adb_utils, 'get_screen_geometry')
+  @mock.patch.object(adb_utils, 'uiautomator_dump_to_stdout')
+  def test_geometry_is_invalidated_when_uiautomator_reports_rotation(
+      self, mock_dump_to_stdout, mock_get_screen_geometry
+  ):
+    mock_base_env = mock.Mock(spec=env_interface.AndroidEnvInterface)
+    env = android_world_controller.AndroidWorldController(
+        mock_base_env,
+        a11y_method=android_world_controller.A11yMethod.UIAUTOMATOR,
+    )
+
+    for xml_dump in [
+        '<hierarchy rotation="0" />',
+        '<hierarchy rotation="0" />',
+        '<hierarchy rotation="2" />',
+        # Without a rotation, the geometry is always fetched again.
+        '<hierarchy />',
+        '<hierarchy />',
+    ]:
+      mock_dump_to_stdout.return_value = xml_dump
+      env.get_ui_elements()
+      _ = env.orientation
+
+    self.assertEqual(mock_get_screen_geometry.call_count, 4)
+    self.assertEqual(env.geometry_cache_hits, 1)
+
   @mock.patch.object(adb_utils, 'get_logical_screen_size')
   @mock.patch.object(android_world_controller, 'get_a11y_tree')
   @mock.patch.object(representation_utils, 'forest_to_ui_elements')
@@ -110,7 +206,7 @@ class AndroidWorldControllerTest(absltest.TestCase):
   ):
     mock_base_env = mock.Mock(spec=env_interface.AndroidEnvInterface)
     env = android_world_controller.AndroidWorldController(mock_base_env)
-    mock_forest = mock.Mock()
+    mock_forest = android_accessibility_forest_pb2.AndroidAccessibilityForest()
     mock_ui_elements = mock.Mock()
     mock_get_logical_screen_size.return_value = (100, 200)
     mock_get_a11y_tree.return_value = mock_forest
@@ -125,11 +221,170 @@ class AndroidWorldControllerTest(absltest.TestCase):
     self.assertEqual(
         processed_timestep.observation['ui_elements'], mock_ui_elements
     )
+    self.assertCountEqual(
+        processed_timestep.observation['stage_latencies'],
+        ['a11y_forest', 'ui_elements'],
+    )
     mock_forest_to_ui.assert_called_with(
         mock_forest,
         exclude_invisible_elements=True,
     )
 
+  @mock.patch.object(adb_utils, 'uiautomator_dump_to_stdout')
+  def test_get_ui_elements_with_uiautomator(self, mock_dump_to_stdout):
+    mock_base_env = mock.Mock(spec=env_interface.AndroidEnvInterface)
+    env = android_world_controller.AndroidWorldController(
+        mock_base_env,
+        a11y_method=android_world_controller.A11yMethod.UIAUTOMATOR,
+    )
+    mock_dump_to_stdout.return_value = (
+        '<hierarchy><node text="OK" bounds="[1,2][3,4]" clickable="true" />'
+        '</hierarchy>'
+    )
+
+    ui_elements = env.get_ui_elements()
+
+    bbox = representation_utils.BoundingBox(1, 3, 2, 4)
+    self.assertEqual(
+        ui_elements,
+        [
+            representation_utils.UIElement(
+                text='OK',
+                bbox=bbox,
+                bbox_pixels=bbox,
+                is_checked=False,
+                is_checkable=False,
+                is_clickable=True,
+                is_enabled=False,
+                is_focused=False,
+                is_focusable=False,
+                is_long_clickable=False,
+                is_scrollable=False,
+                is_selected=False,
+                is_visible=True,
+            )
+        ],
+    )
+
+  @mock.patch.object(adb_utils, 'uiautomator_dump')
+  @mock.patch.object(adb_utils, 'uiautomator_dump_to_stdout')
+  def test_uiautomator_dump_falls_back_to_file(
+      self, mock_dump_to_stdout, mock_dump
+  ):
+    mock_base_env = mock.Mock(spec=env_interface.AndroidEnvInterface)
+    env = android_world_controller.AndroidWorldController(
+        mock_base_env,
+        a11y_method=android_world_controller.A11yMethod.UIAUTOMATOR,
+    )
+    mock_dump_to_stdout.return_value = None
+    mock_dump.return_value = '<hierarchy />'
+
+    for _ in range(5):
+      env.get_ui_elements()
+
+    # Given up after failing several times in a row.
+    self.assertEqual(
+        mock_dump_to_stdout.call_count,
+        android_world_controller._MAX_UIAUTOMATOR_STDOUT_FAILURES,
+    )
+    self.assertEqual(mock_dump.call_count, 5)
+
+  @mock.patch.object(adb_utils, 'uiautomator_dump')
+  @mock.patch.object(adb_utils, 'uiautomator_dump_to_stdout')
+  def test_uiautomator_dump_to_stdout_survives_a_transient_failure(
+      self, mock_dump_to_stdout, mock_dump
+  ):
+    mock_base_env = mock.Mock(spec=env_interface.AndroidEnvInterface)
+    env = android_world_controller.AndroidWorldController(
+        mock_base_env,
+        a11y_method=android_world_controller.A11yMethod.UIAUTOMATOR,
+    )
+    # The first dump fails before the stdout path ever worked.
+    mock_dump_to_stdout.side_effect = [None, '<hierarchy />', '<hierarchy />']
+    mock_dump.return_value = '<hierarchy />'
+
+    for _ in range(3):
+      env.get_ui_elements()
+
+    self.assertEqual(mock_dump_to_stdout.call_count, 3)
+    mock_dump.assert_called_once()
+
+  @mock.patch.object(adb_utils, 'uiautomator_dump')
+  @mock.patch.object(adb_utils, 'uiautomator_dump_to_stdout')
+  def test_uiautomator_dump_to_stdout_keeps_retrying_once_supported(
+      self, mock_dump_to_stdout, mock_dump
+  ):
+    mock_base_env = mock.Mock(spec=env_interface.AndroidEnvInterface)
+    env = android_world_controller.AndroidWorldController(
+        mock_base_env,
+        a11y_method=android_world_controller.A11yMethod.UIAUTOMATOR,
+    )
+    mock_dump_to_stdout.side_effect = ['<hierarchy />', None, '<hierarchy />']
+    mock_dump.return_value = '<hierarchy />'
+
+    for _ in range(3):
+      env.get_ui_elements()
+
+    self.assertEqual(mock_dump_to_stdout.call_count, 3)
+    mock_dump.assert_called_once()
+
+  @mock.patch.object(representation_utils, 'forest_fingerprint')
+  @mock.patch.object(android_world_controller, 'get_a11y_tree')
+  def test_get_ui_fingerprint(self, mock_get_a11y_tree, mock_fingerprint):
+    mock_base_env = mock.Mock(spec=env_interface.AndroidEnvInterface)
+    env = android_world_controller.AndroidWorldController(mock_base_env)
+    mock_fingerprint.return_value = 123
+
+    self.assertEqual(env.get_ui_fingerprint(), 123)
+    mock_fingerprint.assert_called_once_with(
+        mock_get_a11y_tree.return_value, exclude_invisible_elements=True
+    )
+
+  @mock.patch.object(time, 'sleep')
+  @mock.patch.object(representation_utils, 'forest_to_ui_elements')
+  @mock.patch.object(android_world_controller, 'get_a11y_tree')
+  def test_wait_until_checks_each_pushed_forest_once(
+      self, mock_get_a11y_tree, mock_forest_to_ui, mock_sleep
+  ):
+    mock_base_env = mock.Mock(spec=env_interface.AndroidEnvInterface)
+    env = android_world_controller.AndroidWorldController(mock_base_env)
+    mock_get_a11y_tree.return_value = 'first'
+    env._env.accumulate_new_extras.side_effect = [
+        {'accessibility_tree': ['first']},
+        {},
+        {'accessibility_tree': ['first', 'second']},
+        {'accessibility_tree': ['first', 'second', 'third']},
+    ]
+    mock_forest_to_ui.side_effect = lambda forest, **_: [forest]
+
+    self.assertTrue(env.wait_until(lambda elements: elements == ['third']))
+
+    self.assertEqual(
+        [c.args[0] for c in mock_forest_to_ui.call_args_list],
+        ['first', 'second', 'third'],
+    )
+    mock_get_a11y_tree.assert_called_once()
+    self.assertEqual(mock_sleep.call_count, 4)
+
+  @mock.patch.object(time, 'sleep')
+  @mock.patch.object(adb_utils, 'uiautomator_dump_to_stdout')
+  def test_wait_for_text_times_out(self, mock_dump_to_stdout, mock_sleep):
+    mock_base_env = mock.Mock(spec=env_interface.AndroidEnvInterface)
+    env = android_world_controller.AndroidWorldController(
+        mock_base_env,
+        a11y_method=android_world_controller.A11yMethod.UIAUTOMATOR,
+    )
+    mock_dump_to_stdout.return_value = (
+        '<hierarchy><node text="Cancel" bounds="[1,2][3,4]" /></hierarchy>'
+    )
+
+    with mock.patch.object(time, 'monotonic', side_effect=[0, 1, 11]):
+      self.assertFalse(env.wait_for_text('OK'))
+    mock_sleep.assert_called_once()
+
+    with mock.patch.object(time, 'monotonic', side_effect=[0, 1]):
+      self.assertTrue(env.wait_for_text('cancel'))
+
   @mock.patch.object(adb_utils, 'check_airplane_mode')
   @mock.patch.object(android_world_controller, 'get_controller')
   @mock.patch.object(android_world_controller, '_has_wrapper')
@@ -161,6 +416,62 @@ class AndroidWorldControllerTest(absltest.TestCase):
     self.assertEqual(forest, 'success')
     mock_refresh_env.assert_called_once()
 
+  @mock.patch.object(adb_shell, 'ShellSession', autospec=True)
+  def test_shell_session_is_started_and_closed(self, mock_shell_session):
+    mock_base_env = mock.Mock(spec=env_interface.AndroidEnvInterface)
+    env = android_world_controller.AndroidWorldController(mock_base_env)
+    env._env._env = mock_base_env
+    env._env._coordinator = mock.Mock()
+    adb_controller = (
+        env._env._coordinator._simulator.create_adb_controller.return_value
+    )
+    adb_controller.command_prefix.return_value = ['adb', '-s', 'emulator-5554']
+
+    env.start_shell_session()
+
+    mock_shell_session.assert_called_once_with(
+        ['adb', '-s', 'emulator-5554', 'shell']
+    )
+    session = mock_shell_session.return_value
+    self.assertIs(adb_shell.get_session(env), session)
+    env.close()
+    session.close.assert_called_once()
+    self.assertIsNone(adb_shell.get_session(env))
+
+  @mock.patch.object(time, 'sleep')
+  @mock.patch.object(adb_utils, 'check_airplane_mode', return_value=False)
+  @mock.patch.object(
+      android_world_controller, '_has_wrapper', return_value=True
+  )
+  def test_airplane_mode_is_probed_only_when_needed(
+      self, unused_mock_has_wrapper, mock_check_airplane_mode, unused_sleep
+  ):
+    mock_base_env = mock.Mock(spec=env_interface.AndroidEnvInterface)
+    env = android_world_controller.AndroidWorldController(mock_base_env)
+    env._env.accumulate_new_extras.side_effect = [
+        {'accessibility_tree': ['first']},
+        {'accessibility_tree': ['second']},
+        {},  # A failed fetch re-probes.
+        {'accessibility_tree': ['third']},
+        {'accessibility_tree': ['fourth']},
+        {'accessibility_tree': ['fifth']},
+    ]
+
+    self.assertEqual(env.get_a11y_forest(), 'first')
+    self.assertEqual(env.get_a11y_forest(), 'second')
+    self.assertEqual(mock_check_airplane_mode.call_count, 1)
+    self.assertEqual(env.get_a11y_forest(), 'third')
+    self.assertEqual(mock_check_airplane_mode.call_count, 2)
+    with mock.patch.object(adb_utils, 'issue_generic_request'):
+      env.toggle_airplane_mode('off')
+      self.assertEqual(env.get_a11y_forest(), 'fourth')
+      self.assertEqual(mock_check_airplane_mode.call_count, 3)
+      # Toggling it without going through the controller, as task code does.
+      adb_utils.toggle_airplane_mode('on', env)
+      self.assertEqual(env.get_a11y_forest(), 'fifth')
+    self.assertEqual(mock_check_airplane_mode.call_count, 4)
+    self.assertEqual(env.airplane_mode_watcher.num_probes, 4)
+
   def test_pull_file(self):
     file_contents = 'test file contents'
     remote_file_path = create_file_with_contents(file_contents)
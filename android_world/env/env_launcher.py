@@ -14,7 +14,10 @@
 
 """Launches the environment used in the benchmark."""
 
+from concurrent import futures
+import dataclasses
 import platform
+from typing import Sequence
 
 from absl import logging
 from android_world.env import android_world_controller
@@ -28,12 +31,40 @@ from android_world.utils import datetime_utils
 _ANDROID_WORLD_API_LEVEL = 33
 
 
+@dataclasses.dataclass(frozen=True)
+class EnvEndpoint:
+  """Ports used to connect to a running emulator.
+
+  Attributes:
+    console_port: The console port of the device, e.g. 5554. The adb port is
+      console_port + 1.
+    grpc_port: The emulator gRPC port, as passed with `-grpc`.
+  """
+
+  console_port: int = 5554
+  grpc_port: int = 8554
+
+  @classmethod
+  def from_string(cls, endpoint: str) -> 'EnvEndpoint':
+    """Parses an endpoint of the form "console_port:grpc_port"."""
+    try:
+      console_port, grpc_port = endpoint.split(':')
+      return cls(int(console_port), int(grpc_port))
+    except ValueError as e:
+      raise ValueError(
+          f'Invalid endpoint {endpoint!r}; expected "console_port:grpc_port".'
+      ) from e
+
+
 def _get_env(
-    console_port: int, adb_path: str, grpc_port: int
+    console_port: int,
+    adb_path: str,
+    grpc_port: int,
+    shell_session: bool = False,
 ) -> interface.AsyncEnv:
   """Creates an AsyncEnv by connecting to an existing Android environment."""
   controller = android_world_controller.get_controller(
-      console_port, adb_path, grpc_port
+      console_port, adb_path, grpc_port, shell_session=shell_session
   )
   return interface.AsyncAndroidEnv(controller)
 
@@ -99,6 +130,7 @@ def load_and_setup_env(
     freeze_datetime: bool = True,
     adb_path: str = android_world_controller.DEFAULT_ADB_PATH,
     grpc_port: int = 8554,
+    shell_session: bool = False,
 ) -> interface.AsyncEnv:
   """Create environment with `get_env()` and perform env setup and validation.
 
@@ -118,10 +150,51 @@ def load_and_setup_env(
       2023, to ensure consistent benchmarking.
     adb_path: The location of the adb binary.
     grpc_port: The port for gRPC communication with the emulator.
+    shell_session: Whether to route adb shell requests through a persistent
+      `adb shell` session instead of starting a new adb process per request.
 
   Returns:
     An interactable Android environment.
   """
-  env = _get_env(console_port, adb_path, grpc_port)
+  env = _get_env(console_port, adb_path, grpc_port, shell_session)
   setup_env(env, emulator_setup, freeze_datetime)
   return env
+
+
+def load_and_setup_envs(
+    endpoints: Sequence[EnvEndpoint],
+    emulator_setup: bool = False,
+    freeze_datetime: bool = True,
+    adb_path: str = android_world_controller.DEFAULT_ADB_PATH,
+    shell_session: bool = False,
+) -> list[interface.AsyncEnv]:
+  """Loads and sets up one environment per endpoint, concurrently.
+
+  Each endpoint must correspond to an emulator that has already been launched,
+  e.g. with `-port 5556 -grpc 8556`.
+
+  Args:
+    endpoints: The emulators to connect to.
+    emulator_setup: Perform first-time app setup on each environment if True.
+    freeze_datetime: Whether to freeze the datetime on each environment.
+    adb_path: The location of the adb binary.
+    shell_session: Whether to use a persistent `adb shell` session per
+      environment.
+
+  Returns:
+    Interactable Android environments, in the same order as `endpoints`.
+  """
+  with futures.ThreadPoolExecutor(max_workers=len(endpoints) or 1) as executor:
+    return list(
+        executor.map(
+            lambda endpoint: load_and_setup_env(
+                console_port=endpoint.console_port,
+                emulator_setup=emulator_setup,
+                freeze_datetime=freeze_datetime,
+                adb_path=adb_path,
+                grpc_port=endpoint.grpc_port,
+                shell_session=shell_session,
+            ),
+            endpoints,
+        )
+    )
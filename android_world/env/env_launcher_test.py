@@ -60,5 +60,31 @@ class EnvLauncherTest(absltest.TestCase):
     mock_async_android_env.assert_called_with(mock_controller.return_value)
 
 
+  @mock.patch.object(env_launcher, "load_and_setup_env", autospec=True)
+  def test_load_and_setup_envs(self, mock_load_and_setup_env):
+    mock_load_and_setup_env.side_effect = lambda **kwargs: kwargs[
+        "console_port"
+    ]
+    endpoints = [
+        env_launcher.EnvEndpoint.from_string("5554:8554"),
+        env_launcher.EnvEndpoint.from_string("5556:8556"),
+    ]
+
+    envs = env_launcher.load_and_setup_envs(endpoints, adb_path="adb")
+
+    self.assertEqual(envs, [5554, 5556])
+    mock_load_and_setup_env.assert_any_call(
+        console_port=5556,
+        emulator_setup=False,
+        freeze_datetime=True,
+        adb_path="adb",
+        grpc_port=8556,
+        shell_session=False,
+    )
+
+  def test_endpoint_from_invalid_string_raises(self):
+    with self.assertRaises(ValueError):
+      env_launcher.EnvEndpoint.from_string("5554")
+
 if __name__ == "__main__":
   absltest.main()
@@ -0,0 +1,140 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks `forest_to_ui_elements` against per-node conversion.
+
+Runs on recorded forests, i.e. files holding a serialized
+`AndroidAccessibilityForest` such as
+`env.controller.get_a11y_forest().SerializeToString()`, or, without any, on
+synthetic forests shaped like long file and note lists.
+
+  python -m android_world.env.forest_to_ui_elements_benchmark \
+      --forest_paths=/tmp/markor.pb,/tmp/joplin.pb
+"""
+
+from collections.abc import Sequence
+import time
+from typing import Any, Callable
+
+from absl import app
+from absl import flags
+from android_env.proto.a11y import android_accessibility_forest_pb2
+from android_world.env import representation_utils
+
+_FOREST_PATHS = flags.DEFINE_list(
+    'forest_paths', [], 'Files with serialized accessibility forests.'
+)
+_NUM_ITERATIONS = flags.DEFINE_integer(
+    'num_iterations', 200, 'Conversions per forest and method.'
+)
+
+_SCREEN_SIZE = (1080, 2400)
+
+
+def _make_list_forest(
+    num_rows: int,
+) -> android_accessibility_forest_pb2.AndroidAccessibilityForest:
+  """Returns a forest with a scrollable list of rows of two text views."""
+  forest = android_accessibility_forest_pb2.AndroidAccessibilityForest()
+  tree = forest.windows.add().tree
+  tree.nodes.add(unique_id=0, is_scrollable=True, is_visible_to_user=True)
+  for row in range(num_rows):
+    row_id = 1 + 3 * row
+    tree.nodes[0].child_ids.append(row_id)
+    tree.nodes.add(
+        unique_id=row_id,
+        child_ids=[row_id + 1, row_id + 2],
+        class_name='android.widget.LinearLayout',
+        is_clickable=True,
+        is_visible_to_user=row < 20,
+    )
+    tree.nodes.add(
+        unique_id=row_id + 1,
+        text=f'note_{row}.md',
+        class_name='android.widget.TextView',
+        package_name='net.gsantner.markor',
+        view_id_resource_name='net.gsantner.markor:id/title',
+        is_visible_to_user=row < 20,
+    )
+    tree.nodes.add(
+        unique_id=row_id + 2,
+        text=f'{row} KB',
+        class_name='android.widget.TextView',
+        package_name='net.gsantner.markor',
+        is_visible_to_user=row < 20,
+    )
+  for node in tree.nodes:
+    node.bounds_in_screen.left = 0
+    node.bounds_in_screen.right = 1080
+    node.bounds_in_screen.top = 120 * node.unique_id
+    node.bounds_in_screen.bottom = 120 * node.unique_id + 110
+  return forest
+
+
+def _per_node(
+    forest: android_accessibility_forest_pb2.AndroidAccessibilityForest,
+) -> list[representation_utils.UIElement]:
+  """Converts one node at a time, as `forest_to_ui_elements` used to."""
+  return [
+      representation_utils.accessibility_node_to_ui_element(node, _SCREEN_SIZE)
+      for window in forest.windows
+      for node in window.tree.nodes
+      if not node.child_ids or node.content_description or node.is_scrollable
+  ]
+
+
+def _batched(
+    forest: android_accessibility_forest_pb2.AndroidAccessibilityForest,
+) -> list[representation_utils.UIElement]:
+  return representation_utils.forest_to_ui_elements(
+      forest, screen_size=_SCREEN_SIZE
+  )
+
+
+def _time_ms(
+    convert: Callable[[Any], list[representation_utils.UIElement]],
+    forest: android_accessibility_forest_pb2.AndroidAccessibilityForest,
+) -> float:
+  start = time.perf_counter()
+  for _ in range(_NUM_ITERATIONS.value):
+    convert(forest)
+  return (time.perf_counter() - start) / _NUM_ITERATIONS.value * 1e3
+
+
+def main(argv: Sequence[str]) -> None:
+  if len(argv) > 1:
+    raise app.UsageError('Too many command-line arguments.')
+  forests = {}
+  for path in _FOREST_PATHS.value:
+    forest = android_accessibility_forest_pb2.AndroidAccessibilityForest()
+    with open(path, 'rb') as f:
+      forest.ParseFromString(f.read())
+    forests[path] = forest
+  if not forests:
+    for num_rows in (10, 100, 500):
+      forests[f'synthetic list, {num_rows} rows'] = _make_list_forest(num_rows)
+
+  for name, forest in forests.items():
+    elements = _batched(forest)
+    assert elements == _per_node(forest)
+    per_node_ms = _time_ms(_per_node, forest)
+    batched_ms = _time_ms(_batched, forest)
+    print(
+        f'{name}: {len(elements)} elements, per-node {per_node_ms:.3f} ms,'
+        f' batched {batched_ms:.3f} ms ({per_node_ms / batched_ms:.2f}x)'
+    )
+
+
+if __name__ == '__main__':
+  app.run(main)
@@ -16,6 +16,7 @@
 
 import abc
 import dataclasses
+import functools
 import time
 from typing import Any, Optional, Self
 
@@ -26,10 +27,23 @@ from android_world.env import adb_utils
 from android_world.env import android_world_controller
 from android_world.env import json_action
 from android_world.env import representation_utils
+from android_world.env import spatial_index
+from android_world.env import ui_diff
 import dm_env
 import numpy as np
 
 
+# Key in `State.auxiliaries` holding the seconds spent in each stage of fetching
+# the state: `device_step`, `a11y_forest`, `ui_elements` and `total`.
+STAGE_LATENCIES_KEY = 'stage_latencies'
+# Keys in `State.auxiliaries` set when waiting for the UI to stabilize: the
+# seconds until the UI was found stable (or the wait timed out), whether it was
+# stable, and the number of UI fingerprints taken.
+TIME_TO_STABLE_KEY = 'time_to_stable'
+IS_STABLE_KEY = 'is_stable'
+STABILITY_POLLS_KEY = 'stability_polls'
+
+
 def _get_no_op_action() -> dict[str, Any]:
   """Creates a no-op action; used to retrieve screen & UI tree."""
   return {
@@ -69,6 +83,28 @@ class State:
     )
     return cls(pixels, forest, elements)
 
+  @functools.cached_property
+  def spatial_index(self) -> spatial_index.UIElementIndex:
+    """Spatial index over `ui_elements`, for hit-testing and region queries."""
+    return spatial_index.UIElementIndex(self.ui_elements)
+
+  def __getstate__(self) -> dict[str, Any]:
+    state = self.__dict__.copy()
+    state.pop('spatial_index', None)  # Rebuilt on demand after unpickling.
+    return state
+
+  def diff(self, other: Self) -> ui_diff.UIElementDiff:
+    """Returns how the UI elements changed from this state to `other`.
+
+    Args:
+      other: A later state.
+
+    Returns:
+      The added, removed, moved and changed UI elements; see
+      `ui_diff.diff_ui_elements`.
+    """
+    return ui_diff.diff_ui_elements(self.ui_elements, other.ui_elements)
+
 
 class AsyncEnv(abc.ABC):
   """Interface for interacting with a real-time Android device.
@@ -215,6 +251,13 @@ class AsyncAndroidEnv(AsyncEnv):
 
   interaction_cache = ''
 
+  # Whether `input_text` actions type text in chunks rather than word-by-word.
+  batch_text_input = False
+
+  # Whether waiting for the UI to stabilize compares cheap UI fingerprints
+  # instead of full UI element lists.
+  use_ui_fingerprint = True
+
   def __init__(
       self, controller: android_world_controller.AndroidWorldController
   ):
@@ -234,11 +277,29 @@ class AsyncAndroidEnv(AsyncEnv):
     if go_home:
       adb_utils.press_home_button(self.controller)
     self.interaction_cache = ''
+    self.controller.invalidate_screen_geometry()
 
     return _process_timestep(self.controller.reset())
 
   def _get_state(self):
-    return _process_timestep(self.controller.step(_get_no_op_action()))
+    start = time.perf_counter()
+    timestep = self.controller.step(_get_no_op_action())
+    stepped = time.perf_counter()
+    state = _process_timestep(timestep)
+    stage_latencies = dict(
+        timestep.observation.get(
+            android_world_controller.OBSERVATION_KEY_STAGE_LATENCIES, {}
+        )
+    )
+    # Whatever the controller did not account for was spent in AndroidEnv,
+    # mostly grabbing the screenshot.
+    stage_latencies['device_step'] = (
+        stepped - start - sum(stage_latencies.values())
+    )
+    stage_latencies['total'] = time.perf_counter() - start
+    logging.debug('get_state stage latencies (s): %s', stage_latencies)
+    state.auxiliaries[STAGE_LATENCIES_KEY] = stage_latencies
+    return state
 
   def _get_stable_state(
       self,
@@ -289,8 +350,67 @@ class AsyncAndroidEnv(AsyncEnv):
 
     return current_state  # pylint: disable=undefined-variable
 
+  def _get_stable_state_by_fingerprint(
+      self,
+      stability_threshold: int = 3,
+      min_sleep_duration: float = 0.1,
+      max_sleep_duration: float = 0.5,
+      timeout: float = 6.0,
+  ) -> State:
+    """Waits until the UI fingerprint stops changing and returns the state.
+
+    Unlike `_get_stable_state`, polls only fetch the UI fingerprint; the full
+    state is fetched once at the end. The interval between polls starts at
+    `min_sleep_duration` and doubles up to `max_sleep_duration`, starting over
+    whenever the UI changes.
+
+    Args:
+      stability_threshold: Number of consecutive equal fingerprints needed to
+        consider the UI stable.
+      min_sleep_duration: First interval between polls, in seconds.
+      max_sleep_duration: Longest interval between polls, in seconds.
+      timeout: Maximum time in seconds to wait for the UI to become stable.
+
+    Returns:
+      The current state. Its auxiliaries record the time until the UI was found
+      stable, whether it was, and the number of polls.
+    """
+    if stability_threshold <= 0:
+      raise ValueError('Stability threshold must be a positive integer.')
+
+    start_time = time.time()
+    deadline = start_time + timeout
+    prior_fingerprint = self.controller.get_ui_fingerprint()
+    polls = 1
+    stable_checks = 1
+    sleep_time = min_sleep_duration
+
+    while stable_checks < stability_threshold:
+      remaining = deadline - time.time()
+      if remaining <= 0:
+        break
+      time.sleep(min(sleep_time, remaining))
+      fingerprint = self.controller.get_ui_fingerprint()
+      polls += 1
+      if fingerprint == prior_fingerprint:
+        stable_checks += 1
+        sleep_time = min(sleep_time * 2, max_sleep_duration)
+      else:
+        stable_checks = 1
+        prior_fingerprint = fingerprint
+        sleep_time = min_sleep_duration
+
+    time_to_stable = time.time() - start_time
+    state = self._get_state()
+    state.auxiliaries[TIME_TO_STABLE_KEY] = time_to_stable
+    state.auxiliaries[IS_STABLE_KEY] = stable_checks >= stability_threshold
+    state.auxiliaries[STABILITY_POLLS_KEY] = polls
+    return state
+
   def get_state(self, wait_to_stabilize: bool = False) -> State:
     if wait_to_stabilize:
+      if self.use_ui_fingerprint:
+        return self._get_stable_state_by_fingerprint()
       return self._get_stable_state()
     return self._get_state()
 
@@ -304,12 +424,21 @@ class AsyncAndroidEnv(AsyncEnv):
       # Do nothing if it is a termination action.
       return
     state = self.get_state(wait_to_stabilize=False)
-    actuation.execute_adb_action(
-        action,
-        state.ui_elements,
-        self.logical_screen_size,
-        self.controller,
-    )
+    try:
+      actuation.execute_adb_action(
+          action,
+          state.ui_elements,
+          self.logical_screen_size,
+          self.controller,
+          batch_text_input=self.batch_text_input,
+          ui_index=state.spatial_index,
+      )
+    finally:
+      # Opening an app that locks its orientation can rotate the screen, and
+      # the geometry may be read before the UI is. Other rotations are caught
+      # by the controller when it next reads the UI.
+      if action.action_type == json_action.OPEN_APP:
+        self.controller.invalidate_screen_geometry()
 
   def hide_automation_ui(self) -> None:
     """Hides the coordinates on screen."""
@@ -344,7 +473,7 @@ class AsyncAndroidEnv(AsyncEnv):
 
   @property
   def logical_screen_size(self) -> tuple[int, int]:
-    return adb_utils.get_logical_screen_size(self.controller)
+    return self.controller.logical_screen_size
 
   def close(self) -> None:
     try:
@@ -354,8 +483,8 @@ class AsyncAndroidEnv(AsyncEnv):
 
   @property
   def orientation(self) -> int:
-    return adb_utils.get_orientation(self.controller)
+    return self.controller.orientation
 
   @property
   def physical_frame_boundary(self) -> tuple[int, int, int, int]:
-    return adb_utils.get_physical_frame_boundary(self.controller)
+    return self.controller.physical_frame_boundary
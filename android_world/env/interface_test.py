@@ -12,11 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import pickle
 from unittest import mock
 
 from absl.testing import absltest
+from android_world.env import actuation
+from android_world.env import android_world_controller
 from android_world.env import interface
+from android_world.env import json_action
 from android_world.env import representation_utils
+import dm_env
 import numpy as np
 
 
@@ -87,5 +92,134 @@ class InterfaceTest(absltest.TestCase):
     )
 
 
+  @mock.patch.object(actuation, "execute_adb_action")
+  def test_geometry_is_invalidated_after_opening_an_app(self, unused_execute):
+    controller = mock.MagicMock()
+    env = interface.AsyncAndroidEnv(controller)
+    env._get_state = mock.MagicMock()
+
+    env.execute_action(json_action.JSONAction(action_type="click", index=0))
+    env.execute_action(json_action.JSONAction(action_type="navigate_home"))
+    env.get_state()
+    controller.invalidate_screen_geometry.assert_not_called()
+
+    env.execute_action(
+        json_action.JSONAction(action_type="open_app", app_name="Clock")
+    )
+    controller.invalidate_screen_geometry.assert_called_once()
+
+
+  def test_get_state_reports_stage_latencies(self):
+    controller = mock.MagicMock()
+    controller.step.return_value = dm_env.TimeStep(
+        step_type=None,
+        reward=None,
+        discount=None,
+        observation={
+            "pixels": np.empty([1, 2, 3]),
+            android_world_controller.OBSERVATION_KEY_FOREST: None,
+            android_world_controller.OBSERVATION_KEY_UI_ELEMENTS: [],
+            android_world_controller.OBSERVATION_KEY_STAGE_LATENCIES: {
+                "a11y_forest": 0.0,
+                "ui_elements": 0.0,
+            },
+        },
+    )
+    env = interface.AsyncAndroidEnv(controller)
+
+    latencies = env.get_state().auxiliaries[interface.STAGE_LATENCIES_KEY]
+
+    self.assertCountEqual(
+        latencies, ["device_step", "a11y_forest", "ui_elements", "total"]
+    )
+    self.assertGreaterEqual(latencies["total"], latencies["device_step"])
+
+  @mock.patch("time.sleep", return_value=None)
+  def test_fingerprint_stability_backs_off(self, mock_sleep):
+    controller = mock.MagicMock()
+    controller.get_ui_fingerprint.side_effect = [1, 2, 2, 2]
+    env = interface.AsyncAndroidEnv(controller)
+    state = interface.State(
+        ui_elements=[],
+        pixels=np.empty([1, 2, 3]),
+        forest=None,
+        auxiliaries={},
+    )
+    env._get_state = mock.MagicMock(return_value=state)
+
+    result = env.get_state(wait_to_stabilize=True)
+
+    self.assertIs(result, state)
+    env._get_state.assert_called_once()
+    self.assertEqual(
+        [c.args[0] for c in mock_sleep.call_args_list], [0.1, 0.1, 0.2]
+    )
+    self.assertTrue(result.auxiliaries[interface.IS_STABLE_KEY])
+    self.assertEqual(result.auxiliaries[interface.STABILITY_POLLS_KEY], 4)
+    self.assertIn(interface.TIME_TO_STABLE_KEY, result.auxiliaries)
+
+  def test_fingerprint_stability_times_out(self):
+    controller = mock.MagicMock()
+    controller.get_ui_fingerprint.side_effect = range(1000)
+    env = interface.AsyncAndroidEnv(controller)
+    env._get_state = mock.MagicMock(
+        return_value=interface.State(
+            ui_elements=[],
+            pixels=np.empty([1, 2, 3]),
+            forest=None,
+            auxiliaries={},
+        )
+    )
+
+    result = env._get_stable_state_by_fingerprint(
+        min_sleep_duration=0.01, timeout=0.1
+    )
+
+    self.assertFalse(result.auxiliaries[interface.IS_STABLE_KEY])
+    self.assertGreaterEqual(
+        result.auxiliaries[interface.TIME_TO_STABLE_KEY], 0.1
+    )
+
+
+class StateTest(absltest.TestCase):
+
+  def test_diff(self):
+    button = representation_utils.UIElement(
+        text="Send",
+        bbox_pixels=representation_utils.BoundingBox(0, 10, 0, 10),
+    )
+    toast = representation_utils.UIElement(text="Sent")
+    before = interface.State(
+        pixels=np.empty([1, 2, 3]), forest=None, ui_elements=[button]
+    )
+    after = interface.State(
+        pixels=np.empty([1, 2, 3]), forest=None, ui_elements=[button, toast]
+    )
+
+    self.assertTrue(before.diff(before).is_empty)
+    diff = before.diff(after)
+    self.assertEqual(diff.added, [toast])
+    self.assertEmpty(diff.removed)
+
+
+  def test_spatial_index_is_cached_and_not_pickled(self):
+    state = interface.State(
+        pixels=np.empty([1, 2, 3]),
+        forest=None,
+        ui_elements=[
+            representation_utils.UIElement(
+                bbox_pixels=representation_utils.BoundingBox(0, 10, 0, 10)
+            )
+        ],
+    )
+
+    self.assertEqual(state.spatial_index.element_at(5, 5), 0)
+    self.assertIs(state.spatial_index, state.spatial_index)
+    restored = pickle.loads(pickle.dumps(state))
+    self.assertNotIn("spatial_index", restored.__dict__)
+    self.assertEqual(restored.ui_elements, state.ui_elements)
+    self.assertEqual(restored.spatial_index.element_at(5, 5), 0)
+
+
 if __name__ == "__main__":
   absltest.main()
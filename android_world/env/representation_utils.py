@@ -15,13 +15,40 @@
 """Tools for processing and representing accessibility trees."""
 
 import dataclasses
-from typing import Any, Optional
+import operator
+import re
+from typing import Any, Iterator, Optional, Sequence
 import xml.etree.ElementTree as ET
 from android_env.proto.a11y import android_accessibility_forest_pb2
+import numpy as np
 
 
-@dataclasses.dataclass
-class BoundingBox:
+class _SlotsPickleMixin:
+  """Pickles slotted dataclasses the same way as non-slotted ones.
+
+  The pickled state is a dict of field values, so pickles written before the
+  classes used `__slots__` still load, and fields missing from them get their
+  defaults.
+  """
+
+  __slots__ = ()
+
+  def __getstate__(self) -> dict[str, Any]:
+    return {
+        field.name: getattr(self, field.name)
+        for field in dataclasses.fields(self)
+    }
+
+  def __setstate__(self, state: dict[str, Any]) -> None:
+    for field in dataclasses.fields(self):
+      if field.name in state:
+        setattr(self, field.name, state[field.name])
+      elif field.default is not dataclasses.MISSING:
+        setattr(self, field.name, field.default)
+
+
+@dataclasses.dataclass(slots=True)
+class BoundingBox(_SlotsPickleMixin):
   """Class for representing a bounding box."""
 
   x_min: float | int
@@ -49,8 +76,8 @@ class BoundingBox:
     return self.width * self.height
 
 
-@dataclasses.dataclass
-class UIElement:
+@dataclasses.dataclass(slots=True)
+class UIElement(_SlotsPickleMixin):
   """Represents a UI element."""
 
   text: Optional[str] = None
@@ -77,6 +104,139 @@ class UIElement:
   metadata: Optional[dict[str, Any]] = None
 
 
+_TABLE_STRING_FIELDS = (
+    'text',
+    'content_description',
+    'class_name',
+    'hint_text',
+    'package_name',
+    'resource_name',
+    'tooltip',
+    'resource_id',
+)
+_TABLE_FLAG_FIELDS = (
+    'is_checked',
+    'is_checkable',
+    'is_clickable',
+    'is_editable',
+    'is_enabled',
+    'is_focused',
+    'is_focusable',
+    'is_long_clickable',
+    'is_scrollable',
+    'is_selected',
+    'is_visible',
+)
+_TABLE_BBOX_FIELDS = ('bbox', 'bbox_pixels')
+_BBOX_COORDS = ('x_min', 'x_max', 'y_min', 'y_max')
+
+
+@dataclasses.dataclass(frozen=True, eq=False)
+class UIElementTable:
+  """Column-oriented storage for a list of UI elements.
+
+  Much smaller in memory and when pickled than the equivalent list of
+  `UIElement`s. Convert with `from_elements` and `to_elements`; the round trip
+  is lossless.
+
+  Attributes:
+    strings: Distinct string values in the table.
+    string_codes: int32 array of shape (n, 8) indexing `strings` for each
+      string field, or -1 for None.
+    flags: int8 array of shape (n, 11) with 1 for True, 0 for False and -1 for
+      None for each boolean field.
+    bboxes: float64 array of shape (n, 2, 4) with the `bbox` and `bbox_pixels`
+      coordinates.
+    bbox_is_int: Bool array of shape (n, 2, 4); True where a coordinate was an
+      int.
+    bbox_present: Bool array of shape (n, 2); False where a bounding box was
+      None.
+    metadata: The `metadata` of each element.
+  """
+
+  strings: tuple[str, ...]
+  string_codes: np.ndarray
+  flags: np.ndarray
+  bboxes: np.ndarray
+  bbox_is_int: np.ndarray
+  bbox_present: np.ndarray
+  metadata: tuple[Optional[dict[str, Any]], ...]
+
+  def __len__(self) -> int:
+    return len(self.metadata)
+
+  @classmethod
+  def from_elements(cls, elements: Sequence[UIElement]) -> 'UIElementTable':
+    """Builds a table from UI elements."""
+    n = len(elements)
+    string_index = {}
+    string_codes = np.full((n, len(_TABLE_STRING_FIELDS)), -1, dtype=np.int32)
+    flags = np.full((n, len(_TABLE_FLAG_FIELDS)), -1, dtype=np.int8)
+    bboxes = np.zeros((n, len(_TABLE_BBOX_FIELDS), 4), dtype=np.float64)
+    bbox_is_int = np.zeros((n, len(_TABLE_BBOX_FIELDS), 4), dtype=bool)
+    bbox_present = np.zeros((n, len(_TABLE_BBOX_FIELDS)), dtype=bool)
+    for i, element in enumerate(elements):
+      for j, name in enumerate(_TABLE_STRING_FIELDS):
+        value = getattr(element, name)
+        if value is not None:
+          string_codes[i, j] = string_index.setdefault(value, len(string_index))
+      for j, name in enumerate(_TABLE_FLAG_FIELDS):
+        value = getattr(element, name)
+        if value is not None:
+          flags[i, j] = bool(value)
+      for j, name in enumerate(_TABLE_BBOX_FIELDS):
+        bbox = getattr(element, name)
+        if bbox is None:
+          continue
+        bbox_present[i, j] = True
+        for k, coord in enumerate(_BBOX_COORDS):
+          value = getattr(bbox, coord)
+          bboxes[i, j, k] = value
+          bbox_is_int[i, j, k] = isinstance(value, (int, np.integer))
+    return cls(
+        strings=tuple(string_index),
+        string_codes=string_codes,
+        flags=flags,
+        bboxes=bboxes,
+        bbox_is_int=bbox_is_int,
+        bbox_present=bbox_present,
+        metadata=tuple(element.metadata for element in elements),
+    )
+
+  def to_elements(self) -> list[UIElement]:
+    """Converts the table back to UI elements."""
+    strings = self.strings + (None,)  # Code -1 maps to None.
+    string_columns = [
+        [strings[code] for code in column] for column in self.string_codes.T
+    ]
+    flag_values = (False, True, None)  # Indexed by the flag; -1 maps to None.
+    flag_columns = [
+        [flag_values[flag] for flag in column] for column in self.flags.T
+    ]
+    coords = self.bboxes.tolist()
+    is_int = self.bbox_is_int.tolist()
+    present = self.bbox_present.tolist()
+
+    elements = []
+    for i, metadata in enumerate(self.metadata):
+      kwargs = {
+          name: column[i]
+          for name, column in zip(_TABLE_STRING_FIELDS, string_columns)
+      }
+      kwargs.update(
+          (name, column[i])
+          for name, column in zip(_TABLE_FLAG_FIELDS, flag_columns)
+      )
+      for j, name in enumerate(_TABLE_BBOX_FIELDS):
+        if present[i][j]:
+          kwargs[name] = BoundingBox(*[
+              int(value) if value_is_int else value
+              for value, value_is_int in zip(coords[i][j], is_int[i][j])
+          ])
+      elements.append(UIElement(metadata=metadata, **kwargs))
+    return elements
+
+
 def accessibility_node_to_ui_element(
     node: Any,
     screen_size: Optional[tuple[int, int]] = None,
@@ -152,15 +312,146 @@ def forest_to_ui_elements(
   Returns:
     The extracted UI elements.
   """
+  nodes = [
+      node
+      for window in forest.windows
+      for node in window.tree.nodes
+      if (not node.child_ids or node.content_description or node.is_scrollable)
+      and (node.is_visible_to_user or not exclude_invisible_elements)
+  ]
+  return nodes_to_ui_elements(nodes, screen_size)
+
+
+# Node fields read by `nodes_to_ui_elements`, grouped as they are laid out in
+# `UIElement`'s positional arguments.
+_get_leading_text_fields = operator.attrgetter(
+    'text', 'content_description', 'class_name'
+)
+_get_flag_fields = operator.attrgetter(
+    'is_checked',
+    'is_checkable',
+    'is_clickable',
+    'is_editable',
+    'is_enabled',
+    'is_focused',
+    'is_focusable',
+    'is_long_clickable',
+    'is_scrollable',
+    'is_selected',
+    'is_visible_to_user',
+)
+_get_trailing_text_fields = operator.attrgetter(
+    'package_name', 'view_id_resource_name'
+)
+
+
+def nodes_to_ui_elements(
+    nodes: Sequence[Any],
+    screen_size: Optional[tuple[int, int]] = None,
+) -> list[UIElement]:
+  """Converts accessibility nodes to UI elements in one batch.
+
+  Gives the same result as calling `accessibility_node_to_ui_element` on each
+  node, but normalizes all bounding boxes in a single vectorized operation and
+  reads node fields in bulk.
+
+  Args:
+    nodes: The accessibility nodes.
+    screen_size: The size of the device screen in pixels (width, height).
+
+  Returns:
+    The UI elements, in the order of `nodes`.
+  """
+  if not nodes:
+    return []
+  pixel_boxes = [
+      (bounds.left, bounds.right, bounds.top, bounds.bottom)
+      for bounds in (node.bounds_in_screen for node in nodes)
+  ]
+  if screen_size is not None:
+    width, height = screen_size
+    normalized_boxes = [
+        BoundingBox(*box)
+        for box in (
+            np.array(pixel_boxes, dtype=np.float64)
+            / np.array((width, width, height, height), dtype=np.float64)
+        ).tolist()
+    ]
+  else:
+    normalized_boxes = [None] * len(nodes)
+
   elements = []
+  for node, pixel_box, normalized_box in zip(
+      nodes, pixel_boxes, normalized_boxes
+  ):
+    text, content_description, class_name = _get_leading_text_fields(node)
+    package_name, resource_name = _get_trailing_text_fields(node)
+    # Positional arguments are much faster than keywords for this many fields.
+    elements.append(
+        UIElement(
+            text or None,
+            content_description or None,
+            class_name or None,
+            normalized_box,
+            BoundingBox(*pixel_box),
+            node.hint_text or None,
+            *_get_flag_fields(node),
+            package_name or None,
+            resource_name or None,
+        )
+    )
+  return elements
+
+
+def forest_fingerprint(
+    forest: android_accessibility_forest_pb2.AndroidAccessibilityForest | Any,
+    exclude_invisible_elements: bool = False,
+) -> int:
+  """Hashes the parts of a forest that `forest_to_ui_elements` reads.
+
+  Equal forests, in the sense of producing equal UI elements, have equal
+  fingerprints. This is much cheaper than building and comparing the UI
+  elements, so it is suited to polling for changes.
+
+  Args:
+    forest: The accessibility forest.
+    exclude_invisible_elements: Whether to skip nodes that
+      `forest_to_ui_elements` would skip with the same argument.
+
+  Returns:
+    The fingerprint. Only comparable within the same process.
+  """
+  node_keys = []
   for window in forest.windows:
     for node in window.tree.nodes:
       if not node.child_ids or node.content_description or node.is_scrollable:
         if exclude_invisible_elements and not node.is_visible_to_user:
           continue
-        else:
-          elements.append(accessibility_node_to_ui_element(node, screen_size))
-  return elements
+        bounds = node.bounds_in_screen
+        node_keys.append((
+            node.text,
+            node.content_description,
+            node.class_name,
+            bounds.left,
+            bounds.right,
+            bounds.top,
+            bounds.bottom,
+            node.hint_text,
+            node.is_checked,
+            node.is_checkable,
+            node.is_clickable,
+            node.is_editable,
+            node.is_enabled,
+            node.is_focused,
+            node.is_focusable,
+            node.is_long_clickable,
+            node.is_scrollable,
+            node.is_selected,
+            node.is_visible_to_user,
+            node.package_name,
+            node.view_id_resource_name,
+        ))
+  return hash(tuple(node_keys))
 
 
 def _parse_ui_hierarchy(xml_string: str) -> dict[str, Any]:
@@ -217,3 +508,100 @@ def xml_dump_to_ui_elements(xml_string: str) -> list[UIElement]:
 
   process_node(parsed_hierarchy, is_root=True)
   return ui_elements
+
+
+# Matches uiautomator bounds, e.g. "[0,63][1080,210]".
+_BOUNDS_PATTERN = re.compile(r'\[(-?\d+),(-?\d+)\]\[(-?\d+),(-?\d+)\]')
+
+
+def _parse_bounds(bounds: Optional[str]) -> Optional[BoundingBox]:
+  """Parses uiautomator bounds into a bounding box."""
+  if not bounds:
+    return None
+  match = _BOUNDS_PATTERN.fullmatch(bounds)
+  if match:
+    x_min, y_min, x_max, y_max = map(int, match.groups())
+  else:
+    x_min, y_min, x_max, y_max = map(
+        int, bounds.strip('[]').replace('][', ',').split(',')
+    )
+  return BoundingBox(x_min, x_max, y_min, y_max)
+
+
+_XML_CHUNK_SIZE = 64 * 1024
+
+
+def _iter_xml_node_attributes(
+    xml_dump: str | bytes, skip_root: bool = False
+) -> Iterator[dict[str, str]]:
+  """Yields the attributes of each XML element in document order.
+
+  Elements are dropped from the parsed tree as soon as they are closed, so
+  memory stays proportional to the depth of the hierarchy.
+
+  Args:
+    xml_dump: The XML document.
+    skip_root: Whether to skip the root element.
+
+  Yields:
+    The attributes of each element, as soon as its start tag is parsed.
+  """
+  parser = ET.XMLPullParser(events=('start', 'end'))
+  open_nodes = []
+  offsets = range(0, len(xml_dump), _XML_CHUNK_SIZE)
+  # A final None closes the parser, which flushes any remaining events.
+  for offset in (*offsets, None):
+    if offset is None:
+      parser.close()
+    else:
+      parser.feed(xml_dump[offset : offset + _XML_CHUNK_SIZE])
+    for event, node in parser.read_events():
+      if event == 'start':
+        if open_nodes or not skip_root:
+          yield node.attrib
+        open_nodes.append(node)
+      else:
+        open_nodes.pop()
+        if open_nodes:
+          # Children close in order, so this is always the first child.
+          open_nodes[-1].remove(node)
+
+
+def stream_xml_dump_to_ui_elements(xml_dump: str | bytes) -> list[UIElement]:
+  """Converts a uiautomator dump to UIElements in a single streaming pass.
+
+  Gives the same result as `xml_dump_to_ui_elements`, but builds each element
+  as its start tag is parsed and discards the parsed XML as it goes, so it
+  neither holds a second copy of the hierarchy nor recurses.
+
+  Args:
+    xml_dump: The UI hierarchy XML from uiautomator dump.
+
+  Returns:
+    The UI elements of all nodes below the root, in document order.
+  """
+  ui_elements = []
+  for attrib in _iter_xml_node_attributes(xml_dump, skip_root=True):
+    bbox = _parse_bounds(attrib.get('bounds'))
+    ui_elements.append(
+        UIElement(
+            text=attrib.get('text'),
+            content_description=attrib.get('content-desc'),
+            class_name=attrib.get('class'),
+            bbox=bbox,
+            bbox_pixels=bbox,
+            is_checked=attrib.get('checked') == 'true',
+            is_checkable=attrib.get('checkable') == 'true',
+            is_clickable=attrib.get('clickable') == 'true',
+            is_enabled=attrib.get('enabled') == 'true',
+            is_focused=attrib.get('focused') == 'true',
+            is_focusable=attrib.get('focusable') == 'true',
+            is_long_clickable=attrib.get('long-clickable') == 'true',
+            is_scrollable=attrib.get('scrollable') == 'true',
+            is_selected=attrib.get('selected') == 'true',
+            package_name=attrib.get('package'),
+            resource_id=attrib.get('resource-id'),
+            is_visible=True,
+        )
+    )
+  return ui_elements
@@ -13,10 +13,12 @@
 # limitations under the License.
 
 import dataclasses
+import pickle
 from unittest import mock
 
 from absl.testing import absltest
 from absl.testing import parameterized
+from android_env.proto.a11y import android_accessibility_forest_pb2
 from android_world.env import representation_utils
 
 
@@ -115,5 +117,296 @@ class TestAccessibilityNodeToUIElement(parameterized.TestCase):
     self.assertEqual(ui_element.bbox, expected_normalized_bbox)
 
 
+class ForestToUIElementsTest(parameterized.TestCase):
+
+  @parameterized.product(
+      exclude_invisible_elements=[False, True],
+      screen_size=[None, (1080, 2400), (333, 777)],
+  )
+  def test_matches_per_node_conversion(
+      self, exclude_invisible_elements, screen_size
+  ):
+    forest = android_accessibility_forest_pb2.AndroidAccessibilityForest()
+    for window_index in range(2):
+      tree = forest.windows.add().tree
+      tree.nodes.add(unique_id=0, child_ids=[1, 2, 3], is_visible_to_user=True)
+      tree.nodes.add(
+          unique_id=1,
+          text=f'Title {window_index}',
+          class_name='android.widget.TextView',
+          package_name='com.example',
+          view_id_resource_name='com.example:id/title',
+          is_visible_to_user=True,
+          is_enabled=True,
+      )
+      tree.nodes.add(
+          unique_id=2,
+          child_ids=[4],
+          content_description='Toolbar',
+          is_visible_to_user=False,
+      )
+      tree.nodes.add(
+          unique_id=3,
+          child_ids=[5],
+          is_scrollable=True,
+          is_visible_to_user=True,
+      )
+      tree.nodes.add(
+          unique_id=4,
+          hint_text='Search',
+          is_editable=True,
+          is_focused=True,
+          is_visible_to_user=False,
+      )
+      for node in tree.nodes:
+        node.bounds_in_screen.left = 7 * node.unique_id
+        node.bounds_in_screen.right = 7 * node.unique_id + 301
+        node.bounds_in_screen.top = 13 * node.unique_id
+        node.bounds_in_screen.bottom = 13 * node.unique_id + 97
+    expected = [
+        representation_utils.accessibility_node_to_ui_element(
+            node, screen_size
+        )
+        for window in forest.windows
+        for node in window.tree.nodes
+        if not node.child_ids
+        or node.content_description
+        or node.is_scrollable
+        if node.is_visible_to_user or not exclude_invisible_elements
+    ]
+
+    elements = representation_utils.forest_to_ui_elements(
+        forest,
+        exclude_invisible_elements=exclude_invisible_elements,
+        screen_size=screen_size,
+    )
+
+    self.assertNotEmpty(elements)
+    self.assertEqual(elements, expected)
+    self.assertEqual(
+        [type(e.bbox_pixels.x_min) for e in elements], [int] * len(elements)
+    )
+
+  def test_empty_forest(self):
+    forest = android_accessibility_forest_pb2.AndroidAccessibilityForest()
+
+    self.assertEqual(
+        representation_utils.forest_to_ui_elements(
+            forest, screen_size=(100, 100)
+        ),
+        [],
+    )
+
+
+_XML_DUMP = (
+    "<?xml version='1.0' encoding='UTF-8' standalone='yes' ?>"
+    '<hierarchy rotation="0">'
+    '<node index="0" text="" resource-id="" class="android.widget.FrameLayout"'
+    ' package="com.android.settings" content-desc="" checkable="false"'
+    ' checked="false" clickable="false" enabled="true" focusable="false"'
+    ' focused="false" scrollable="false" long-clickable="false"'
+    ' password="false" selected="false" bounds="[0,0][1080,2400]">'
+    '<node index="0" text="Wi-Fi &amp; network" resource-id="android:id/title"'
+    ' class="android.widget.TextView" package="com.android.settings"'
+    ' content-desc="" checkable="true" checked="true" clickable="true"'
+    ' enabled="true" focusable="true" focused="false" scrollable="false"'
+    ' long-clickable="false" password="false" selected="false"'
+    ' bounds="[42,380][1038,451]" />'
+    '<node index="1" text="Caf\u00e9" class="android.widget.ScrollView"'
+    ' scrollable="true" long-clickable="true" content-desc="List" />'
+    '</node>'
+    '<node index="1" text="Status bar" bounds="[0,-10][1080,63]" />'
+    '</hierarchy>'
+)
+
+
+class XmlDumpToUIElementsTest(absltest.TestCase):
+
+  def test_streaming_parser_matches_tree_parser(self):
+    expected = representation_utils.xml_dump_to_ui_elements(_XML_DUMP)
+
+    self.assertLen(expected, 4)
+    self.assertEqual(
+        representation_utils.stream_xml_dump_to_ui_elements(_XML_DUMP),
+        expected,
+    )
+    self.assertEqual(
+        representation_utils.stream_xml_dump_to_ui_elements(
+            _XML_DUMP.encode('utf-8')
+        ),
+        expected,
+    )
+
+  def test_streaming_parser_handles_deep_hierarchies(self):
+    depth = 5000
+    xml_dump = (
+        '<hierarchy>'
+        + ''.join(
+            f'<node text="{i}" bounds="[0,{i}][1,{i}]">' for i in range(depth)
+        )
+        + '</node>' * depth
+        + '</hierarchy>'
+    )
+
+    elements = representation_utils.stream_xml_dump_to_ui_elements(xml_dump)
+
+    self.assertLen(elements, depth)
+    self.assertEqual(elements[-1].text, str(depth - 1))
+    self.assertEqual(
+        elements[-1].bbox_pixels,
+        representation_utils.BoundingBox(0, 1, depth - 1, depth - 1),
+    )
+
+
+class UIElementTableTest(absltest.TestCase):
+
+  def test_round_trip_is_lossless(self):
+    elements = [
+        representation_utils.UIElement(
+            text='Send',
+            class_name='android.widget.Button',
+            bbox=representation_utils.BoundingBox(0.1, 0.5, 0.25, 0.3),
+            bbox_pixels=representation_utils.BoundingBox(108, 540, 600, 720),
+            is_checked=False,
+            is_clickable=True,
+            package_name='com.android.messaging',
+            metadata={'index': 0},
+        ),
+        representation_utils.UIElement(
+            text='',
+            class_name='android.widget.Button',
+            bbox_pixels=representation_utils.BoundingBox(0, 1.5, 2, 3),
+            package_name='com.android.messaging',
+        ),
+        representation_utils.UIElement(),
+    ]
+
+    table = representation_utils.UIElementTable.from_elements(elements)
+    round_tripped = table.to_elements()
+
+    self.assertLen(table, 3)
+    self.assertEqual(round_tripped, elements)
+    self.assertIsInstance(round_tripped[0].bbox_pixels.x_min, int)
+    self.assertIsInstance(round_tripped[1].bbox_pixels.x_max, float)
+    self.assertCountEqual(
+        table.strings,
+        ['Send', '', 'android.widget.Button', 'com.android.messaging'],
+    )
+
+  def test_table_covers_all_fields(self):
+    covered = (
+        set(representation_utils._TABLE_STRING_FIELDS)
+        | set(representation_utils._TABLE_FLAG_FIELDS)
+        | set(representation_utils._TABLE_BBOX_FIELDS)
+        | {'metadata'}
+    )
+
+    self.assertEqual(
+        covered,
+        {f.name for f in dataclasses.fields(representation_utils.UIElement)},
+    )
+
+  def test_empty_table(self):
+    table = representation_utils.UIElementTable.from_elements([])
+
+    self.assertEmpty(table.to_elements())
+    self.assertEqual(pickle.loads(pickle.dumps(table)).to_elements(), [])
+
+
+class SlottedPickleTest(absltest.TestCase):
+
+  def test_pickle_round_trip(self):
+    element = representation_utils.UIElement(
+        text='a', bbox_pixels=representation_utils.BoundingBox(1, 2, 3, 4)
+    )
+
+    self.assertEqual(pickle.loads(pickle.dumps(element)), element)
+
+  def test_loads_state_pickled_without_slots(self):
+    # Pickles of the non-slotted classes store `__dict__`, which may lack
+    # fields added since.
+    element = representation_utils.UIElement.__new__(
+        representation_utils.UIElement
+    )
+    element.__setstate__({'text': 'a', 'is_checked': True})
+
+    self.assertEqual(
+        element, representation_utils.UIElement(text='a', is_checked=True)
+    )
+
+
+def _make_forest(
+    texts: list[str], invisible_texts: tuple[str, ...] = ()
+) -> android_accessibility_forest_pb2.AndroidAccessibilityForest:
+  forest = android_accessibility_forest_pb2.AndroidAccessibilityForest()
+  tree = forest.windows.add().tree
+  root = tree.nodes.add(unique_id=0, class_name='FrameLayout')
+  for i, text in enumerate(texts, start=1):
+    root.child_ids.append(i)
+    node = tree.nodes.add(
+        unique_id=i,
+        text=text,
+        is_visible_to_user=text not in invisible_texts,
+    )
+    node.bounds_in_screen.left = 0
+    node.bounds_in_screen.right = 100
+    node.bounds_in_screen.top = 10 * i
+    node.bounds_in_screen.bottom = 10 * i + 10
+  return forest
+
+
+class ForestFingerprintTest(absltest.TestCase):
+
+  def test_equal_ui_elements_have_equal_fingerprints(self):
+    forest = _make_forest(['a', 'b'])
+    same_forest = _make_forest(['a', 'b'])
+    # Only fields that UI elements do not read differ.
+    same_forest.windows[0].tree.nodes[0].text = 'not a leaf'
+    same_forest.windows[0].id = 7
+
+    self.assertEqual(
+        representation_utils.forest_to_ui_elements(forest),
+        representation_utils.forest_to_ui_elements(same_forest),
+    )
+    self.assertEqual(
+        representation_utils.forest_fingerprint(forest),
+        representation_utils.forest_fingerprint(same_forest),
+    )
+
+  def test_changed_ui_elements_change_fingerprint(self):
+    forest = _make_forest(['a', 'b'])
+    changed_text = _make_forest(['a', 'c'])
+    moved = _make_forest(['a', 'b'])
+    moved.windows[0].tree.nodes[1].bounds_in_screen.top = 5
+
+    fingerprint = representation_utils.forest_fingerprint(forest)
+
+    self.assertNotEqual(
+        fingerprint, representation_utils.forest_fingerprint(changed_text)
+    )
+    self.assertNotEqual(
+        fingerprint, representation_utils.forest_fingerprint(moved)
+    )
+
+  def test_invisible_elements_are_excluded(self):
+    forest = _make_forest(['a', 'b'])
+    with_hidden = _make_forest(
+        ['a', 'b', 'hidden'], invisible_texts=('hidden',)
+    )
+
+    self.assertNotEqual(
+        representation_utils.forest_fingerprint(forest),
+        representation_utils.forest_fingerprint(with_hidden),
+    )
+    self.assertEqual(
+        representation_utils.forest_fingerprint(
+            forest, exclude_invisible_elements=True
+        ),
+        representation_utils.forest_fingerprint(
+            with_hidden, exclude_invisible_elements=True
+        ),
+    )
+
+
 if __name__ == '__main__':
   absltest.main()
@@ -26,6 +26,7 @@ from typing import Iterable
 from absl import logging
 from android_world.env import adb_utils
 from android_world.env import interface
+from android_world.env import text_index
 from android_world.env import tools
 from android_world.task_evals.information_retrieval import joplin_app_utils
 from android_world.utils import file_utils
@@ -35,6 +36,9 @@ import requests
 APP_DATA = file_utils.convert_to_posix_path(os.path.dirname(__file__),
 'app_data')
 
+# How long to wait for the screen to respond to a launch or click.
+_UI_TIMEOUT_SEC = 10.0
+
 
 def download_app_data(file_name: str) -> str:
   """Downloads file from a GCS bucket, if not cached, and installs it."""
@@ -62,6 +66,41 @@ def download_app_data(file_name: str) -> str:
   return full_path
 
 
+def _click_and_wait(
+    env: interface.AsyncEnv,
+    controller: tools.AndroidToolController,
+    element_text: str,
+    next_text: str | None = None,
+) -> None:
+  """Clicks an element and waits for the screen it leads to.
+
+  The click itself waits for the element to appear.
+
+  Args:
+    env: The environment.
+    controller: The controller that clicks.
+    element_text: The text of the element to click.
+    next_text: The text of an element on the screen the click leads to, such
+      as the next element to click. If None, only waits for the screen to
+      change.
+  """
+  before = env.controller.get_ui_elements()
+  controller.click_element(element_text)
+
+  def arrived(elements) -> bool:
+    if elements == before:
+      return False
+    if next_text is None:
+      return True
+    index = text_index.UIElementTextIndex(elements, case_sensitive=False)
+    return index.find(next_text, max_distance=0)[0] != -1
+
+  if not env.controller.wait_until(arrived, _UI_TIMEOUT_SEC):
+    logging.warning(
+        "Screen did not change as expected after clicking %s.", element_text
+    )
+
+
 class AppSetup(abc.ABC):
   """Abstract class for setting up an app."""
 
@@ -91,6 +130,28 @@ class AppSetup(abc.ABC):
         env.controller,
     )
 
+  @classmethod
+  def _wait_for_launch(
+      cls, env: interface.AsyncEnv, text: str | None = None
+  ) -> None:
+    """Waits until the app is on screen.
+
+    Args:
+      env: The environment.
+      text: The text of an element the app shows once started, such as the
+        first element to click. If None, waits for any element of the app.
+    """
+    package = cls.package_name()
+    if not env.controller.wait_until(
+        lambda elements: any(e.package_name == package for e in elements),
+        _UI_TIMEOUT_SEC,
+    ):
+      logging.warning("%s did not come to the foreground.", cls.app_name)
+    elif text is not None and not env.controller.wait_for_text(
+        text, _UI_TIMEOUT_SEC
+    ):
+      logging.warning("%s did not show %s.", cls.app_name, text)
+
   @classmethod
   def _copy_data_to_device(
       cls,
@@ -141,9 +202,7 @@ class CameraApp(AppSetup):
     adb_utils.launch_app(cls.app_name, env.controller)
     try:
       controller = tools.AndroidToolController(env=env.controller)
-      time.sleep(2.0)
-      controller.click_element("NEXT")
-      time.sleep(2.0)
+      _click_and_wait(env, controller, "NEXT")
     finally:
       adb_utils.close_app(cls.app_name, env.controller)
 
@@ -161,16 +220,12 @@ class ChromeApp(AppSetup):
     adb_utils.launch_app(cls.app_name, env.controller)
     try:
       controller = tools.AndroidToolController(env=env.controller)
-      time.sleep(2.0)
       # Welcome screen.
-      controller.click_element("Accept & continue")
-      time.sleep(2.0)
+      _click_and_wait(env, controller, "Accept & continue", "No thanks")
       # Turn on sync?
-      controller.click_element("No thanks")
-      time.sleep(2.0)
+      _click_and_wait(env, controller, "No thanks", "No thanks")
       # Enable notifications?
-      controller.click_element("No thanks")
-      time.sleep(2.0)
+      _click_and_wait(env, controller, "No thanks")
     finally:
       adb_utils.close_app(cls.app_name, env.controller)
 
@@ -186,7 +241,7 @@ class ClockApp(AppSetup):
 
     # Open once for initial tool tip display.
     adb_utils.launch_app(cls.app_name, env.controller)
-    time.sleep(2.0)
+    cls._wait_for_launch(env)
     adb_utils.close_app(cls.app_name, env.controller)
 
 
@@ -203,13 +258,10 @@ class ContactsApp(AppSetup):
     adb_utils.launch_app(cls.app_name, env.controller)
     try:
       controller = tools.AndroidToolController(env=env.controller)
-      time.sleep(2.0)
       # Back up & organize your contacts with Google.
-      controller.click_element("Skip")
-      time.sleep(2.0)
+      _click_and_wait(env, controller, "Skip", "Don't allow")
       # Allow Contacts to send you notifications?
-      controller.click_element("Don't allow")
-      time.sleep(2.0)
+      _click_and_wait(env, controller, "Don't allow")
     finally:
       adb_utils.close_app(cls.app_name, env.controller)
 
@@ -245,22 +297,14 @@ class MarkorApp(AppSetup):
     adb_utils.launch_app(cls.app_name, env.controller)
     try:
       controller = tools.AndroidToolController(env=env.controller)
-      time.sleep(2.0)
-      controller.click_element("NEXT")
-      time.sleep(2.0)
-      controller.click_element("NEXT")
-      time.sleep(2.0)
-      controller.click_element("NEXT")
-      time.sleep(2.0)
-      controller.click_element("NEXT")
-      time.sleep(2.0)
-      controller.click_element("DONE")
-      time.sleep(2.0)
-
-      controller.click_element("OK")
-      time.sleep(2.0)
-      controller.click_element("Allow access to manage all files")
-      time.sleep(2.0)
+      _click_and_wait(env, controller, "NEXT", "NEXT")
+      _click_and_wait(env, controller, "NEXT", "NEXT")
+      _click_and_wait(env, controller, "NEXT", "NEXT")
+      _click_and_wait(env, controller, "NEXT", "DONE")
+      _click_and_wait(env, controller, "DONE", "OK")
+
+      _click_and_wait(env, controller, "OK", "Allow access to manage all files")
+      _click_and_wait(env, controller, "Allow access to manage all files")
     finally:
       adb_utils.close_app(cls.app_name, env.controller)
 
@@ -306,9 +350,7 @@ class ClipperApp(AppSetup):
     controller = tools.AndroidToolController(env=env.controller)
     adb_utils.launch_app(cls.app_name, env.controller)
     try:
-      time.sleep(2.0)
-      controller.click_element("Continue")
-      time.sleep(2.0)
+      _click_and_wait(env, controller, "Continue", "OK")
       controller.click_element("OK")
     finally:
       adb_utils.close_app(cls.app_name, env.controller)
@@ -395,9 +437,9 @@ class SimpleGalleryProApp(AppSetup):
     adb_utils.launch_app("simple gallery pro", env.controller)
     try:
       controller = tools.AndroidToolController(env=env.controller)
-      time.sleep(2.0)
-      controller.click_element("All files")
-      time.sleep(2.0)
+      _click_and_wait(
+          env, controller, "All files", "Allow access to manage all files"
+      )
       controller.click_element("Allow access to manage all files")
     finally:
       adb_utils.close_app(cls.app_name, env.controller)
@@ -425,9 +467,7 @@ class SimpleSMSMessengerApp(AppSetup):
     adb_utils.launch_app(cls.app_name, env.controller)
     try:
       controller = tools.AndroidToolController(env=env.controller)
-      time.sleep(2.0)
-      controller.click_element("SMS Messenger")
-      time.sleep(2.0)
+      _click_and_wait(env, controller, "SMS Messenger", "Set as default")
       controller.click_element("Set as default")
     finally:
       adb_utils.close_app(cls.app_name, env.controller)
@@ -465,7 +505,7 @@ class AudioRecorder(AppSetup):
         ],
         env.controller,
     )
-    time.sleep(2.0)  # Let app setup.
+    cls._wait_for_launch(env)
     adb_utils.close_app(cls.app_name, env.controller)
 
 
@@ -487,12 +527,9 @@ class ExpenseApp(AppSetup):
     super().setup(env)
     adb_utils.launch_app(cls.app_name, env.controller)
     try:
-      time.sleep(2.0)
       controller = tools.AndroidToolController(env=env.controller)
-      controller.click_element("NEXT")
-      time.sleep(2.0)
-      controller.click_element("CONTINUE")
-      time.sleep(3.0)
+      _click_and_wait(env, controller, "NEXT", "CONTINUE")
+      _click_and_wait(env, controller, "CONTINUE")
     finally:
       adb_utils.close_app(cls.app_name, env.controller)
 
@@ -507,7 +544,7 @@ class RecipeApp(AppSetup):
   def setup(cls, env: interface.AsyncEnv) -> None:
     super().setup(env)
     adb_utils.launch_app(cls.app_name, env.controller)
-    time.sleep(2.0)
+    cls._wait_for_launch(env)
     adb_utils.close_app(cls.app_name, env.controller)
 
 
@@ -558,12 +595,10 @@ class OsmAndApp(AppSetup):
   def setup(cls, env: interface.AsyncEnv) -> None:
     super().setup(env)
     adb_utils.launch_app(cls.app_name, env.controller)
-    time.sleep(2.0)
 
     try:
       controller = tools.AndroidToolController(env=env.controller)
-      controller.click_element("SKIP DOWNLOAD")
-      time.sleep(2.0)
+      _click_and_wait(env, controller, "SKIP DOWNLOAD")
     except ValueError:
       logging.warn(
           "First time setup did not click through all anticipated screens."
@@ -630,9 +665,10 @@ class OpenTracksApp(AppSetup):
         "android.permission.POST_NOTIFICATIONS",
         env.controller,
     )
-    time.sleep(2.0)
     controller = tools.AndroidToolController(env=env.controller)
     # Give permission for bluetooth, can't be done through adb.
+    if not env.controller.wait_for_text("Allow", _UI_TIMEOUT_SEC):
+      logging.warning("OpenTracks did not ask for the bluetooth permission.")
     controller.click_element("Allow")
     adb_utils.launch_app("activity tracker", env.controller)
     adb_utils.close_app("activity tracker", env.controller)
@@ -675,15 +711,12 @@ class VlcApp(AppSetup):
         ],
         env.controller,
     )
-    time.sleep(2.0)
+    cls._wait_for_launch(env, "Skip")
     try:
       controller = tools.AndroidToolController(env=env.controller)
-      controller.click_element("Skip")
-      time.sleep(2.0)
-      controller.click_element("GRANT PERMISSION")
-      time.sleep(2.0)
-      controller.click_element("OK")
-      time.sleep(2.0)
+      _click_and_wait(env, controller, "Skip", "GRANT PERMISSION")
+      _click_and_wait(env, controller, "GRANT PERMISSION", "OK")
+      _click_and_wait(env, controller, "OK", "Allow access to manage all files")
       controller.click_element("Allow access to manage all files")
     finally:
       adb_utils.close_app(cls.app_name, env.controller)
@@ -764,5 +797,5 @@ class RetroMusicApp(AppSetup):
       adb_utils.grant_permissions(package, permission, env.controller)
 
     adb_utils.launch_app(cls.app_name, env.controller)
-    time.sleep(2.0)
+    cls._wait_for_launch(env)
     adb_utils.close_app(cls.app_name, env.controller)
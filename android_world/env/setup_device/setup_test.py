@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import threading
 from unittest import mock
 
 from absl.testing import absltest
@@ -58,10 +59,13 @@ class SetupTest(absltest.TestCase):
         mock.patch.object(adb_utils, "issue_generic_request")
     )
 
+  @mock.patch.object(apps, "download_app_data")
   @mock.patch.object(tools, "AndroidToolController")
   @mock.patch.object(setup, "download_and_install_apk")
   @mock.patch.object(app_snapshot, "save_snapshot")
-  def test_setup_apps(self, mock_save_snapshot, mock_install_apk, unused_tools):
+  def test_setup_apps(
+      self, mock_save_snapshot, mock_install_apk, unused_tools, unused_download
+  ):
     env = mock.create_autospec(interface.AsyncEnv)
     mock_app_setups = {
         app_class: mock.patch.object(app_class, "setup").start()
@@ -79,6 +83,75 @@ class SetupTest(absltest.TestCase):
       mock_save_snapshot.assert_any_call(app_class.app_name, env.controller)
 
 
+  @mock.patch.object(apps, "download_app_data")
+  @mock.patch.object(setup, "download_and_install_apk")
+  @mock.patch.object(app_snapshot, "save_snapshot")
+  def test_setup_apps_downloads_while_using_device_serially(
+      self, mock_save_snapshot, mock_install_apk, mock_download
+  ):
+    env = mock.create_autospec(interface.AsyncEnv)
+    markor_setup_done = threading.Event()
+    order = []
+
+    def download(apk_name):
+      if apk_name == apps.VlcApp.apk_names[0]:
+        # Only returns once Markor was set up, which deadlocks if downloads
+        # do not overlap with UI setup.
+        self.assertTrue(markor_setup_done.wait(timeout=10))
+
+    def markor_setup(unused_env):
+      order.append("setup markor")
+      markor_setup_done.set()
+
+    mock_download.side_effect = download
+    mock_install_apk.side_effect = lambda apk_name, unused_env: order.append(
+        f"install {apk_name}"
+    )
+    mock_save_snapshot.side_effect = lambda app_name, unused_env: order.append(
+        f"snapshot {app_name}"
+    )
+    self.enter_context(
+        mock.patch.object(apps.MarkorApp, "setup", side_effect=markor_setup)
+    )
+    self.enter_context(
+        mock.patch.object(
+            apps.VlcApp,
+            "setup",
+            side_effect=lambda unused_env: order.append("setup vlc"),
+        )
+    )
+
+    timings = setup.setup_apps(env, app_list=(apps.MarkorApp, apps.VlcApp))
+
+    self.assertEqual(
+        order,
+        [
+            f"install {apps.MarkorApp.apk_names[0]}",
+            "setup markor",
+            f"snapshot {apps.MarkorApp.app_name}",
+            f"install {apps.VlcApp.apk_names[0]}",
+            "setup vlc",
+            f"snapshot {apps.VlcApp.app_name}",
+        ],
+    )
+    self.assertGreater(timings.total, 0)
+    self.assertGreaterEqual(timings.total, timings.setup)
+
+  @mock.patch.object(setup, "maybe_install_app")
+  @mock.patch.object(app_snapshot, "save_snapshot")
+  def test_setup_apps_raises_on_failed_install(
+      self, mock_save_snapshot, mock_maybe_install_app
+  ):
+    env = mock.create_autospec(interface.AsyncEnv)
+    mock_maybe_install_app.side_effect = RuntimeError("Failed")
+    clock_setup = self.enter_context(mock.patch.object(apps.ClockApp, "setup"))
+
+    with self.assertRaises(RuntimeError):
+      setup.setup_apps(env, app_list=(apps.ClockApp,))
+    clock_setup.assert_not_called()
+    mock_save_snapshot.assert_not_called()
+
+
 class _App(apps.AppSetup):
 
   def __init__(self, apk_names, app_name):
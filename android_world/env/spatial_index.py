@@ -0,0 +1,214 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Grid index over the pixel bounding boxes of UI elements.
+
+Answers which element is at a point, which elements are in a region, and which
+scrollable container is nearest to a point, without scanning every element.
+"""
+
+import collections
+from collections.abc import Iterable, Sequence
+import math
+from typing import Optional
+
+from android_world.env import representation_utils
+
+# Side of a grid cell, in pixels.
+_CELL_SIZE = 128
+
+# Elements covering more cells than this are kept in a separate list checked
+# by every query, instead of being added to every cell they cover.
+_MAX_CELLS_PER_ELEMENT = 256
+
+
+def _contains(
+    bbox: representation_utils.BoundingBox, x: float, y: float
+) -> bool:
+  return bbox.x_min <= x < bbox.x_max and bbox.y_min <= y < bbox.y_max
+
+
+def _distance(
+    bbox: representation_utils.BoundingBox, x: float, y: float
+) -> float:
+  """Returns the distance from a point to the nearest point of a box."""
+  dx = max(bbox.x_min - x, 0, x - bbox.x_max)
+  dy = max(bbox.y_min - y, 0, y - bbox.y_max)
+  return math.hypot(dx, dy)
+
+
+class UIElementIndex:
+  """Spatial index over the `bbox_pixels` of a list of UI elements.
+
+  The index is built by the first query, so creating one is free. Queries
+  return indices into the list. Elements without a bounding box, or with an
+  empty one, are never returned.
+  """
+
+  def __init__(
+      self,
+      elements: Sequence[representation_utils.UIElement],
+      cell_size: int = _CELL_SIZE,
+  ):
+    """Initializes the index.
+
+    Args:
+      elements: The UI elements. The list must not change afterwards.
+      cell_size: Side of a grid cell, in pixels.
+    """
+    self._elements = elements
+    self._cell_size = cell_size
+    self._cells: Optional[dict[tuple[int, int], list[int]]] = None
+    self._large: list[int] = []
+    self._scrollable: list[int] = []
+
+  def _build(self) -> dict[tuple[int, int], list[int]]:
+    """Builds the grid on first use and returns it."""
+    if self._cells is not None:
+      return self._cells
+    cells = collections.defaultdict(list)
+    for index, element in enumerate(self._elements):
+      bbox = element.bbox_pixels
+      if bbox is None or bbox.width <= 0 or bbox.height <= 0:
+        continue
+      if element.is_scrollable:
+        self._scrollable.append(index)
+      x_cells, y_cells = self._cell_ranges(bbox)
+      if len(x_cells) * len(y_cells) > _MAX_CELLS_PER_ELEMENT:
+        self._large.append(index)
+        continue
+      for cell_x in x_cells:
+        for cell_y in y_cells:
+          cells[cell_x, cell_y].append(index)
+    self._cells = dict(cells)
+    return self._cells
+
+  def _cell_ranges(
+      self, bbox: representation_utils.BoundingBox
+  ) -> tuple[range, range]:
+    return (
+        range(
+            math.floor(bbox.x_min / self._cell_size),
+            math.floor(bbox.x_max / self._cell_size) + 1,
+        ),
+        range(
+            math.floor(bbox.y_min / self._cell_size),
+            math.floor(bbox.y_max / self._cell_size) + 1,
+        ),
+    )
+
+  def _smallest(self, indices: Iterable[int]) -> Optional[int]:
+    """Returns the element with the smallest area; later ones win ties."""
+    best, best_area = None, math.inf
+    for index in indices:
+      area = self._elements[index].bbox_pixels.area
+      if area <= best_area:
+        best, best_area = index, area
+    return best
+
+  def element_at(self, x: float, y: float) -> Optional[int]:
+    """Returns the innermost element containing a point.
+
+    Args:
+      x: Horizontal pixel coordinate.
+      y: Vertical pixel coordinate.
+
+    Returns:
+      The index of the smallest element whose box contains the point, or None
+      if there is none.
+    """
+    cell = (
+        math.floor(x / self._cell_size),
+        math.floor(y / self._cell_size),
+    )
+    candidates = self._build().get(cell, [])
+    return self._smallest(
+        index
+        for index in sorted(candidates + self._large)
+        if _contains(self._elements[index].bbox_pixels, x, y)
+    )
+
+  def elements_in(
+      self,
+      region: representation_utils.BoundingBox,
+      fully_contained: bool = False,
+  ) -> list[int]:
+    """Returns the elements that overlap a region.
+
+    Args:
+      region: The region, in pixels.
+      fully_contained: Whether to only return elements entirely inside the
+        region.
+
+    Returns:
+      The indices of the matching elements, in ascending order.
+    """
+    cells = self._build()
+    x_cells, y_cells = self._cell_ranges(region)
+    if len(x_cells) * len(y_cells) > len(cells):
+      candidates = {i for cell in cells.values() for i in cell}
+    else:
+      candidates = set()
+      for cell_x in x_cells:
+        for cell_y in y_cells:
+          candidates.update(cells.get((cell_x, cell_y), ()))
+    candidates.update(self._large)
+
+    matches = []
+    for index in sorted(candidates):
+      bbox = self._elements[index].bbox_pixels
+      if fully_contained:
+        match = (
+            region.x_min <= bbox.x_min
+            and bbox.x_max <= region.x_max
+            and region.y_min <= bbox.y_min
+            and bbox.y_max <= region.y_max
+        )
+      else:
+        match = (
+            bbox.x_min < region.x_max
+            and region.x_min < bbox.x_max
+            and bbox.y_min < region.y_max
+            and region.y_min < bbox.y_max
+        )
+      if match:
+        matches.append(index)
+    return matches
+
+  def nearest_scrollable(self, x: float, y: float) -> Optional[int]:
+    """Returns the scrollable element that a scroll at a point most likely hits.
+
+    Args:
+      x: Horizontal pixel coordinate.
+      y: Vertical pixel coordinate.
+
+    Returns:
+      The index of the innermost scrollable element containing the point, or
+      else of the scrollable element closest to it, or None if there are no
+      scrollable elements.
+    """
+    self._build()
+    containing = [
+        index
+        for index in self._scrollable
+        if _contains(self._elements[index].bbox_pixels, x, y)
+    ]
+    if containing:
+      return self._smallest(containing)
+    if not self._scrollable:
+      return None
+    return min(
+        self._scrollable,
+        key=lambda index: _distance(self._elements[index].bbox_pixels, x, y),
+    )
@@ -0,0 +1,127 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+
+from absl.testing import absltest
+from android_world.env import representation_utils
+from android_world.env import spatial_index
+
+BoundingBox = representation_utils.BoundingBox
+UIElement = representation_utils.UIElement
+
+
+class UIElementIndexTest(absltest.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.elements = [
+        # 0: Full screen container, which spans more cells than indexed.
+        UIElement(bbox_pixels=BoundingBox(0, 1080, 0, 2400)),
+        # 1: Scrollable list.
+        UIElement(
+            bbox_pixels=BoundingBox(0, 1080, 200, 2000), is_scrollable=True
+        ),
+        # 2-4: Rows.
+        UIElement(text='Row 0', bbox_pixels=BoundingBox(0, 1080, 200, 400)),
+        UIElement(text='Row 1', bbox_pixels=BoundingBox(0, 1080, 400, 600)),
+        UIElement(text='Row 2', bbox_pixels=BoundingBox(0, 1080, 600, 800)),
+        # 5: Button inside row 1.
+        UIElement(
+            text='Delete', bbox_pixels=BoundingBox(900, 1000, 450, 550)
+        ),
+        # 6: No bounding box.
+        UIElement(text='Hidden'),
+        # 7: Horizontal carousel at the bottom.
+        UIElement(
+            bbox_pixels=BoundingBox(0, 1080, 2100, 2300), is_scrollable=True
+        ),
+    ]
+    self.index = spatial_index.UIElementIndex(self.elements, cell_size=100)
+
+  def test_element_at_returns_innermost(self):
+    self.assertEqual(self.index.element_at(950, 500), 5)
+    self.assertEqual(self.index.element_at(100, 500), 3)
+    self.assertEqual(self.index.element_at(100, 1500), 1)
+    self.assertEqual(self.index.element_at(100, 2050), 0)
+    self.assertIsNone(self.index.element_at(2000, 5000))
+
+  def test_element_at_boundaries_are_half_open(self):
+    self.assertEqual(self.index.element_at(100, 400), 3)
+    self.assertEqual(self.index.element_at(100, 399.5), 2)
+
+  def test_elements_in(self):
+    region = BoundingBox(850, 1050, 420, 580)
+
+    self.assertEqual(self.index.elements_in(region), [0, 1, 3, 5])
+    self.assertEqual(self.index.elements_in(region, fully_contained=True), [5])
+
+  def test_nearest_scrollable(self):
+    self.assertEqual(self.index.nearest_scrollable(500, 500), 1)
+    self.assertEqual(self.index.nearest_scrollable(500, 2200), 7)
+    self.assertEqual(self.index.nearest_scrollable(500, 2060), 7)
+    self.assertEqual(self.index.nearest_scrollable(500, 100), 1)
+
+  def test_no_scrollable(self):
+    index = spatial_index.UIElementIndex([self.elements[2]])
+
+    self.assertIsNone(index.nearest_scrollable(0, 0))
+
+  def test_matches_linear_scan(self):
+    rng = random.Random(0)
+    elements = []
+    for _ in range(300):
+      x, y = rng.randrange(-100, 1100), rng.randrange(-100, 2500)
+      width, height = rng.randrange(0, 600), rng.randrange(0, 600)
+      elements.append(
+          UIElement(bbox_pixels=BoundingBox(x, x + width, y, y + height))
+      )
+    index = spatial_index.UIElementIndex(elements)
+
+    for _ in range(200):
+      x, y = rng.uniform(-50, 1130), rng.uniform(-50, 2450)
+      containing = [
+          i
+          for i, e in enumerate(elements)
+          if e.bbox_pixels.x_min <= x < e.bbox_pixels.x_max
+          and e.bbox_pixels.y_min <= y < e.bbox_pixels.y_max
+      ]
+      found = index.element_at(x, y)
+      if not containing:
+        self.assertIsNone(found)
+      else:
+        self.assertIn(found, containing)
+        self.assertEqual(
+            elements[found].bbox_pixels.area,
+            min(elements[i].bbox_pixels.area for i in containing),
+        )
+
+      region = BoundingBox(x, x + 200, y, y + 300)
+      self.assertEqual(
+          index.elements_in(region),
+          [
+              i
+              for i, e in enumerate(elements)
+              if e.bbox_pixels.width > 0
+              and e.bbox_pixels.height > 0
+              and e.bbox_pixels.x_min < region.x_max
+              and region.x_min < e.bbox_pixels.x_max
+              and e.bbox_pixels.y_min < region.y_max
+              and region.y_min < e.bbox_pixels.y_max
+          ],
+      )
+
+
+if __name__ == '__main__':
+  absltest.main()
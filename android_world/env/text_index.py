@@ -0,0 +1,139 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Fuzzy search over the text of UI elements."""
+
+from collections.abc import Sequence
+from typing import Optional
+
+from android_world.env import representation_utils
+
+# Distance returned when no element is close enough to the target.
+NOT_FOUND_DISTANCE = int(1e9)
+
+
+def levenshtein_distance(
+    s1: str, s2: str, max_distance: Optional[int] = None
+) -> int:
+  """Computes the Levenshtein distance between two strings.
+
+  Only the diagonal band of width `max_distance` is computed, and computation
+  stops as soon as every cell of a row exceeds `max_distance`.
+
+  Args:
+    s1: First string.
+    s2: Second string.
+    max_distance: If given, distances above it are not computed exactly.
+
+  Returns:
+    The distance, or `max_distance + 1` if it is larger than `max_distance`.
+  """
+  if len(s1) < len(s2):
+    s1, s2 = s2, s1
+  if max_distance is None:
+    max_distance = len(s1)
+  too_far = max_distance + 1
+  if len(s1) - len(s2) > max_distance:
+    return too_far
+  if not s2:
+    return len(s1)
+
+  previous_row = [min(j, too_far) for j in range(len(s2) + 1)]
+  for i, c1 in enumerate(s1, start=1):
+    current_row = [too_far] * (len(s2) + 1)
+    first = max(1, i - max_distance)
+    last = min(len(s2), i + max_distance)
+    if first == 1:
+      current_row[0] = min(i, too_far)
+    row_min = current_row[first - 1]
+    for j in range(first, last + 1):
+      distance = min(
+          previous_row[j] + 1,  # Insertion.
+          current_row[j - 1] + 1,  # Deletion.
+          previous_row[j - 1] + (c1 != s2[j - 1]),  # Substitution.
+          too_far,
+      )
+      current_row[j] = distance
+      if distance < row_min:
+        row_min = distance
+    if row_min > max_distance:
+      return too_far
+    previous_row = current_row
+
+  return previous_row[-1]
+
+
+class UIElementTextIndex:
+  """Finds the UI element whose text best matches a target string.
+
+  The `text` and `content_description` of each element are normalized once,
+  exact matches are answered from a hash table, and the remaining candidates
+  are compared with a bounded edit distance that tightens as better matches
+  are found.
+  """
+
+  def __init__(
+      self,
+      elements: Sequence[representation_utils.UIElement],
+      case_sensitive: bool,
+  ):
+    """Initializes the index.
+
+    Args:
+      elements: The UI elements to search.
+      case_sensitive: Whether matching is case sensitive.
+    """
+    self._case_sensitive = case_sensitive
+    self._candidates: list[tuple[int, str]] = []
+    self._exact: dict[str, int] = {}
+    for index, element in enumerate(elements):
+      for attr in (element.text, element.content_description):
+        if attr is not None:
+          attr = self._normalize(attr)
+          self._candidates.append((index, attr))
+          self._exact.setdefault(attr, index)
+
+  def _normalize(self, text: str) -> str:
+    return text if self._case_sensitive else text.lower()
+
+  def find(
+      self, target_text: str, max_distance: Optional[int] = None
+  ) -> tuple[int, int]:
+    """Finds the element with the closest `text` or `content_description`.
+
+    Args:
+      target_text: The text to look for.
+      max_distance: If given, only elements within this edit distance of the
+        target are considered.
+
+    Returns:
+      The index of the first element with the lowest distance and that
+      distance, or (-1, NOT_FOUND_DISTANCE) if no element qualifies.
+    """
+    target_text = self._normalize(target_text)
+    if target_text in self._exact:
+      return self._exact[target_text], 0
+
+    best_index, best_distance = -1, NOT_FOUND_DISTANCE
+    bound = max_distance
+    for index, attr in self._candidates:
+      distance = levenshtein_distance(target_text, attr, bound)
+      if bound is not None and distance > bound:
+        continue
+      best_index, best_distance = index, distance
+      # Only strictly closer matches can replace this one.
+      bound = distance - 1
+      if bound < 0:
+        break
+    return best_index, best_distance
@@ -0,0 +1,112 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+
+from absl.testing import absltest
+from absl.testing import parameterized
+from android_world.env import representation_utils
+from android_world.env import text_index
+
+
+def _full_levenshtein_distance(s1: str, s2: str) -> int:
+  previous_row = list(range(len(s2) + 1))
+  for i, c1 in enumerate(s1, start=1):
+    current_row = [i]
+    for j, c2 in enumerate(s2, start=1):
+      current_row.append(
+          min(
+              previous_row[j] + 1,
+              current_row[j - 1] + 1,
+              previous_row[j - 1] + (c1 != c2),
+          )
+      )
+    previous_row = current_row
+  return previous_row[-1]
+
+
+class LevenshteinDistanceTest(parameterized.TestCase):
+
+  @parameterized.parameters(
+      ('', '', 0),
+      ('abc', '', 3),
+      ('', 'abc', 3),
+      ('kitten', 'sitting', 3),
+      ('Save', 'SAVE', 3),
+      ('flaw', 'lawn', 2),
+  )
+  def test_distance(self, s1, s2, expected):
+    self.assertEqual(text_index.levenshtein_distance(s1, s2), expected)
+
+  def test_bounded_distance_matches_full_distance(self):
+    rng = random.Random(0)
+    for _ in range(500):
+      s1 = ''.join(rng.choices('abc', k=rng.randrange(8)))
+      s2 = ''.join(rng.choices('abc', k=rng.randrange(8)))
+      max_distance = rng.randrange(4)
+      expected = _full_levenshtein_distance(s1, s2)
+
+      self.assertEqual(
+          text_index.levenshtein_distance(s1, s2, max_distance),
+          min(expected, max_distance + 1),
+          msg=(s1, s2, max_distance),
+      )
+
+
+class UIElementTextIndexTest(absltest.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.elements = [
+        representation_utils.UIElement(text='Cancel'),
+        representation_utils.UIElement(content_description='Save note'),
+        representation_utils.UIElement(text='Save', content_description='OK'),
+        representation_utils.UIElement(text='save'),
+        representation_utils.UIElement(),
+    ]
+
+  def test_exact_match(self):
+    index = text_index.UIElementTextIndex(self.elements, case_sensitive=True)
+
+    self.assertEqual(index.find('save'), (3, 0))
+    self.assertEqual(index.find('OK'), (2, 0))
+
+  def test_case_insensitive_returns_first_match(self):
+    index = text_index.UIElementTextIndex(self.elements, case_sensitive=False)
+
+    self.assertEqual(index.find('SAVE'), (2, 0))
+
+  def test_closest_match(self):
+    index = text_index.UIElementTextIndex(self.elements, case_sensitive=True)
+
+    self.assertEqual(index.find('Cancell'), (0, 1))
+    self.assertEqual(index.find('Save not'), (1, 1))
+
+  def test_max_distance(self):
+    index = text_index.UIElementTextIndex(self.elements, case_sensitive=True)
+
+    self.assertEqual(index.find('Sav', max_distance=1), (2, 1))
+    self.assertEqual(
+        index.find('Delete', max_distance=2),
+        (-1, text_index.NOT_FOUND_DISTANCE),
+    )
+
+  def test_empty(self):
+    index = text_index.UIElementTextIndex([], case_sensitive=True)
+
+    self.assertEqual(index.find('Save'), (-1, text_index.NOT_FOUND_DISTANCE))
+
+
+if __name__ == '__main__':
+  absltest.main()
@@ -0,0 +1,78 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks word-by-word and batched `adb_utils.type_text`.
+
+Uses a fake environment whose adb calls take a fixed round trip plus a per
+character injection cost, and reports typing latency per character.
+
+  python -m android_world.env.type_text_benchmark --round_trip_ms=40
+"""
+
+from collections.abc import Sequence
+import time
+
+from absl import app
+from absl import flags
+from android_env.proto import adb_pb2
+from android_world.env import adb_utils
+
+_ROUND_TRIP_MS = flags.DEFINE_float(
+    'round_trip_ms', 40.0, 'Simulated fixed cost of one adb call.'
+)
+_PER_CHAR_MS = flags.DEFINE_float(
+    'per_char_ms', 1.0, 'Simulated cost of injecting one character.'
+)
+_NUM_WORDS = flags.DEFINE_integer(
+    'num_words', 40, 'Words per line of the typed note.'
+)
+_NUM_LINES = flags.DEFINE_integer('num_lines', 3, 'Lines in the typed note.')
+
+
+class _FakeEnv:
+  """Counts adb calls and sleeps for their simulated duration."""
+
+  def __init__(self):
+    self.num_calls = 0
+
+  def execute_adb_call(self, call: adb_pb2.AdbRequest) -> adb_pb2.AdbResponse:
+    self.num_calls += 1
+    num_chars = len(call.input_text.text) if call.HasField('input_text') else 1
+    time.sleep((_ROUND_TRIP_MS.value + num_chars * _PER_CHAR_MS.value) / 1e3)
+    return adb_pb2.AdbResponse(status=adb_pb2.AdbResponse.Status.OK)
+
+
+def _run(name: str, text: str, batched: bool) -> None:
+  env = _FakeEnv()
+  start = time.perf_counter()
+  adb_utils.type_text(text, env, batched=batched)
+  elapsed = time.perf_counter() - start
+  print(
+      f'{name:>12}: {env.num_calls:4d} adb calls, {elapsed:6.2f} s,'
+      f' {elapsed / len(text) * 1e3:6.2f} ms/char'
+  )
+
+
+def main(argv: Sequence[str]) -> None:
+  if len(argv) > 1:
+    raise app.UsageError('Too many command-line arguments.')
+  line = ' '.join(f'word{i}' for i in range(_NUM_WORDS.value))
+  text = '\n'.join([line] * _NUM_LINES.value)
+  print(f'Typing {len(text)} characters.')
+  _run('word-by-word', text, batched=False)
+  _run('batched', text, batched=True)
+
+
+if __name__ == '__main__':
+  app.run(main)
@@ -0,0 +1,209 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Computes what changed between two lists of UI elements.
+
+Elements are matched in passes, each of which only pairs elements the earlier
+passes left unmatched:
+
+  1. Identical elements.
+  2. Same resource id, class and text: the element moved, e.g. in a scrolled
+     list, or its state changed.
+  3. Same resource id, class and bounding box: the text or state changed.
+  4. Same resource id and class, with overlapping bounding boxes: the text
+     changed and the element may also have moved.
+
+Every pass is a single sweep over hash buckets, so a diff takes linear time in
+the number of elements.
+"""
+
+import collections
+from collections.abc import Callable, Hashable, Sequence
+import dataclasses
+from typing import Optional
+
+from android_world.env import representation_utils
+
+UIElement = representation_utils.UIElement
+_Pair = tuple[UIElement, UIElement]
+
+# Minimum intersection over union for pass 4 to pair two elements.
+_MIN_OVERLAP = 0.5
+
+
+@dataclasses.dataclass(frozen=True)
+class UIElementDiff:
+  """Changes from one list of UI elements to another.
+
+  Attributes:
+    added: Elements only in the new list.
+    removed: Elements only in the old list.
+    moved: (old, new) pairs of the same element at a different position.
+    changed_text: (old, new) pairs of the same element whose text, content
+      description or hint text changed.
+    changed_state: (old, new) pairs of the same element whose flags, such as
+      `is_checked` or `is_focused`, changed.
+  """
+
+  added: list[UIElement]
+  removed: list[UIElement]
+  moved: list[_Pair]
+  changed_text: list[_Pair]
+  changed_state: list[_Pair]
+
+  @property
+  def is_empty(self) -> bool:
+    """Whether nothing changed."""
+    return not (
+        self.added
+        or self.removed
+        or self.moved
+        or self.changed_text
+        or self.changed_state
+    )
+
+
+def _identity(element: UIElement) -> Hashable:
+  return (element.resource_id or element.resource_name, element.class_name)
+
+
+def _box(element: UIElement) -> Optional[tuple[float, float, float, float]]:
+  bbox = element.bbox_pixels
+  if bbox is None:
+    return None
+  return (bbox.x_min, bbox.x_max, bbox.y_min, bbox.y_max)
+
+
+def _text(element: UIElement) -> Hashable:
+  return (element.text, element.content_description, element.hint_text)
+
+
+def _state(element: UIElement) -> Hashable:
+  return (
+      element.is_checked,
+      element.is_checkable,
+      element.is_clickable,
+      element.is_editable,
+      element.is_enabled,
+      element.is_focused,
+      element.is_focusable,
+      element.is_long_clickable,
+      element.is_scrollable,
+      element.is_selected,
+      element.is_visible,
+  )
+
+
+def _everything(element: UIElement) -> Hashable:
+  return (_identity(element), _box(element), _text(element), _state(element))
+
+
+def _overlap(a: UIElement, b: UIElement) -> float:
+  """Returns the intersection over union of the pixel bounding boxes."""
+  box_a, box_b = a.bbox_pixels, b.bbox_pixels
+  if box_a is None or box_b is None:
+    return 0.0
+  width = min(box_a.x_max, box_b.x_max) - max(box_a.x_min, box_b.x_min)
+  height = min(box_a.y_max, box_b.y_max) - max(box_a.y_min, box_b.y_min)
+  if width <= 0 or height <= 0:
+    return 0.0
+  intersection = width * height
+  return intersection / (box_a.area + box_b.area - intersection)
+
+
+def _match(
+    old: list[UIElement],
+    new: list[UIElement],
+    key: Callable[[UIElement], Hashable],
+    accept: Optional[Callable[[UIElement, UIElement], bool]] = None,
+) -> tuple[list[_Pair], list[UIElement], list[UIElement]]:
+  """Pairs elements with equal keys, in order.
+
+  Each new element is only compared with the first unmatched old element with
+  the same key, which keeps matching linear.
+
+  Args:
+    old: Unmatched old elements.
+    new: Unmatched new elements.
+    key: Elements can only be paired if their keys are equal.
+    accept: Optional further condition for pairing two elements.
+
+  Returns:
+    The (old, new) pairs, and the old and new elements left unmatched, each in
+    their original order.
+  """
+  buckets = collections.defaultdict(collections.deque)
+  for index, element in enumerate(old):
+    buckets[key(element)].append(index)
+  pairs = []
+  matched_old = set()
+  unmatched_new = []
+  for element in new:
+    bucket = buckets.get(key(element))
+    if bucket and (accept is None or accept(old[bucket[0]], element)):
+      index = bucket.popleft()
+      matched_old.add(index)
+      pairs.append((old[index], element))
+    else:
+      unmatched_new.append(element)
+  unmatched_old = [e for i, e in enumerate(old) if i not in matched_old]
+  return pairs, unmatched_old, unmatched_new
+
+
+def diff_ui_elements(
+    old: Sequence[UIElement], new: Sequence[UIElement]
+) -> UIElementDiff:
+  """Returns the changes from `old` to `new`.
+
+  Args:
+    old: UI elements before, e.g. before an action.
+    new: UI elements after.
+
+  Returns:
+    The added, removed, moved and changed elements. An element whose text
+    changed as it moved is in both `moved` and `changed_text`.
+  """
+  moved, changed_text, changed_state = [], [], []
+
+  def classify(pairs: list[_Pair]) -> None:
+    for pair in pairs:
+      if _box(pair[0]) != _box(pair[1]):
+        moved.append(pair)
+      if _text(pair[0]) != _text(pair[1]):
+        changed_text.append(pair)
+      if _state(pair[0]) != _state(pair[1]):
+        changed_state.append(pair)
+
+  _, old_left, new_left = _match(list(old), list(new), _everything)
+  for key in (
+      lambda e: (_identity(e), _text(e)),
+      lambda e: (_identity(e), _box(e)),
+  ):
+    pairs, old_left, new_left = _match(old_left, new_left, key)
+    classify(pairs)
+  pairs, old_left, new_left = _match(
+      old_left,
+      new_left,
+      _identity,
+      accept=lambda a, b: _overlap(a, b) >= _MIN_OVERLAP,
+  )
+  classify(pairs)
+
+  return UIElementDiff(
+      added=new_left,
+      removed=old_left,
+      moved=moved,
+      changed_text=changed_text,
+      changed_state=changed_state,
+  )
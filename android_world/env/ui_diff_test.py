@@ -0,0 +1,131 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+
+from absl.testing import absltest
+from android_world.env import representation_utils
+from android_world.env import ui_diff
+
+
+def _element(
+    text: str,
+    y: int,
+    resource_id: str = 'com.example:id/row',
+    **kwargs,
+) -> representation_utils.UIElement:
+  return representation_utils.UIElement(
+      text=text,
+      class_name='android.widget.TextView',
+      resource_id=resource_id,
+      bbox_pixels=representation_utils.BoundingBox(0, 100, y, y + 50),
+      **kwargs,
+  )
+
+
+class DiffUIElementsTest(absltest.TestCase):
+
+  def test_identical_lists(self):
+    elements = [_element('a', 0), _element('b', 50)]
+
+    diff = ui_diff.diff_ui_elements(elements, list(elements))
+
+    self.assertTrue(diff.is_empty)
+
+  def test_added_and_removed(self):
+    title = _element('Notes', 0, resource_id='com.example:id/title')
+    button = _element('Save', 500, resource_id='com.example:id/save')
+    dialog = _element('Saved', 800, resource_id='com.example:id/toast')
+
+    diff = ui_diff.diff_ui_elements([title, button], [title, dialog])
+
+    self.assertFalse(diff.is_empty)
+    self.assertEqual(diff.added, [dialog])
+    self.assertEqual(diff.removed, [button])
+    self.assertEmpty(diff.moved)
+    self.assertEmpty(diff.changed_text)
+
+  def test_changed_text_in_place(self):
+    old = _element('', 0, resource_id='com.example:id/edit')
+    new = _element('hello', 0, resource_id='com.example:id/edit')
+
+    diff = ui_diff.diff_ui_elements([old], [new])
+
+    self.assertEqual(diff.changed_text, [(old, new)])
+    self.assertEmpty(diff.added)
+    self.assertEmpty(diff.removed)
+    self.assertEmpty(diff.moved)
+
+  def test_changed_state(self):
+    old = _element('Wi-Fi', 0, is_checked=False)
+    new = _element('Wi-Fi', 0, is_checked=True)
+
+    diff = ui_diff.diff_ui_elements([old], [new])
+
+    self.assertEqual(diff.changed_state, [(old, new)])
+    self.assertEmpty(diff.changed_text)
+
+  def test_scrolled_list_moves_rows(self):
+    old = [_element(f'row {i}', 50 * i) for i in range(5)]
+    # Scrolled down by one row.
+    new = [_element(f'row {i}', 50 * (i - 1)) for i in range(1, 6)]
+
+    diff = ui_diff.diff_ui_elements(old, new)
+
+    self.assertEqual(diff.moved, list(zip(old[1:], new[:-1])))
+    self.assertEqual(diff.removed, [old[0]])
+    self.assertEqual(diff.added, [new[-1]])
+    self.assertEmpty(diff.changed_text)
+
+  def test_overlapping_element_with_new_text_is_matched(self):
+    old = _element('Loading', 0, resource_id='com.example:id/status')
+    new = representation_utils.UIElement(
+        text='Done',
+        class_name='android.widget.TextView',
+        resource_id='com.example:id/status',
+        bbox_pixels=representation_utils.BoundingBox(0, 100, 5, 55),
+    )
+
+    diff = ui_diff.diff_ui_elements([old], [new])
+
+    self.assertEqual(diff.changed_text, [(old, new)])
+    self.assertEqual(diff.moved, [(old, new)])
+    self.assertEmpty(diff.added)
+    self.assertEmpty(diff.removed)
+
+  def test_distant_element_with_new_text_is_not_matched(self):
+    old = _element('Loading', 0, resource_id='com.example:id/status')
+    new = _element('Done', 1000, resource_id='com.example:id/status')
+
+    diff = ui_diff.diff_ui_elements([old], [new])
+
+    self.assertEqual(diff.added, [new])
+    self.assertEqual(diff.removed, [old])
+
+  def test_scales_linearly(self):
+    def run(n: int) -> float:
+      old = [_element(f'row {i}', 10 * i) for i in range(n)]
+      new = [_element(f'row {i}', 10 * i + 5) for i in range(n)]
+      start = time.perf_counter()
+      diff = ui_diff.diff_ui_elements(old, new)
+      self.assertLen(diff.moved, n)
+      return time.perf_counter() - start
+
+    run(100)  # Warm up.
+    # Quadratic matching would take ~100x longer for 10x the elements.
+    self.assertLess(run(20000), 50 * run(2000))
+
+
+if __name__ == '__main__':
+  absltest.main()
@@ -0,0 +1,120 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks memory and pickle size of UI element representations.
+
+Builds UI elements the way `forest_to_ui_elements` does, from a synthetic
+forest shaped like a typical app screen, and reports per 1000 elements the
+memory held by a `UIElement` list and by a `UIElementTable`, and their pickled
+and gzipped pickled sizes (as stored in checkpoints).
+
+  python -m android_world.env.ui_element_benchmark --num_elements=1000
+"""
+
+from collections.abc import Sequence
+import gzip
+import pickle
+import time
+import tracemalloc
+from typing import Any, Callable
+
+from absl import app
+from absl import flags
+from android_env.proto.a11y import android_accessibility_forest_pb2
+from android_world.env import representation_utils
+
+_NUM_ELEMENTS = flags.DEFINE_integer(
+    'num_elements', 1000, 'Number of UI elements to build.'
+)
+
+_PACKAGES = ('com.android.systemui', 'com.simplemobiletools.notes.pro')
+_CLASSES = (
+    'android.widget.TextView',
+    'android.widget.ImageButton',
+    'android.widget.FrameLayout',
+    'androidx.recyclerview.widget.RecyclerView',
+)
+
+
+def _make_forest(
+    num_nodes: int,
+) -> android_accessibility_forest_pb2.AndroidAccessibilityForest:
+  forest = android_accessibility_forest_pb2.AndroidAccessibilityForest()
+  tree = forest.windows.add().tree
+  for i in range(num_nodes):
+    node = tree.nodes.add(
+        unique_id=i,
+        text=f'Note {i}' if i % 3 else '',
+        content_description='More options' if i % 7 == 0 else '',
+        class_name=_CLASSES[i % len(_CLASSES)],
+        package_name=_PACKAGES[i % len(_PACKAGES)],
+        view_id_resource_name=f'com.example:id/item_{i % 10}',
+        is_clickable=i % 2 == 0,
+        is_enabled=True,
+        is_focusable=i % 2 == 0,
+        is_visible_to_user=True,
+    )
+    node.bounds_in_screen.left = 0
+    node.bounds_in_screen.right = 1080
+    node.bounds_in_screen.top = 100 * i
+    node.bounds_in_screen.bottom = 100 * i + 96
+  return forest
+
+
+def _measure(build: Callable[[], Any]) -> tuple[Any, int]:
+  """Returns the built object and the bytes still allocated for it."""
+  tracemalloc.start()
+  obj = build()
+  allocated, _ = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  return obj, allocated
+
+
+def _report(name: str, obj: Any, allocated: int, num: int) -> None:
+  pickled = pickle.dumps(obj)
+  scale = 1000 / num
+  print(
+      f'{name:>16}: {allocated * scale / 1024:8.1f} KiB in memory,'
+      f' {len(pickled) * scale / 1024:8.1f} KiB pickled,'
+      f' {len(gzip.compress(pickled)) * scale / 1024:7.1f} KiB gzipped'
+      ' (per 1000 elements)'
+  )
+
+
+def main(argv: Sequence[str]) -> None:
+  if len(argv) > 1:
+    raise app.UsageError('Too many command-line arguments.')
+  num = _NUM_ELEMENTS.value
+  forest = _make_forest(num)
+
+  elements, allocated = _measure(
+      lambda: representation_utils.forest_to_ui_elements(
+          forest, screen_size=(1080, 2400)
+      )
+  )
+  _report('list[UIElement]', elements, allocated, num)
+
+  table, allocated = _measure(
+      lambda: representation_utils.UIElementTable.from_elements(elements)
+  )
+  _report('UIElementTable', table, allocated, num)
+
+  start = time.perf_counter()
+  assert table.to_elements() == elements
+  elapsed = time.perf_counter() - start
+  print(f'Round trip check: {elapsed * 1e3:.1f} ms for {num} elements.')
+
+
+if __name__ == '__main__':
+  app.run(main)
@@ -0,0 +1,121 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks UIAUTOMATOR observations via /sdcard and via stdout.
+
+Uses a fake environment whose adb calls take a fixed round trip, whose
+`uiautomator dump` takes a fixed time, and whose writes to /sdcard take extra
+time, and reports the latency of `AndroidWorldController.get_ui_elements`.
+
+  python -m android_world.env.uiautomator_dump_benchmark --round_trip_ms=40
+"""
+
+from collections.abc import Sequence
+import time
+
+from absl import app
+from absl import flags
+from android_env.proto import adb_pb2
+from android_world.env import android_world_controller
+
+_ROUND_TRIP_MS = flags.DEFINE_float(
+    'round_trip_ms', 40.0, 'Simulated fixed cost of one adb call.'
+)
+_DUMP_MS = flags.DEFINE_float(
+    'dump_ms', 300.0, 'Simulated time for uiautomator to capture the UI.'
+)
+_SDCARD_WRITE_MS = flags.DEFINE_float(
+    'sdcard_write_ms', 15.0, 'Simulated time to write the dump to /sdcard.'
+)
+_NUM_ROWS = flags.DEFINE_integer(
+    'num_rows', 200, 'List rows in the dumped hierarchy.'
+)
+_NUM_OBSERVATIONS = flags.DEFINE_integer(
+    'num_observations', 20, 'Observations per measurement.'
+)
+
+
+def _make_xml_dump(num_rows: int) -> str:
+  rows = ''.join(
+      f'<node index="{i}" text="note_{i}.md" class="android.widget.TextView"'
+      ' package="net.gsantner.markor" clickable="true" enabled="true"'
+      f' bounds="[0,{100 * i}][1080,{100 * i + 96}]" />'
+      for i in range(num_rows)
+  )
+  return (
+      "<?xml version='1.0' encoding='UTF-8' standalone='yes' ?>"
+      f'<hierarchy rotation="0">{rows}</hierarchy>'
+  )
+
+
+class _FakeEnv:
+  """Answers uiautomator adb calls after simulated delays."""
+
+  def __init__(self, xml_dump: str, supports_stdout: bool):
+    self._xml_dump = xml_dump.encode()
+    self._supports_stdout = supports_stdout
+    self.num_calls = 0
+
+  def execute_adb_call(self, call: adb_pb2.AdbRequest) -> adb_pb2.AdbResponse:
+    self.num_calls += 1
+    command = ' '.join(call.generic.args)
+    delay_ms = _ROUND_TRIP_MS.value
+    output = b''
+    if command.endswith('dump /dev/tty'):
+      if self._supports_stdout:
+        delay_ms += _DUMP_MS.value
+        output = self._xml_dump + b'UI hierchary dumped to: /dev/tty\n'
+      else:
+        output = b'ERROR: null root node returned by UiTestAutomationBridge.\n'
+    elif command.endswith('dump /sdcard/window_dump.xml'):
+      delay_ms += _DUMP_MS.value + _SDCARD_WRITE_MS.value
+    elif command.endswith('cat /sdcard/window_dump.xml'):
+      output = self._xml_dump
+    time.sleep(delay_ms / 1e3)
+    response = adb_pb2.AdbResponse(status=adb_pb2.AdbResponse.Status.OK)
+    response.generic.output = output
+    return response
+
+
+def _run(name: str, supports_stdout: bool, xml_dump: str) -> float:
+  """Returns the mean latency of an observation, in milliseconds."""
+  env = _FakeEnv(xml_dump, supports_stdout)
+  controller = android_world_controller.AndroidWorldController(
+      env, a11y_method=android_world_controller.A11yMethod.UIAUTOMATOR
+  )
+  controller.get_ui_elements()  # Detects whether stdout dumps work.
+  env.num_calls = 0
+  start = time.perf_counter()
+  for _ in range(_NUM_OBSERVATIONS.value):
+    elements = controller.get_ui_elements()
+  elapsed_ms = (time.perf_counter() - start) / _NUM_OBSERVATIONS.value * 1e3
+  assert len(elements) == _NUM_ROWS.value
+  print(
+      f'{name:>16}: {elapsed_ms:7.1f} ms per observation,'
+      f' {env.num_calls / _NUM_OBSERVATIONS.value:.0f} adb calls'
+  )
+  return elapsed_ms
+
+
+def main(argv: Sequence[str]) -> None:
+  if len(argv) > 1:
+    raise app.UsageError('Too many command-line arguments.')
+  xml_dump = _make_xml_dump(_NUM_ROWS.value)
+  via_sdcard = _run('via /sdcard', supports_stdout=False, xml_dump=xml_dump)
+  via_stdout = _run('via stdout', supports_stdout=True, xml_dump=xml_dump)
+  print(f'Improvement: {(1 - via_stdout / via_sdcard) * 100:.0f}%')
+
+
+if __name__ == '__main__':
+  app.run(main)
@@ -0,0 +1,104 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks per-episode metrics processing over a synthetic suite run.
+
+Mimics `suite_utils._run_task_suite`, which processes all episode metadata
+after every episode, with `process_episodes` and with `EpisodeAggregator`.
+
+  python -m android_world.process_episodes_benchmark --num_episodes=10000
+"""
+
+from collections.abc import Sequence
+import random
+import time
+from typing import Any, Callable
+
+from absl import app
+from absl import flags
+from android_world import constants
+from android_world import suite_utils
+import numpy as np
+import pandas as pd
+
+_NUM_EPISODES = flags.DEFINE_integer(
+    'num_episodes', 10000, 'Number of synthetic episodes.'
+)
+_REPORT_EVERY = flags.DEFINE_integer(
+    'report_every', 2000, 'Print cumulative timings every this many episodes.'
+)
+
+
+def _make_episodes(n: int) -> list[dict[str, Any]]:
+  """Creates synthetic episode metadata over the real task templates."""
+  rng = random.Random(0)
+  # pylint: disable-next=protected-access
+  templates = list(suite_utils._extract_task_metadata().index)
+  episodes = []
+  for i in range(n):
+    failed = rng.random() < 0.05
+    episodes.append({
+        constants.EpisodeConstants.GOAL: f'Goal {i}',
+        constants.EpisodeConstants.TASK_TEMPLATE: rng.choice(templates),
+        constants.EpisodeConstants.INSTANCE_ID: i,
+        constants.EpisodeConstants.IS_SUCCESSFUL: (
+            np.nan if failed else float(rng.random() < 0.4)
+        ),
+        constants.EpisodeConstants.EPISODE_LENGTH: (
+            np.nan if failed else rng.randint(1, 30)
+        ),
+        constants.EpisodeConstants.RUN_TIME: rng.uniform(10, 300),
+        constants.EpisodeConstants.EXCEPTION_INFO: (
+            'Traceback' if failed else None
+        ),
+        constants.EpisodeConstants.AUX_DATA: None,
+    })
+  return episodes
+
+
+def _run(
+    name: str,
+    process_episodes_fn: Callable[..., pd.DataFrame],
+    episodes: list[dict[str, Any]],
+) -> pd.DataFrame:
+  """Processes episodes one at a time and prints cumulative timings."""
+  metadata = []
+  start = time.perf_counter()
+  result = None
+  for i, episode in enumerate(episodes, start=1):
+    metadata.append(episode)
+    result = process_episodes_fn(metadata, print_summary=False)
+    if i % _REPORT_EVERY.value == 0 or i == len(episodes):
+      elapsed = time.perf_counter() - start
+      print(
+          f'{name:>18}: {i:6d} episodes, {elapsed:8.2f} s total,'
+          f' {elapsed / i * 1e3:7.2f} ms/episode'
+      )
+  return result
+
+
+def main(argv: Sequence[str]) -> None:
+  if len(argv) > 1:
+    raise app.UsageError('Too many command-line arguments.')
+  episodes = _make_episodes(_NUM_EPISODES.value)
+  aggregated = _run(
+      'EpisodeAggregator', suite_utils.EpisodeAggregator(), episodes
+  )
+  baseline = _run('process_episodes', suite_utils.process_episodes, episodes)
+  pd.testing.assert_frame_equal(aggregated, baseline)
+  print('Results are identical.')
+
+
+if __name__ == '__main__':
+  app.run(main)
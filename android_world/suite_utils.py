@@ -15,24 +15,31 @@
 """Utilities for evaluating automation agents."""
 
 import collections
+import collections.abc
+from concurrent import futures
+import contextlib
+import dataclasses
 import datetime
 import hashlib
 import logging
 import os
 import random
+import threading
 import time
 import traceback
-from typing import Any, Callable, Type, TypeVar
+from typing import Any, Callable, Iterable, Iterator, Sequence, Type, TypeVar
 
 from android_env import env_interface
 from android_world import checkpointer as checkpointer_lib
 from android_world import constants
 from android_world import episode_runner
+from android_world import task_scheduler
 from android_world.agents import base_agent
 from android_world.env import adb_utils
 from android_world.env import interface
 from android_world.task_evals import task_eval
 from android_world.task_evals.miniwob import miniwob_base
+from android_world.utils import app_snapshot
 from fuzzywuzzy import process
 import numpy as np
 import pandas as pd
@@ -41,6 +48,16 @@ import pandas as pd
 _FIXED_SEED = 123
 _TASK_TEMPLATE_COLUMN = 'task_template'
 _TASK_PROMPT_COLUMN = 'task_prompt'
+# Columns of the per-template results table from `process_episodes`.
+_RESULT_COLUMNS = [
+    'num_complete_trials',
+    'mean_success_rate',
+    'mean_episode_length',
+    'total_runtime_s',
+    'num_fail_trials',
+]
+# Rough wall time of one agent step, used to turn step counts into runtimes.
+_DEFAULT_SECONDS_PER_STEP = 15.0
 TaskEvalType = TypeVar('TaskEvalType', bound=task_eval.TaskEval)
 
 
@@ -245,8 +262,11 @@ def _run_task(
     task.initialize_task(env)
     _log_and_print('Running task %s with goal "%s"', task.name, task.goal)
     interaction_results = run_episode(task)
+    # Validation may close apps, which would hide that the episode ran them.
+    app_snapshot.mark_touched_apps_dirty(env.controller)
     task_successful = task.is_successful(env)
   except Exception as e:  # pylint: disable=broad-exception-caught
+    app_snapshot.mark_all_dirty(env.controller)
     _log_and_print('%s\nSKIPPING %s.', '~' * 80, task.name)
     logging.exception(
         'Logging exception and skipping task. Will keep running. Task: %s: %s',
@@ -339,27 +359,19 @@ def _run_task_suite(
     return_full_episode_data: Whether to return full episode data instead of
       just metadata.
     process_episodes_fn: The function to process episode data. Usually to
-      compute metrics. Deafaults to process_episodes from this file.
+      compute metrics. Defaults to an `EpisodeAggregator`, which computes
+      the same tables as `process_episodes` incrementally.
     check_episode_fn: The function to check episode data.
 
   Returns:
     Metadata for each episode, including the scripted reward.
   """
-  metadata_fields = [
-      constants.EpisodeConstants.GOAL,
-      constants.EpisodeConstants.TASK_TEMPLATE,
-      constants.EpisodeConstants.INSTANCE_ID,
-      constants.EpisodeConstants.IS_SUCCESSFUL,
-      constants.EpisodeConstants.EPISODE_LENGTH,
-      constants.EpisodeConstants.RUN_TIME,
-      constants.EpisodeConstants.EXCEPTION_INFO,
-      constants.EpisodeConstants.AUX_DATA,
-  ]
+  metadata_fields = list(checkpointer_lib.METADATA_FIELDS)
   completed_tasks, failed_tasks = _get_task_info(
       checkpointer.load(fields=metadata_fields)
   )
   if process_episodes_fn is None:
-    process_episodes_fn = process_episodes
+    process_episodes_fn = EpisodeAggregator()
 
   if (completed_tasks or failed_tasks) and return_full_episode_data:
     raise ValueError(
@@ -428,6 +440,7 @@ def run(
     return_full_episode_data: bool = False,
     process_episodes_fn=None,
     check_episode_fn: Callable[[dict[str, Any]], bool] | None = None,
+    skip_redundant_restores: bool = False,
 ) -> list[dict[str, Any]]:
   """Create suite and runs eval suite.
 
@@ -443,13 +456,75 @@ def run(
     return_full_episode_data: Whether to return full episode data instead of
       just metadata.
     process_episodes_fn: The function to process episode data. Usually to
-      compute metrics. Deafaults to process_episodes from this file.
+      compute metrics. Defaults to an `EpisodeAggregator`, which computes
+      the same tables as `process_episodes` incrementally.
     check_episode_fn: The function to check episode data.
+    skip_redundant_restores: Whether to skip app snapshot restores that cannot
+      change anything, because no task or episode touched the app since its
+      last restore. This relies on everything that writes app data marking
+      the app dirty; see `app_snapshot.track_app_state`. If False, apps are
+      restored on every task initialization and tear down.
 
   Returns:
     Step-by-step data from each episode.
   """
 
+  run_episode = _make_run_episode(agent, demo_mode)
+
+  if demo_mode:
+    adb_utils.send_android_intent(
+        'broadcast',
+        'com.example.ACTION_UPDATE_SCOREBOARD',
+        agent.env.controller,
+        extras={'player_name': agent.name, 'scoreboard_value': '00/00'},
+    )
+
+  try:
+    with _track_app_state([agent.env], skip_redundant_restores):
+      results = _run_task_suite(
+          suite,
+          run_episode,
+          agent.env,
+          checkpointer=checkpointer,
+          demo_mode=demo_mode,
+          agent_name=agent.name,
+          return_full_episode_data=return_full_episode_data,
+          process_episodes_fn=process_episodes_fn,
+          check_episode_fn=check_episode_fn,
+      )
+  finally:
+    # Make sure episodes saved by asynchronous checkpointers are on disk.
+    checkpointer.flush()
+
+  return results
+
+
+@contextlib.contextmanager
+def _track_app_state(
+    envs: Sequence[interface.AsyncEnv], enabled: bool
+) -> Iterator[None]:
+  """Skips redundant app snapshot restores in `envs` and reports them."""
+  if not enabled:
+    yield
+    return
+  with contextlib.ExitStack() as stack:
+    stats = [
+        stack.enter_context(app_snapshot.track_app_state(env.controller))
+        for env in envs
+    ]
+    yield
+  _log_and_print(
+      'App snapshot restores: %d run, %d skipped as redundant.',
+      sum(s.restores for s in stats),
+      sum(s.restores_skipped for s in stats),
+  )
+
+
+def _make_run_episode(
+    agent: base_agent.EnvironmentInteractingAgent, demo_mode: bool = False
+) -> Callable[[task_eval.TaskEval], episode_runner.EpisodeResult]:
+  """Returns a function that runs `agent` on a task's goal."""
+
   def run_episode(task: task_eval.TaskEval) -> episode_runner.EpisodeResult:
     if demo_mode:
       _display_goal(agent.env, task)
@@ -465,27 +540,227 @@ def run(
         ),
     )
 
-  if demo_mode:
-    adb_utils.send_android_intent(
-        'broadcast',
-        'com.example.ACTION_UPDATE_SCOREBOARD',
-        agent.env.controller,
-        extras={'player_name': agent.name, 'scoreboard_value': '00/00'},
+  return run_episode
+
+
+def _estimate_task_runtimes(
+    suite: Suite,
+    episodes: list[dict[str, Any]],
+    seconds_per_step: float = _DEFAULT_SECONDS_PER_STEP,
+) -> dict[str, float]:
+  """Estimates the expected runtime of each task template in a suite.
+
+  The estimate is, in order of preference: the mean `RUN_TIME` of previously
+  completed episodes of the template, `optimal_steps` from task_metadata.json
+  times `seconds_per_step`, or the step budget times `seconds_per_step`.
+
+  Args:
+    suite: The suite to estimate runtimes for.
+    episodes: Previously run episodes, e.g. loaded from a checkpoint.
+    seconds_per_step: Expected wall time of a single agent step.
+
+  Returns:
+    A mapping from task template name to expected runtime in seconds.
+  """
+  past_run_times = collections.defaultdict(list)
+  for episode in episodes:
+    run_time = episode.get(constants.EpisodeConstants.RUN_TIME)
+    if (
+        episode.get(constants.EpisodeConstants.EXCEPTION_INFO) is None
+        and run_time is not None
+        and not np.isnan(run_time)
+    ):
+      past_run_times[episode[constants.EpisodeConstants.TASK_TEMPLATE]].append(
+          run_time
+      )
+  optimal_steps = _extract_task_metadata()['optimal_steps'].to_dict()
+
+  estimates = {}
+  for name, instances in suite.items():
+    if not instances:
+      continue
+    template = instances[0].name
+    if past_run_times.get(template):
+      estimates[name] = float(np.mean(past_run_times[template]))
+      continue
+    try:
+      n_steps = float(optimal_steps[template])
+    except (KeyError, TypeError, ValueError):
+      n_steps = _allocate_step_budget(instances[0].complexity)
+    estimates[name] = n_steps * seconds_per_step
+  return estimates
+
+
+def _run_task_suite_parallel(
+    suite: Suite,
+    run_episodes: Sequence[
+        Callable[[task_eval.TaskEval], episode_runner.EpisodeResult]
+    ],
+    envs: Sequence[interface.AsyncEnv],
+    checkpointer: checkpointer_lib.Checkpointer = checkpointer_lib.NullCheckpointer(),
+    agent_name: str = '',
+    return_full_episode_data: bool = False,
+    process_episodes_fn=None,
+    check_episode_fn: Callable[[dict[str, Any]], bool] | None = None,
+) -> list[dict[str, Any]]:
+  """Runs e2e systems on a suite, one worker per environment.
+
+  Task instances are distributed across workers by a work-stealing scheduler,
+  longest expected runtime first. Results are checkpointed and processed as
+  each episode finishes, and resuming uses the same instance names as
+  `_run_task_suite`.
+
+  Args:
+    suite: The suite to run it on.
+    run_episodes: One e2e system per environment; `run_episodes[i]` must act
+      on `envs[i]`.
+    envs: The environments the e2e systems run on.
+    checkpointer: See docstring from `run`.
+    agent_name: The name of the agent.
+    return_full_episode_data: Whether to return full episode data instead of
+      just metadata.
+    process_episodes_fn: The function to process episode data. Usually to
+      compute metrics. Defaults to an `EpisodeAggregator`, which computes
+      the same tables as `process_episodes` incrementally.
+    check_episode_fn: The function to check episode data.
+
+  Returns:
+    Metadata for each episode, in suite order.
+
+  Raises:
+    ValueError: If `run_episodes` and `envs` differ in length or are empty.
+  """
+  if len(run_episodes) != len(envs) or not envs:
+    raise ValueError(
+        'Expected one run_episode per environment, got'
+        f' {len(run_episodes)} run_episodes and {len(envs)} environments.'
     )
+  metadata_fields = list(checkpointer_lib.METADATA_FIELDS)
+  loaded_episodes = checkpointer.load(fields=metadata_fields)
+  completed_tasks, failed_tasks = _get_task_info(loaded_episodes)
+  if process_episodes_fn is None:
+    process_episodes_fn = EpisodeAggregator()
+
+  if (completed_tasks or failed_tasks) and return_full_episode_data:
+    raise ValueError(
+        'Cannot return full episode data when resuming from a checkpoint.'
+    )
+
+  order = {}
+  episodes_metadata: list[dict[str, Any]] = []
+  pending = []
+  runtimes = _estimate_task_runtimes(suite, loaded_episodes)
+  for name, instances in suite.items():
+    for i, instance in enumerate(instances):
+      instance_name = (
+          instance.name + checkpointer_lib.INSTANCE_SEPARATOR + str(i)
+      )
+      order[instance_name] = len(order)
+      # Transferring from old checkpoint.
+      episodes_metadata.extend(completed_tasks.get(instance_name, []))
+      episodes_metadata.extend(failed_tasks.get(instance_name, []))
+      if instance_name in completed_tasks and instance_name not in failed_tasks:
+        _log_and_print('Skipping already processed task %s', instance_name)
+        continue
+      pending.append(((instance_name, i, instance), runtimes.get(name, 0.0)))
 
-  results = _run_task_suite(
-      suite,
-      run_episode,
-      agent.env,
-      checkpointer=checkpointer,
-      demo_mode=demo_mode,
-      agent_name=agent.name,
-      return_full_episode_data=return_full_episode_data,
-      process_episodes_fn=process_episodes_fn,
-      check_episode_fn=check_episode_fn,
+  scheduler = task_scheduler.WorkStealingScheduler(pending, len(envs))
+  _log_and_print(
+      'Running %d task instances on %d environments.', len(pending), len(envs)
   )
+  lock = threading.Lock()
+  full_episode_data = []
 
-  return results
+  def worker(worker_id: int) -> None:
+    while (work := scheduler.next(worker_id)) is not None:
+      instance_name, i, instance = work
+      _log_and_print('[worker %d] Running task %s', worker_id, instance_name)
+      episode = _run_task(
+          instance, run_episodes[worker_id], envs[worker_id], demo_mode=False
+      )
+      if (
+          episode.get(constants.EpisodeConstants.EXCEPTION_INFO) is None
+          and check_episode_fn is not None
+      ):
+        if not check_episode_fn(episode):
+          continue
+      episode[constants.EpisodeConstants.AGENT_NAME] = agent_name
+      episode[constants.EpisodeConstants.INSTANCE_ID] = i
+      with lock:
+        checkpointer.save_episodes([episode], instance_name)
+        if return_full_episode_data:
+          full_episode_data.append(episode)
+        episodes_metadata.append({k: episode[k] for k in metadata_fields})
+        process_episodes_fn(episodes_metadata, print_summary=True)
+
+  with futures.ThreadPoolExecutor(max_workers=len(envs)) as executor:
+    for future in [executor.submit(worker, i) for i in range(len(envs))]:
+      future.result()
+  logging.info('Work-stealing scheduler stole %d tasks.', scheduler.num_steals)
+
+  def sort_key(episode: dict[str, Any]) -> int:
+    return order.get(
+        episode[constants.EpisodeConstants.TASK_TEMPLATE]
+        + checkpointer_lib.INSTANCE_SEPARATOR
+        + str(episode[constants.EpisodeConstants.INSTANCE_ID]),
+        len(order),
+    )
+
+  if return_full_episode_data:
+    return sorted(full_episode_data, key=sort_key)
+  return sorted(episodes_metadata, key=sort_key)
+
+
+def run_parallel(
+    suite: Suite,
+    agents: Sequence[base_agent.EnvironmentInteractingAgent],
+    checkpointer: checkpointer_lib.Checkpointer = checkpointer_lib.NullCheckpointer(),
+    return_full_episode_data: bool = False,
+    process_episodes_fn=None,
+    check_episode_fn: Callable[[dict[str, Any]], bool] | None = None,
+    skip_redundant_restores: bool = False,
+) -> list[dict[str, Any]]:
+  """Runs an eval suite across several environments in parallel.
+
+  Each agent must interact with its own environment, e.g. one created per
+  emulator with `env_launcher.load_and_setup_envs`. Demo mode is not
+  supported.
+
+  Args:
+    suite: The suite of tasks to run on.
+    agents: Agents that interact on distinct environments.
+    checkpointer: See docstring from `run`.
+    return_full_episode_data: Whether to return full episode data instead of
+      just metadata.
+    process_episodes_fn: The function to process episode data. Usually to
+      compute metrics. Defaults to an `EpisodeAggregator`, which computes
+      the same tables as `process_episodes` incrementally.
+    check_episode_fn: The function to check episode data.
+    skip_redundant_restores: See docstring from `run`.
+
+  Returns:
+    Step-by-step data from each episode, in suite order.
+
+  Raises:
+    ValueError: If two agents share an environment.
+  """
+  envs = [agent.env for agent in agents]
+  if len({id(env) for env in envs}) != len(envs):
+    raise ValueError('Each agent must have its own environment.')
+  try:
+    with _track_app_state(envs, skip_redundant_restores):
+      return _run_task_suite_parallel(
+          suite,
+          [_make_run_episode(agent) for agent in agents],
+          envs,
+          checkpointer=checkpointer,
+          agent_name=agents[0].name if agents else '',
+          return_full_episode_data=return_full_episode_data,
+          process_episodes_fn=process_episodes_fn,
+          check_episode_fn=check_episode_fn,
+      )
+  finally:
+    checkpointer.flush()
 
 
 def _allocate_step_budget(task_complexity: float) -> int:
@@ -620,7 +895,7 @@ def _print_results_by_tag(result_df: pd.DataFrame) -> None:
 
 
 def process_episodes(
-    episodes: list[dict[str, Any]], print_summary: bool = False
+    episodes: Iterable[dict[str, Any]], print_summary: bool = False
 ) -> pd.DataFrame:
   """Processes task suite results; i.e. the output from `run_task_suite`.
 
@@ -662,12 +937,19 @@ def process_episodes(
   # | ==========Average========== |          2 |                   0.75 |
 
   Args:
-    episodes: Results from running `run_task_suite`.
+    episodes: Results from running `run_task_suite`. May also be an iterator,
+      e.g. `checkpointer.iter_episodes()`, in which case episodes are
+      aggregated one at a time in constant memory.
     print_summary: Whether to print the dataframe with a summary row.
 
   Returns:
     A dataframe aggregating results of run.
   """
+  if not isinstance(episodes, collections.abc.Sequence):
+    aggregator = EpisodeAggregator()
+    for episode in episodes:
+      aggregator.add(episode)
+    return aggregator.result(print_summary)
 
   df = pd.DataFrame(list(episodes))
 
@@ -689,19 +971,34 @@ def process_episodes(
       ],
   })
   result_df = result_df.sort_index()
-  result_df.columns = [
-      'num_complete_trials',
-      'mean_success_rate',
-      'mean_episode_length',
-      'total_runtime_s',
-      'num_fail_trials',
-  ]
+  result_df.columns = _RESULT_COLUMNS
+  return _tag_and_print_results(
+      result_df, _extract_task_metadata(), print_summary
+  )
+
+
+def _tag_and_print_results(
+    result_df: pd.DataFrame,
+    metadata_df: pd.DataFrame,
+    print_summary: bool = False,
+) -> pd.DataFrame:
+  """Merges per-template results with task metadata and optionally prints.
+
+  Args:
+    result_df: Per-template results indexed by task template, with
+      `_RESULT_COLUMNS` as columns.
+    metadata_df: Task metadata from `_extract_task_metadata`.
+    print_summary: Whether to print the dataframe with a summary row.
+
+  Returns:
+    The results merged with the difficulty, optimal steps and tags of each
+    task template.
+  """
   result_df['total_runtime_s'] = result_df['total_runtime_s'].map(
       lambda x: float('{:.1f}'.format(x))
   )
 
-  # Extract metadata and merge with the results table.
-  metadata_df = _extract_task_metadata()
+  # Merge metadata with the results table.
   tagged_result_df = result_df.merge(
       metadata_df, on=[_TASK_TEMPLATE_COLUMN], how='left'
   )
@@ -725,3 +1022,123 @@ def process_episodes(
     _log_and_print('\n\n%s', tags_df)
 
   return tagged_result_df
+
+
+@dataclasses.dataclass
+class _TemplateStats:
+  """Running statistics for the episodes of one task template."""
+
+  num_successful_known: int = 0
+  success_sum: float = 0.0
+  num_length_known: int = 0
+  length_sum: float = 0.0
+  runtime_sum: float = 0.0
+  num_failed: int = 0
+
+
+class EpisodeAggregator:
+  """Incrementally computes the tables of `process_episodes`.
+
+  `process_episodes` rebuilds a dataframe from every episode and reloads task
+  metadata on each call, so calling it after every episode is quadratic in
+  the suite size. This aggregator keeps running sums per task template and
+  loads task metadata once; adding an episode is O(1) and producing the
+  tables only depends on the number of task templates.
+
+  An instance can be passed as `process_episodes_fn`: each call only consumes
+  the episodes appended to the list since the previous call.
+  """
+
+  def __init__(self, metadata_df: pd.DataFrame | None = None):
+    """Initializes the aggregator.
+
+    Args:
+      metadata_df: Task metadata in the format of `_extract_task_metadata`.
+        Loaded from task_metadata.json if not provided.
+    """
+    self._metadata_df = (
+        _extract_task_metadata() if metadata_df is None else metadata_df
+    )
+    self._stats: dict[str, _TemplateStats] = {}
+    self._episodes: list[dict[str, Any]] | None = None
+    self._num_consumed = 0
+
+  def add(self, episode: dict[str, Any]) -> None:
+    """Adds a single episode to the running statistics."""
+    template = episode.get(constants.EpisodeConstants.TASK_TEMPLATE)
+    if pd.isnull(template):
+      return
+    stats = self._stats.setdefault(template, _TemplateStats())
+    success = episode.get(constants.EpisodeConstants.IS_SUCCESSFUL)
+    if not pd.isnull(success):
+      stats.num_successful_known += 1
+      stats.success_sum += float(success)
+    length = episode.get(constants.EpisodeConstants.EPISODE_LENGTH)
+    if not pd.isnull(length):
+      stats.num_length_known += 1
+      stats.length_sum += float(length)
+    run_time = episode.get(constants.EpisodeConstants.RUN_TIME)
+    if not pd.isnull(run_time):
+      stats.runtime_sum += float(run_time)
+    if not pd.isnull(episode.get(constants.EpisodeConstants.EXCEPTION_INFO)):
+      stats.num_failed += 1
+
+  def __call__(
+      self, episodes: list[dict[str, Any]], print_summary: bool = False
+  ) -> pd.DataFrame:
+    """Consumes newly appended episodes and returns the aggregated results.
+
+    Args:
+      episodes: All episodes so far. If this is a different list than in the
+        previous call, or it shrank, the statistics are recomputed from it.
+      print_summary: Whether to print the dataframe with a summary row.
+
+    Returns:
+      The same dataframe `process_episodes(episodes)` would return.
+    """
+    if episodes is not self._episodes or len(episodes) < self._num_consumed:
+      self._stats = {}
+      self._episodes = episodes
+      self._num_consumed = 0
+    for episode in episodes[self._num_consumed :]:
+      self.add(episode)
+    self._num_consumed = len(episodes)
+    return self.result(print_summary)
+
+  def result(self, print_summary: bool = False) -> pd.DataFrame:
+    """Returns the aggregated results of all added episodes.
+
+    Args:
+      print_summary: Whether to print the dataframe with a summary row.
+    """
+    templates = sorted(self._stats)
+    rows = []
+    for template in templates:
+      stats = self._stats[template]
+      rows.append([
+          stats.num_successful_known,
+          stats.success_sum / stats.num_successful_known
+          if stats.num_successful_known
+          else np.nan,
+          stats.length_sum / stats.num_length_known
+          if stats.num_length_known
+          else np.nan,
+          stats.runtime_sum,
+          stats.num_failed,
+      ])
+    result_df = pd.DataFrame(
+        rows,
+        index=pd.Index(
+            templates, name=constants.EpisodeConstants.TASK_TEMPLATE
+        ),
+        columns=_RESULT_COLUMNS,
+    ).astype({
+        'num_complete_trials': 'int64',
+        'mean_success_rate': 'float64',
+        'mean_episode_length': 'float64',
+        'total_runtime_s': 'float64',
+        'num_fail_trials': 'int64',
+    })
+    return _tag_and_print_results(
+        result_df, self._metadata_df, print_summary
+    )
@@ -15,11 +15,13 @@
 """Tests for suite utils."""
 
 import copy
+import tempfile
 import time
 from typing import Any
 from unittest import mock
 from absl.testing import absltest
 from absl.testing import parameterized
+from android_env.proto import adb_pb2
 from android_world import checkpointer
 from android_world import constants
 from android_world import episode_runner
@@ -28,9 +30,12 @@ from android_world import suite_utils
 from android_world.agents import base_agent
 from android_world.env import adb_utils
 from android_world.env import interface
+from android_world.task_evals import task_eval
+from android_world.utils import app_snapshot
 from android_world.utils import test_utils
 import dm_env
 import numpy as np
+import pandas as pd
 
 
 class TestCreateSuite(parameterized.TestCase):
@@ -377,6 +382,134 @@ class SuiteUtilsTest(parameterized.TestCase):
       self.assertEqual(result[constants.EpisodeConstants.IS_SUCCESSFUL], True)
       self.assertEqual(result[constants.EpisodeConstants.AGENT_NAME], 'AnAgent')
 
+  @parameterized.parameters(True, False)
+  @mock.patch.object(app_snapshot, 'track_app_state')
+  @mock.patch.object(suite_utils, '_run_task_suite')
+  @mock.patch.object(base_agent, 'EnvironmentInteractingAgent', autospec=True)
+  def test_run_tracks_app_state(
+      self,
+      skip_redundant_restores,
+      mock_agent,
+      mock_run_suite,
+      mock_track_app_state,
+  ):
+    mock_run_suite.return_value = []
+    mock_agent.env = test_utils.FakeAsyncEnv()
+    suite = suite_utils.create_suite(self.testing_registry, tasks=['Task1'])
+
+    suite_utils.run(
+        suite,
+        agent=mock_agent,
+        skip_redundant_restores=skip_redundant_restores,
+    )
+
+    if skip_redundant_restores:
+      mock_track_app_state.assert_called_once_with(mock_agent.env.controller)
+    else:
+      mock_track_app_state.assert_not_called()
+
+  @mock.patch.object(app_snapshot, 'track_app_state')
+  @mock.patch.object(suite_utils, '_run_task_suite')
+  @mock.patch.object(base_agent, 'EnvironmentInteractingAgent', autospec=True)
+  def test_run_does_not_track_app_state_by_default(
+      self, mock_agent, mock_run_suite, mock_track_app_state
+  ):
+    mock_run_suite.return_value = []
+    mock_agent.env = test_utils.FakeAsyncEnv()
+    suite = suite_utils.create_suite(self.testing_registry, tasks=['Task1'])
+
+    suite_utils.run(suite, agent=mock_agent)
+
+    mock_track_app_state.assert_not_called()
+
+  @mock.patch.object(app_snapshot, 'mark_all_dirty')
+  @mock.patch.object(app_snapshot, 'mark_touched_apps_dirty')
+  def test_run_task_marks_touched_apps_dirty_before_validation(
+      self, mock_mark_touched_apps_dirty, mock_mark_all_dirty
+  ):
+    env = test_utils.FakeAsyncEnv()
+    task = test_utils.FakeAdbEval(
+        test_utils.FakeAdbEval.generate_random_params()
+    )
+    calls = []
+    mock_mark_touched_apps_dirty.side_effect = lambda _: calls.append('mark')
+    run_episode = mock.MagicMock(
+        return_value=episode_runner.EpisodeResult(True, {'step_number': [0]})
+    )
+
+    self.enter_context(mock.patch.object(task, 'initialize_task'))
+    self.enter_context(
+        mock.patch.object(
+            task,
+            'is_successful',
+            side_effect=lambda _: calls.append('is_successful') or 1.0,
+        )
+    )
+    self.enter_context(
+        mock.patch.object(
+            task, 'tear_down', side_effect=lambda _: calls.append('tear_down')
+        )
+    )
+
+    suite_utils._run_task(task, run_episode, env, demo_mode=False)
+
+    mock_mark_touched_apps_dirty.assert_called_once_with(env.controller)
+    self.assertEqual(calls, ['mark', 'is_successful', 'tear_down'])
+    mock_mark_all_dirty.assert_not_called()
+
+  @mock.patch.object(app_snapshot, '_restore_incrementally')
+  @mock.patch.object(adb_utils, 'issue_generic_request')
+  def test_consecutive_tasks_skip_restores_of_untouched_app(
+      self, mock_issue_generic_request, mock_restore_incrementally
+  ):
+    env = test_utils.FakeAsyncEnv()
+    tasks = [
+        test_utils.FakeAdbEval(test_utils.FakeAdbEval.generate_random_params())
+        for _ in range(2)
+    ]
+    for task in tasks:
+      task.app_names = ('app',)
+    self.enter_context(
+        mock.patch.object(
+            app_snapshot, '_package_name', return_value='com.example'
+        )
+    )
+    self.enter_context(mock.patch.object(adb_utils, 'close_app'))
+    self.enter_context(mock.patch.object(adb_utils, 'close_recents'))
+    self.enter_context(
+        mock.patch.object(
+            task_eval.TaskEval, 'initialize_device_time', autospec=True
+        )
+    )
+    self.enter_context(
+        mock.patch.object(
+            app_snapshot.file_utils,
+            'check_directory_exists',
+            return_value=True,
+        )
+    )
+    # Only other apps ran during the episodes.
+    mock_issue_generic_request.return_value = adb_pb2.AdbResponse(
+        status=adb_pb2.AdbResponse.Status.OK,
+        generic=adb_pb2.AdbResponse.GenericResponse(
+            output=b'NAME\ninit\ncom.android.systemui\n'
+        ),
+    )
+    mock_restore_incrementally.return_value = app_snapshot.RestoreStats()
+    run_episode = mock.MagicMock(
+        return_value=episode_runner.EpisodeResult(True, {'step_number': [0]})
+    )
+
+    with app_snapshot.track_app_state(env.controller) as stats:
+      for task in tasks:
+        suite_utils._run_task(task, run_episode, env, demo_mode=False)
+
+    # Only the first task restores the app; its tear-down and both restores
+    # of the second task find it clean.
+    mock_restore_incrementally.assert_called_once()
+    self.assertEqual(stats.restores, 1)
+    self.assertEqual(stats.restores_skipped, 3)
+
 
 class RunTaskSuiteTest(absltest.TestCase):
 
@@ -712,5 +845,249 @@ class RunTaskSuiteTest(absltest.TestCase):
     self.assertLen(result2, 1)
 
 
+class RunTaskSuiteParallelTest(absltest.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.suite = suite_utils.Suite(
+        **{
+            'FakeCurrentStateEval': [
+                test_utils.FakeCurrentStateEval(
+                    test_utils.FakeCurrentStateEval.generate_random_params()
+                ),
+                test_utils.FakeCurrentStateEval(
+                    test_utils.FakeCurrentStateEval.generate_random_params()
+                ),
+            ],
+            'FakeAdbEval': [
+                test_utils.FakeAdbEval(
+                    test_utils.FakeAdbEval.generate_random_params()
+                )
+            ],
+        },
+    )
+    self.suite.suite_family = 'android'
+    self.envs = [test_utils.FakeAsyncEnv(), test_utils.FakeAsyncEnv()]
+    self.run_e2es = [mock.MagicMock(), mock.MagicMock()]
+    for run_e2e in self.run_e2es:
+      run_e2e.return_value = episode_runner.EpisodeResult(
+          True, {'step_number': [0]}
+      )
+    self.mock_process_episodes = mock.MagicMock()
+
+  def test_runs_all_instances_in_suite_order(self):
+    mock_checkpointer = mock.create_autospec(
+        checkpointer.Checkpointer, instance=True
+    )
+    mock_checkpointer.load.return_value = []
+
+    result = suite_utils._run_task_suite_parallel(
+        self.suite,
+        self.run_e2es,
+        self.envs,
+        mock_checkpointer,
+        process_episodes_fn=self.mock_process_episodes,
+    )
+
+    self.assertEqual(
+        [(r['task_template'], r['instance_id']) for r in result],
+        [
+            ('FakeCurrentStateEval', 0),
+            ('FakeCurrentStateEval', 1),
+            ('FakeAdbEval', 0),
+        ],
+    )
+    self.assertEqual(
+        sum(run_e2e.call_count for run_e2e in self.run_e2es), 3
+    )
+    mock_checkpointer.save_episodes.assert_has_calls(
+        [
+            mock.call(mock.ANY, 'FakeCurrentStateEval_0'),
+            mock.call(mock.ANY, 'FakeCurrentStateEval_1'),
+            mock.call(mock.ANY, 'FakeAdbEval_0'),
+        ],
+        any_order=True,
+    )
+    self.assertEqual(self.mock_process_episodes.call_count, 3)
+
+  def test_resume_from_checkpoint(self):
+    with tempfile.TemporaryDirectory() as directory:
+      incremental = checkpointer.IncrementalCheckpointer(directory)
+      incremental.save_episodes(
+          [{
+              'instance_id': 1,
+              'is_successful': 1.0,
+              'goal': 'Current state eval',
+              'task_template': 'FakeCurrentStateEval',
+              'episode_length': 1,
+              'run_time': 3.0,
+              'exception_info': None,
+              'aux_data': None,
+          }],
+          'FakeCurrentStateEval_1',
+      )
+
+      result = suite_utils._run_task_suite_parallel(
+          self.suite,
+          self.run_e2es,
+          self.envs,
+          incremental,
+          process_episodes_fn=self.mock_process_episodes,
+      )
+      saved = incremental.load(fields=['task_template', 'instance_id'])
+
+    self.assertEqual(
+        sum(run_e2e.call_count for run_e2e in self.run_e2es), 2
+    )
+    self.assertLen(result, 3)
+    self.assertEqual(result[1]['run_time'], 3.0)
+    self.assertCountEqual(
+        [(e['task_template'], e['instance_id']) for e in saved],
+        [
+            ('FakeCurrentStateEval', 0),
+            ('FakeCurrentStateEval', 1),
+            ('FakeAdbEval', 0),
+        ],
+    )
+
+  def test_mismatched_envs_raises(self):
+    with self.assertRaises(ValueError):
+      suite_utils._run_task_suite_parallel(
+          self.suite, self.run_e2es[:1], self.envs
+      )
+
+  @mock.patch.object(suite_utils, '_run_task_suite_parallel')
+  def test_run_parallel(self, mock_run_suite_parallel):
+    agents = []
+    for env in self.envs:
+      agent = mock.create_autospec(
+          base_agent.EnvironmentInteractingAgent, instance=True
+      )
+      agent.env = env
+      agent.name = 'AnAgent'
+      agents.append(agent)
+
+    suite_utils.run_parallel(self.suite, agents)
+
+    mock_run_suite_parallel.assert_called_once()
+    _, _, envs = mock_run_suite_parallel.call_args.args
+    self.assertEqual(envs, self.envs)
+    self.assertEqual(
+        mock_run_suite_parallel.call_args.kwargs['agent_name'], 'AnAgent'
+    )
+
+  def test_run_parallel_shared_env_raises(self):
+    agent = mock.create_autospec(
+        base_agent.EnvironmentInteractingAgent, instance=True
+    )
+    agent.env = self.envs[0]
+    with self.assertRaises(ValueError):
+      suite_utils.run_parallel(self.suite, [agent, agent])
+
+  def test_estimate_task_runtimes(self):
+    episodes = [
+        {'task_template': 'FakeAdbEval', 'run_time': 2.0},
+        {'task_template': 'FakeAdbEval', 'run_time': 4.0},
+        {
+            'task_template': 'FakeAdbEval',
+            'run_time': 100.0,
+            'exception_info': 'error',
+        },
+    ]
+
+    estimates = suite_utils._estimate_task_runtimes(
+        self.suite, episodes, seconds_per_step=1.0
+    )
+
+    self.assertEqual(estimates['FakeAdbEval'], 3.0)
+    self.assertEqual(
+        estimates['FakeCurrentStateEval'],
+        suite_utils._allocate_step_budget(
+            self.suite['FakeCurrentStateEval'][0].complexity
+        ),
+    )
+
+
+class EpisodeAggregatorTest(absltest.TestCase):
+
+  def _make_episodes(self, n: int) -> list[dict[str, Any]]:
+    templates = ['ContactsAddContact', 'MarkorCreateNote', 'NotInMetadata']
+    episodes = []
+    for i in range(n):
+      failed = i % 5 == 4
+      episodes.append({
+          'task_template': templates[i % len(templates)],
+          'goal': f'goal {i}',
+          'instance_id': i,
+          'is_successful': np.nan if failed else float(i % 2),
+          'episode_length': np.nan if failed else i % 7 + 1,
+          'run_time': 0.37 * i,
+          'exception_info': 'Traceback' if failed else None,
+          'aux_data': None,
+      })
+    return episodes
+
+  def test_matches_process_episodes(self):
+    episodes = self._make_episodes(40)
+    aggregator = suite_utils.EpisodeAggregator()
+
+    for i in range(1, len(episodes) + 1):
+      result = aggregator(episodes[:i])
+
+    pd.testing.assert_frame_equal(
+        result, suite_utils.process_episodes(episodes)
+    )
+
+  def test_consumes_only_new_episodes(self):
+    episodes = self._make_episodes(3)
+    aggregator = suite_utils.EpisodeAggregator()
+    aggregator(episodes)
+
+    episodes.extend(self._make_episodes(6)[3:])
+    with mock.patch.object(
+        aggregator, 'add', wraps=aggregator.add
+    ) as mock_add:
+      result = aggregator(episodes)
+
+    self.assertEqual(mock_add.call_count, 3)
+    pd.testing.assert_frame_equal(
+        result, suite_utils.process_episodes(episodes)
+    )
+
+  def test_loads_task_metadata_once(self):
+    with mock.patch.object(
+        suite_utils,
+        '_extract_task_metadata',
+        wraps=suite_utils._extract_task_metadata,
+    ) as mock_extract:
+      aggregator = suite_utils.EpisodeAggregator()
+      episodes = []
+      for episode in self._make_episodes(5):
+        episodes.append(episode)
+        aggregator(episodes)
+
+    mock_extract.assert_called_once()
+
+  def test_process_episodes_accepts_iterator(self):
+    episodes = self._make_episodes(20)
+
+    result = suite_utils.process_episodes(iter(episodes))
+
+    pd.testing.assert_frame_equal(
+        result, suite_utils.process_episodes(episodes)
+    )
+
+  def test_printed_summary_matches_process_episodes(self):
+    episodes = self._make_episodes(12)
+    with mock.patch.object(suite_utils, '_log_and_print') as mock_print:
+      suite_utils.process_episodes(episodes, print_summary=True)
+      expected = [str(c.args) for c in mock_print.call_args_list]
+      mock_print.reset_mock()
+      suite_utils.EpisodeAggregator()(episodes, print_summary=True)
+      actual = [str(c.args) for c in mock_print.call_args_list]
+
+    self.assertEqual(actual, expected)
+
+
 if __name__ == '__main__':
   absltest.main()
@@ -233,7 +233,7 @@ class SimpleSMSSendSms(task_eval.TaskEval):
 
   def initialize_task(self, env: interface.AsyncEnv) -> None:
     super().initialize_task(env)
-    adb_utils.toggle_airplane_mode("off", env.controller)
+    env.controller.toggle_airplane_mode("off")
     clear_sms_and_threads(env.controller)
     android_time = self.get_android_time(env.controller)
 
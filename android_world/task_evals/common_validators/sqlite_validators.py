@@ -15,6 +15,7 @@
 """Base class for task evaluations interacting with SQLite-based Android apps."""
 
 import abc
+import collections
 import dataclasses
 from typing import Any
 from typing import Optional
@@ -42,32 +43,24 @@ def verify_playlist(
   Returns:
     True if the actual playlist matches the expected criteria, False otherwise.
   """
-  total = sum(
-      1
+  playlist_rows = [
+      actual_item
       for actual_item in device_playlist_rows
       if fuzzy_match_lib.fuzzy_match(
           actual_item.playlist_name, candidate_playlist_name, ignore_case=True
       )
-  )
-
-  if total != len(candidate_files):
+  ]
+  if len(playlist_rows) != len(candidate_files):
     return False
 
-  matched_files = 0
-  for index, expected_file in enumerate(candidate_files):
-    if any(
-        fuzzy_match_lib.fuzzy_match(
-            actual_item.playlist_name, candidate_playlist_name, ignore_case=True
-        )
-        and actual_item.media_file_name == expected_file
-        and (actual_item.order_in_playlist == index)
-        for actual_item in device_playlist_rows
-    ):
-      matched_files += 1
-    else:
-      return False
-
-  return matched_files == len(candidate_files)
+  entries = {
+      (actual_item.media_file_name, actual_item.order_in_playlist)
+      for actual_item in playlist_rows
+  }
+  return all(
+      (expected_file, index) in entries
+      for index, expected_file in enumerate(candidate_files)
+  )
 
 
 def validate_rows_removal_integrity(
@@ -93,26 +86,28 @@ def validate_rows_removal_integrity(
     maintained; False if any specified rows are not removed, if any
     non-specified rows are missing, or if new rows have been added.
   """
+  before_ids = {getattr(row, id_name) for row in before}
   for row_id in ids:
-    if not any(row for row in before if getattr(row, id_name) == row_id):
+    if row_id not in before_ids:
       raise ValueError(f"row ID {row_id} not present in before.")
 
+  # Rows are hashable, so membership checks are constant time.
+  removed_ids = set(ids)
+  before_rows = set(before)
+  after_rows = set(after)
+
   # Validate the removal and intactness of other rows
   for row in before:
     # If the row ID is in the list of removed row IDs
-    if getattr(row, id_name) in ids:
-      if row in after:
+    if getattr(row, id_name) in removed_ids:
+      if row in after_rows:
         return False
-    elif row not in after:
+    elif row not in after_rows:
       # Make sure we didn't remove other rows.
       return False
 
   # Check that no new unexpected rows have been added
-  for row in after:
-    if row not in before:
-      return False
-
-  return True
+  return after_rows <= before_rows
 
 
 def validate_rows_addition_integrity(
@@ -146,25 +141,35 @@ def validate_rows_addition_integrity(
   if not free_form_fields:
     free_form_fields = []
 
+  exact_fields = [f for f in compare_fields if f not in free_form_fields]
+  fuzzy_fields = [f for f in compare_fields if f in free_form_fields]
+
+  def exact_key(row: sqlite_schema_utils.RowType) -> tuple[Any, ...]:
+    return tuple(getattr(row, field) for field in exact_fields)
+
+  # Only rows with the same exact fields are fuzzy matched.
+  after_by_key = collections.defaultdict(list)
+  for row in after:
+    after_by_key[exact_key(row)].append(row)
+
   def db_row_matches_reference(
       reference_row: sqlite_schema_utils.RowType,
       row: sqlite_schema_utils.RowType,
   ) -> bool:
-    for field in compare_fields:
-      reference_value = getattr(reference_row, field)
-      candidate_value = getattr(row, field)
-      # Fuzzy match for text fields.
-      if field in free_form_fields:
-        if not fuzzy_match_lib.fuzzy_match(reference_value, candidate_value):
-          return False
-      else:
-        if reference_value != candidate_value:
-          return False
-    return True
+    # Fuzzy match for text fields.
+    return all(
+        fuzzy_match_lib.fuzzy_match(
+            getattr(reference_row, field), getattr(row, field)
+        )
+        for field in fuzzy_fields
+    )
 
   # Check if the added rows are present in the 'after' state
   for reference_row in reference_rows:
-    if not any(db_row_matches_reference(reference_row, row) for row in after):
+    if not any(
+        db_row_matches_reference(reference_row, row)
+        for row in after_by_key.get(exact_key(reference_row), [])
+    ):
       logging.warning(
           "Expected row %s not found in the 'after' state.", reference_row
       )
@@ -181,8 +186,9 @@ def validate_rows_addition_integrity(
     return False
 
   # Validate that no other rows were altered or removed during the addition
+  after_rows = set(after)
   for row in before:
-    if row not in after:
+    if row not in after_rows:
       logging.warning(
           "row %s from 'before' state missing or altered in the 'after' state.",
           row,
@@ -206,6 +212,16 @@ class SQLiteApp(task_eval.TaskEval, abc.ABC):
   table_name: str
   row_type: Type[sqlite_schema_utils.SQLiteRow]
 
+  def database(
+      self,
+      env: interface.AsyncEnv,
+      timeout_sec: Optional[float] = None,
+  ) -> sqlite_utils.RemoteDatabase:
+    """Returns a handle on the app's database."""
+    return sqlite_utils.RemoteDatabase(
+        self.db_path, env, self.app_name_with_db, timeout_sec
+    )
+
   def list_rows(
       self,
       env: interface.AsyncEnv,
@@ -231,28 +247,24 @@ class SQLiteApp(task_eval.TaskEval, abc.ABC):
       env: interface.AsyncEnv,
       timeout_sec: Optional[float] = None,
   ) -> None:
-    sqlite_utils.insert_rows_to_remote_db(
-        rows,
-        self.db_key,
-        self.table_name,
-        self.db_path,
-        self.app_name_with_db,
-        env,
-        timeout_sec,
-    )
+    with self.database(env, timeout_sec) as database:
+      database.insert_rows(rows, self.db_key, self.table_name)
+      database.commit()
 
   def _clear_db(self, env: interface.AsyncEnv) -> None:
     """Clears the app's SQLite database."""
-    sqlite_utils.delete_all_rows_from_table(
-        self.table_name, self.db_path, env, self.app_name_with_db
-    )
-    try:
-      self.list_rows(env)
-    except ValueError as e:
-      raise RuntimeError(
-          "After clearing the old SQLite database, a new empty database was"
-          " not created."
-      ) from e
+    with self.database(env) as database:
+      database.create_if_missing(self.table_name)
+      database.delete_all_rows(self.table_name)
+      database.commit()
+    # A new handle checks the database on the device, only pulling it again if
+    # it changed since the commit.
+    with self.database(env) as database:
+      if not database.table_exists(self.table_name):
+        raise RuntimeError(
+            "After clearing the old SQLite database, a new empty database was"
+            " not created."
+        )
 
   def initialize_task(self, env: interface.AsyncEnv) -> None:
     """Initializes the task environment."""
@@ -266,6 +278,7 @@ class SQLiteApp(task_eval.TaskEval, abc.ABC):
     """Cleans up after task completion."""
     super().tear_down(env)
     self._clear_db(env)
+    sqlite_utils.log_transfer_counters()
 
 
 class AddMultipleRows(SQLiteApp, abc.ABC):
@@ -328,6 +341,8 @@ class DeleteMultipleRows(SQLiteApp, abc.ABC):
 
   n_rows: int  # Number of rows to be deleted, to be defined in subclasses.
   n_rows_noise: int  # Number of additional rows to add not relevant to goal.
+  # Number of rows to delete that may remain after a successful deletion.
+  _max_undeleted_targets: int = 0
 
   def __init__(self, params: dict[str, Any]):
     super().__init__(params)
@@ -361,6 +376,11 @@ class DeleteMultipleRows(SQLiteApp, abc.ABC):
     """Determine if the row deletion task was successful."""
     super().is_successful(env)
 
+    # Fail without reading every row if too many targets are still there.
+    undeleted = self._undeleted_target_keys(env)
+    if undeleted is not None and len(undeleted) > self._max_undeleted_targets:
+      return 0.0
+
     # Get the state of the database after the deletion attempt
     after = self.list_rows(env)
 
@@ -368,6 +388,33 @@ class DeleteMultipleRows(SQLiteApp, abc.ABC):
     deletion_successful = self.validate_deletion_integrity(self.before, after)
     return 1.0 if deletion_successful else 0.0
 
+  def _undeleted_target_keys(
+      self, env: interface.AsyncEnv
+  ) -> set[Any] | None:
+    """Returns the keys of the rows to delete that are still in the table.
+
+    Only the key column of those rows is read, so this is cheaper than
+    `list_rows`.
+
+    Args:
+      env: The Android environment interface.
+
+    Returns:
+      The keys of the remaining target rows, or None if SQLite cannot filter
+      on the keys, i.e. they are blobs.
+    """
+    keys = [getattr(row, self.db_key) for row in self.rows_to_delete]
+    if any(isinstance(key, (bytes, bytearray, memoryview)) for key in keys):
+      return None
+    with self.database(env) as database:
+      rows = database.select_rows(
+          self.table_name,
+          sqlite_schema_utils.GenericRow,
+          columns=[self.db_key],
+          where_in={self.db_key: keys},
+      )
+    return {row[self.db_key] for row in rows}
+
   @abc.abstractmethod
   def validate_deletion_integrity(
       self,
@@ -380,6 +427,9 @@ class DeleteMultipleRows(SQLiteApp, abc.ABC):
 class DeleteDuplicateRows(DeleteMultipleRows):
   """Abstract class for tasks that involve deleting duplicate rows from a SQLite database."""
 
+  # One of the two duplicates is kept.
+  _max_undeleted_targets = 1
+
   def _validate_candidates(
       self, candidates: list[sqlite_schema_utils.RowType]
   ) -> None:
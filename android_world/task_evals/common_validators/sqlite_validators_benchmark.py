@@ -0,0 +1,210 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks row validation and filtered queries on large generated tables.
+
+Compares the integrity checks against the nested scans they used to do, and
+queries filtered and counted by SQLite against fetching every row and
+filtering in Python.
+
+  python -m android_world.task_evals.common_validators.sqlite_validators_benchmark
+"""
+
+from collections.abc import Callable, Sequence
+import dataclasses
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from typing import Any
+
+from absl import app
+from absl import flags
+from android_world.task_evals.common_validators import sqlite_validators
+from android_world.task_evals.utils import sqlite_schema_utils
+from android_world.task_evals.utils import sqlite_utils
+from android_world.utils import fuzzy_match_lib
+
+_NUM_ROWS = flags.DEFINE_integer('num_rows', 10000, 'Rows per table.')
+_NUM_TARGETS = flags.DEFINE_integer(
+    'num_targets', 10, 'Rows removed, added or selected by id.'
+)
+_SKIP_NESTED = flags.DEFINE_bool(
+    'skip_nested', False, 'Whether to skip the slow nested scans.'
+)
+
+_TABLE_NAME = 'expense'
+_ID = 'expense_id'
+
+
+def _removal_integrity_nested(
+    before: list[sqlite_schema_utils.Expense],
+    after: list[sqlite_schema_utils.Expense],
+    ids: list[int],
+) -> bool:
+  """Checks a removal the way `validate_rows_removal_integrity` used to."""
+  for row_id in ids:
+    if not any(row for row in before if getattr(row, _ID) == row_id):
+      raise ValueError(f'row ID {row_id} not present in before.')
+  for row in before:
+    if getattr(row, _ID) in ids:
+      if row in after:
+        return False
+    elif row not in after:
+      return False
+  return all(row in before for row in after)
+
+
+def _addition_integrity_nested(
+    before: list[sqlite_schema_utils.Expense],
+    after: list[sqlite_schema_utils.Expense],
+    reference_rows: list[sqlite_schema_utils.Expense],
+    compare_fields: list[str],
+    free_form_fields: list[str],
+) -> bool:
+  """Checks an addition the way `validate_rows_addition_integrity` used to."""
+
+  def matches(reference_row, row) -> bool:
+    for field in compare_fields:
+      if field in free_form_fields:
+        if not fuzzy_match_lib.fuzzy_match(
+            getattr(reference_row, field), getattr(row, field)
+        ):
+          return False
+      elif getattr(reference_row, field) != getattr(row, field):
+        return False
+    return True
+
+  for reference_row in reference_rows:
+    if not any(matches(reference_row, row) for row in after):
+      return False
+  if len(after) != len(before) + len(reference_rows):
+    return False
+  return all(row in after for row in before)
+
+
+def _create_table(db_path: str, rows: list[sqlite_schema_utils.Expense]):
+  """Creates a database with an expense table holding `rows`."""
+  columns = ', '.join(
+      f'"{name}" INTEGER PRIMARY KEY' if name == _ID else f'"{name}"'
+      for name in sqlite_schema_utils.column_names(sqlite_schema_utils.Expense)
+  )
+  conn = sqlite3.connect(db_path)
+  with conn:
+    conn.execute(f'CREATE TABLE {_TABLE_NAME} ({columns})')
+    for row in rows:
+      conn.execute(*sqlite_schema_utils.insert_into_db(row, _TABLE_NAME))
+  conn.close()
+
+
+def _generate_rows(num_rows: int) -> list[sqlite_schema_utils.Expense]:
+  rng = random.Random(0)
+  return [
+      sqlite_schema_utils.Expense(
+          name=f'Expense {i}',
+          amount=rng.randrange(100, 100000),
+          category=rng.randrange(1, 12),
+          note=f'Note {rng.randrange(1000)}',
+          created_date=rng.randrange(10**12),
+          modified_date=rng.randrange(10**12),
+          expense_id=i + 1,
+      )
+      for i in range(num_rows)
+  ]
+
+
+def _time(fn: Callable[[], Any]) -> tuple[float, Any]:
+  """Returns the seconds `fn` takes and its result."""
+  start = time.perf_counter()
+  result = fn()
+  return time.perf_counter() - start, result
+
+
+def main(argv: Sequence[str]) -> None:
+  if len(argv) > 1:
+    raise app.UsageError('Too many command-line arguments.')
+  num_rows, num_targets = _NUM_ROWS.value, _NUM_TARGETS.value
+  rows = _generate_rows(num_rows)
+  rng = random.Random(1)
+  ids = rng.sample([row.expense_id for row in rows], num_targets)
+  removed = set(ids)
+  after_removal = [row for row in rows if row.expense_id not in removed]
+  added = [
+      dataclasses.replace(row, expense_id=num_rows + i + 1, name=f'New {i}')
+      for i, row in enumerate(rows[:num_targets])
+  ]
+  compare_fields = ['name', 'amount', 'category', 'note']
+  free_form_fields = ['name', 'note']
+
+  runs = {
+      'removal, hashed': lambda: (
+          sqlite_validators.validate_rows_removal_integrity(
+              rows, after_removal, ids, _ID
+          )
+      ),
+      'addition, hashed': lambda: (
+          sqlite_validators.validate_rows_addition_integrity(
+              rows, rows + added, added, compare_fields, free_form_fields
+          )
+      ),
+  }
+  if not _SKIP_NESTED.value:
+    runs['removal, nested'] = lambda: _removal_integrity_nested(
+        rows, after_removal, ids
+    )
+    runs['addition, nested'] = lambda: _addition_integrity_nested(
+        rows, rows + added, added, compare_fields, free_form_fields
+    )
+
+  with tempfile.TemporaryDirectory() as directory:
+    db_path = os.path.join(directory, 'expenses.db')
+    _create_table(db_path, rows)
+    row_type = sqlite_schema_utils.Expense
+
+    def fetch(query: str, values: tuple[Any, ...]) -> list[Any]:
+      return sqlite_utils.execute_query(query, db_path, row_type, values)
+
+    def count(query: str, values: tuple[Any, ...]) -> int:
+      return sqlite_utils.execute_query(
+          query, db_path, sqlite_schema_utils.GenericRow, values
+      )[0]['count']
+
+    runs['select ids, in Python'] = lambda: [
+        row
+        for row in fetch(*sqlite_schema_utils.select_query(_TABLE_NAME))
+        if row.expense_id in removed
+    ]
+    runs['select ids, in SQLite'] = lambda: fetch(
+        *sqlite_schema_utils.select_query(
+            _TABLE_NAME, where_in={_ID: ids}, order_by=[_ID]
+        )
+    )
+    runs['count, in Python'] = lambda: len(
+        fetch(*sqlite_schema_utils.select_query(_TABLE_NAME))
+    )
+    runs['count, in SQLite'] = lambda: count(
+        *sqlite_schema_utils.count_query(_TABLE_NAME)
+    )
+
+    print(f'{num_rows} rows, {num_targets} targets:')
+    for name, fn in runs.items():
+      seconds, result = _time(fn)
+      if isinstance(result, list):
+        result = f'{len(result)} rows'
+      print(f'  {name:>22}: {seconds * 1e3:10.1f} ms -> {result}')
+
+
+if __name__ == '__main__':
+  app.run(main)
@@ -12,8 +12,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import dataclasses
 import sqlite3
+from typing import Any
+from unittest import mock
+
 from absl.testing import absltest
+from absl.testing import parameterized
 from android_world.task_evals.common_validators import sqlite_validators
 from android_world.task_evals.utils import sqlite_schema_utils
 from android_world.task_evals.utils import sqlite_test_utils
@@ -422,6 +427,144 @@ class TestAddEvent(absltest.TestCase):
         )
     )
 
+  def test_events_added_at_same_time(self):
+    start_ts = datetime_utils._create_unix_ts(
+        year=2023, month=10, day=6, hour=9
+    )
+    end_ts = datetime_utils._create_unix_ts(
+        year=2023, month=10, day=6, hour=10
+    )
+    event1 = sqlite_schema_utils.CalendarEvent(
+        start_ts=start_ts, end_ts=end_ts, title='Coffee', location='Cafe'
+    )
+    event2 = sqlite_schema_utils.CalendarEvent(
+        start_ts=start_ts, end_ts=end_ts, title='Lunch', location='Eatery'
+    )
+    missing_event = sqlite_schema_utils.CalendarEvent(
+        start_ts=start_ts, end_ts=end_ts, title='Dinner', location='Home'
+    )
+
+    initial_state = sqlite_utils.execute_query(
+        'SELECT * FROM events;',
+        self.test_db_path,
+        sqlite_schema_utils.CalendarEvent,
+    )
+    add_event_to_db(self.test_db_path, event1)
+    add_event_to_db(self.test_db_path, event2)
+    post_addition_state = sqlite_utils.execute_query(
+        'SELECT * FROM events;',
+        self.test_db_path,
+        sqlite_schema_utils.CalendarEvent,
+    )
+
+    self.assertTrue(
+        _validate_event_addition_integrity(
+            initial_state, post_addition_state, [event2, event1]
+        )
+    )
+    self.assertFalse(
+        _validate_event_addition_integrity(
+            initial_state, post_addition_state, [event1, missing_event]
+        )
+    )
+
+
+class _DeleteEvents(sqlite_validators.DeleteMultipleRows):
+  """Deletes calendar events."""
+
+  app_names = ()
+  complexity = 1
+  schema = {}
+  db_key = 'id'
+  table_name = 'events'
+  row_type = sqlite_schema_utils.CalendarEvent
+  n_rows = 1
+  n_rows_noise = 1
+
+  def validate_deletion_integrity(self, before, after) -> bool:
+    return sqlite_validators.validate_rows_removal_integrity(
+        before, after, [row.id for row in self.rows_to_delete], self.db_key
+    )
+
+  @classmethod
+  def generate_random_params(cls) -> dict[str, Any]:
+    return {}
+
+
+class _DeleteDuplicateEvents(
+    _DeleteEvents, sqlite_validators.DeleteDuplicateRows
+):
+  """Deletes one of two duplicate calendar events."""
+
+  def validate_deletion_integrity(self, before, after) -> bool:
+    return any(
+        sqlite_validators.validate_rows_removal_integrity(
+            before, after, [row.id], self.db_key
+        )
+        for row in self.rows_to_delete
+    )
+
+
+class DeleteMultipleRowsTest(parameterized.TestCase):
+
+  def _initialized_task(
+      self, task_type: type[_DeleteEvents], n_targets: int
+  ) -> _DeleteEvents:
+    task = task_type({})
+    task.initialized = True
+    task.before = sqlite_test_utils.get_db_rows()[: n_targets + 1]
+    task.rows_to_delete = task.before[1:]
+    return task
+
+  @parameterized.named_parameters(
+      ('target_left', _DeleteEvents, 1, {2}),
+      ('both_duplicates_left', _DeleteDuplicateEvents, 2, {2, 3}),
+  )
+  def test_is_successful_fails_fast_if_targets_remain(
+      self, task_type, n_targets, undeleted
+  ):
+    task = self._initialized_task(task_type, n_targets)
+    self.enter_context(
+        mock.patch.object(
+            task, '_undeleted_target_keys', return_value=undeleted
+        )
+    )
+    mock_list_rows = self.enter_context(mock.patch.object(task, 'list_rows'))
+
+    self.assertEqual(task.is_successful(mock.MagicMock()), 0.0)
+    mock_list_rows.assert_not_called()
+
+  @parameterized.named_parameters(
+      ('targets_gone', _DeleteEvents, 1, set()),
+      ('one_duplicate_left', _DeleteDuplicateEvents, 2, {3}),
+      ('blob_keys', _DeleteEvents, 1, None),
+  )
+  def test_is_successful_checks_every_row(
+      self, task_type, n_targets, undeleted
+  ):
+    task = self._initialized_task(task_type, n_targets)
+    self.enter_context(
+        mock.patch.object(
+            task, '_undeleted_target_keys', return_value=undeleted
+        )
+    )
+    # The last target was deleted.
+    self.enter_context(
+        mock.patch.object(task, 'list_rows', return_value=task.before[:-1])
+    )
+
+    self.assertEqual(task.is_successful(mock.MagicMock()), 1.0)
+
+  def test_undeleted_target_keys_skips_blob_keys(self):
+    task = self._initialized_task(_DeleteEvents, 1)
+    task.rows_to_delete = [
+        dataclasses.replace(task.rows_to_delete[0], id=b'\x00\x01')
+    ]
+    mock_database = self.enter_context(mock.patch.object(task, 'database'))
+
+    self.assertIsNone(task._undeleted_target_keys(mock.MagicMock()))
+    mock_database.assert_not_called()
+
 
 class TestVerifyPlaylist(absltest.TestCase):
 
@@ -26,6 +26,7 @@ from android_world.task_evals.information_retrieval import proto_utils
 from android_world.task_evals.information_retrieval import task_app_utils
 from android_world.task_evals.information_retrieval.proto import task_pb2
 from android_world.task_evals.single.calendar import calendar_utils
+from android_world.task_evals.utils import sqlite_utils
 
 
 class InformationRetrieval(task_eval.TaskEval, abc.ABC):
@@ -127,6 +128,7 @@ class InformationRetrieval(task_eval.TaskEval, abc.ABC):
       activity_app_utils.clear_db(env)
     if self.is_notes_task():
       joplin_app_utils.clear_dbs(env)
+    sqlite_utils.log_transfer_counters()
     super().tear_down(env)
 
 
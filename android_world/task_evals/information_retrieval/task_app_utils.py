@@ -43,13 +43,17 @@ def setup_task_state(
     exclusion_conditions: list[task_pb2.ExclusionCondition],
     env: interface.AsyncEnv,
 ) -> None:
-  clear_task_db(env)
   tasks = []
   for task in relevant_state.tasks_app_tasks:
     tasks.append(create_task_from_proto(task))
   tasks += generate_random_tasks(20, exclusion_conditions)
   random.shuffle(tasks)
-  add_tasks(tasks, env)
+  # Clear and fill the database with a single copy each way.
+  with sqlite_utils.RemoteDatabase(_DB_PATH, env, _APP_NAME) as database:
+    database.create_if_missing(_TASK_TABLE)
+    database.delete_all_rows(_TASK_TABLE)
+    database.insert_rows(tasks, _PRIMARY_KEY, _TASK_TABLE)
+    database.commit()
 
 
 def create_task_from_proto(
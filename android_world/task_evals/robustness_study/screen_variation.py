@@ -17,7 +17,6 @@
 import time
 from typing import Any
 
-from android_world.env import adb_utils
 from android_world.env import interface
 from android_world.task_evals import task_eval
 
@@ -56,13 +55,13 @@ def generate_screen_variation_wrapper(
       super().initialize_task(env)
       # Go back to home screen with a reset.
       env.reset(True)
-      adb_utils.set_screen_size(self.width, self.height, env.controller)
+      env.controller.set_screen_size(self.width, self.height)
       # It has been observed that without this pause, the following orientation
       # change will not work.
       time.sleep(2)
       # Task starts from the home screen and the following orientation change
       # will take effect for the next app opened but expired after closing.
-      adb_utils.change_orientation(self.orientation, env.controller)
+      env.controller.change_orientation(self.orientation)
 
     @property
     def name(self) -> str:
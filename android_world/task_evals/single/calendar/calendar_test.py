@@ -72,6 +72,14 @@ class CalendarEventTestSetup(parameterized.TestCase):
     self.mock_restore_snapshot = self.enter_context(
         mock.patch.object(app_snapshot, "restore_snapshot")
     )
+    # Deletion checks read every row through `list_rows`.
+    self.enter_context(
+        mock.patch.object(
+            sqlite_validators.DeleteMultipleRows,
+            "_undeleted_target_keys",
+            return_value=None,
+        )
+    )
 
   def tearDown(self):
     super().tearDown()
@@ -31,22 +31,22 @@ def clear_calendar_db(
     env: interface.AsyncEnv, timeout_sec: Optional[float] = None
 ) -> None:
   """Removes the calendar database on the device."""
-  sqlite_utils.delete_all_rows_from_table(
-      EVENTS_TABLE, DB_PATH, env, 'simple calendar pro'
-  )
-  try:
-    sqlite_utils.get_rows_from_remote_device(
-        EVENTS_TABLE,
-        DB_PATH,
-        sqlite_schema_utils.CalendarEvent,
-        env,
-        timeout_sec,
-    )
-  except ValueError as e:
-    raise RuntimeError(
-        'After clearing the old SQLite database, a new empty database was'
-        ' not created.'
-    ) from e
+  with sqlite_utils.RemoteDatabase(
+      DB_PATH, env, 'simple calendar pro', timeout_sec
+  ) as database:
+    database.create_if_missing(EVENTS_TABLE)
+    database.delete_all_rows(EVENTS_TABLE)
+    database.commit()
+  # A new handle checks the database on the device, only pulling it again if
+  # it changed since the commit.
+  with sqlite_utils.RemoteDatabase(
+      DB_PATH, env, timeout_sec=timeout_sec
+  ) as database:
+    if not database.table_exists(EVENTS_TABLE):
+      raise RuntimeError(
+          'After clearing the old SQLite database, a new empty database was'
+          ' not created.'
+      )
 
 
 def add_events(
@@ -27,6 +27,7 @@ from android_world.env import interface
 from android_world.task_evals import task_eval
 from android_world.task_evals.common_validators import sqlite_validators
 from android_world.task_evals.utils import sqlite_schema_utils
+from android_world.utils import app_snapshot
 from android_world.utils import file_utils
 
 _DEVICE_FILES = '/data/media/0/Android/data/net.osmand/files'
@@ -183,6 +184,8 @@ def _clear_favorites(env: env_interface.AndroidEnvInterface) -> None:
   """
 
   file_utils.clear_directory(_BACKUP_DIR_PATH, env)
+  # The backup and legacy favorites are in the app's data directory.
+  app_snapshot.mark_path_dirty(_BACKUP_DIR_PATH, env)
 
   for path in [_FAVORITES_PATH, _LEGACY_FAVORITES_PATH]:
     if file_utils.check_file_exists(path, env):
@@ -14,10 +14,12 @@
 
 """Utilities for creating and processing rows in a SQLite database."""
 
+from collections.abc import Iterable, Mapping, Sequence
 import dataclasses
 import datetime
+import json
 import textwrap
-from typing import Any, Callable, ClassVar, Optional, TypeVar
+from typing import Any, Callable, ClassVar, Optional, Type, TypeVar
 import uuid
 from android_world.env import device_constants
 from android_world.utils import datetime_utils
@@ -468,6 +470,81 @@ def insert_into_db(
   return insert_command, values
 
 
+def column_names(row_type: Type[SQLiteRow]) -> list[str]:
+  """Returns the columns a row type is built from, in declaration order."""
+  return [field.name for field in dataclasses.fields(row_type)]
+
+
+def _where_in_clause(
+    where_in: Mapping[str, Iterable[Any]] | None,
+) -> tuple[str, tuple[Any, ...]]:
+  """Generates a WHERE clause requiring each column to be in a set of values.
+
+  Each set is passed as a single JSON parameter, so it can be of any size.
+
+  Args:
+    where_in: The allowed values of each column.
+
+  Returns:
+    The clause, or '' if there is nothing to filter on, and its parameters.
+  """
+  if not where_in:
+    return '', ()
+  conditions = []
+  values = []
+  for column, allowed in where_in.items():
+    conditions.append(f'"{column}" IN (SELECT value FROM json_each(?))')
+    values.append(json.dumps(list(allowed)))
+  return ' WHERE ' + ' AND '.join(conditions), tuple(values)
+
+
+def select_query(
+    table_name: str,
+    columns: Sequence[str] | None = None,
+    where_in: Mapping[str, Iterable[Any]] | None = None,
+    order_by: Sequence[str] = (),
+) -> tuple[str, tuple[Any, ...]]:
+  """Generates an SQL SELECT command, so rows are filtered by SQLite.
+
+  Args:
+    table_name: Name of the table to select from.
+    columns: The columns to select, such as `column_names(row_type)`. All
+      columns are selected if None.
+    where_in: Only select rows whose value of each column is one of the given
+      values.
+    order_by: Columns to sort the rows by.
+
+  Returns:
+    A tuple containing the SQL SELECT command and its parameters.
+  """
+  projection = (
+      '*' if columns is None else ', '.join(f'"{c}"' for c in columns)
+  )
+  where, values = _where_in_clause(where_in)
+  query = f'SELECT {projection} FROM {table_name}{where}'
+  if order_by:
+    query += ' ORDER BY ' + ', '.join(f'"{c}"' for c in order_by)
+  return query, values
+
+
+def count_query(
+    table_name: str,
+    where_in: Mapping[str, Iterable[Any]] | None = None,
+) -> tuple[str, tuple[Any, ...]]:
+  """Generates an SQL command counting rows, as a column named `count`.
+
+  Args:
+    table_name: Name of the table to count rows of.
+    where_in: Only count rows whose value of each column is one of the given
+      values.
+
+  Returns:
+    A tuple containing the SQL command and its parameters.
+  """
+  where, values = _where_in_clause(where_in)
+  return f'SELECT COUNT(*) AS count FROM {table_name}{where}', values
+
+
 def _is_candidate_equal_to_any_result(
     candidate: Any, result: list[Any]
 ) -> bool:
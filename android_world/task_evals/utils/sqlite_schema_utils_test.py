@@ -74,6 +74,42 @@ class SchemaUtilsTest(absltest.TestCase):
     self.assertNotIn('Reject', {item.title for item in items})
     generate_item_fn.assert_called()
 
+  def test_select_query(self):
+    query, values = sqlite_schema_utils.select_query(
+        'recipes',
+        columns=sqlite_schema_utils.column_names(sqlite_schema_utils.Recipe)[
+            :2
+        ],
+        where_in={'recipeId': [3, 1]},
+        order_by=['title'],
+    )
+
+    self.assertEqual(
+        query,
+        'SELECT "title", "description" FROM recipes WHERE "recipeId" IN'
+        ' (SELECT value FROM json_each(?)) ORDER BY "title"',
+    )
+    self.assertEqual(values, ('[3, 1]',))
+
+  def test_select_query_without_filters(self):
+    self.assertEqual(
+        sqlite_schema_utils.select_query('recipes'),
+        ('SELECT * FROM recipes', ()),
+    )
+
+  def test_count_query(self):
+    query, values = sqlite_schema_utils.count_query(
+        'recipes', {'title': ['a'], 'favorite': [1]}
+    )
+
+    self.assertEqual(
+        query,
+        'SELECT COUNT(*) AS count FROM recipes WHERE "title" IN (SELECT value'
+        ' FROM json_each(?)) AND "favorite" IN (SELECT value FROM'
+        ' json_each(?))',
+    )
+    self.assertEqual(values, ('["a"]', '[1]'))
+
 
 if __name__ == '__main__':
   absltest.main()
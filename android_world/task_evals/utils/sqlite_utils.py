@@ -14,18 +14,32 @@
 
 """Utility functions for interacting with SQLite database on an Android device."""
 
+import atexit
+from collections.abc import Iterable, Mapping, Sequence
+import dataclasses
 import os
+import shlex
+import shutil
 import sqlite3
+import tempfile
+import threading
 import time
-from typing import Optional, Type
+from typing import Any, Optional, Type
+
+from absl import logging
+from android_env.proto import adb_pb2
 from android_world.env import adb_utils
 from android_world.env import interface
 from android_world.task_evals.utils import sqlite_schema_utils
+from android_world.utils import app_snapshot
 from android_world.utils import file_utils
 
 
 def execute_query(
-    query: str, db_path: str, row_type: Type[sqlite_schema_utils.RowType]
+    query: str,
+    db_path: str,
+    row_type: Type[sqlite_schema_utils.RowType],
+    values: tuple[Any, ...] = (),
 ) -> list[sqlite_schema_utils.RowType]:
   """Retrieves all rows from the given SQLite database path.
 
@@ -33,6 +47,7 @@ def execute_query(
     query: The query to issue.
     db_path: The path to the SQLite database file.
     row_type: The object type that will be created for each retrieved row.
+    values: The parameters of the query.
 
   Returns:
       A list of tuples, each representing an row from the database.
@@ -40,7 +55,7 @@ def execute_query(
   conn = sqlite3.connect(db_path)
   conn.row_factory = sqlite3.Row
   cursor = conn.cursor()
-  raw_rows = cursor.execute(query).fetchall()
+  raw_rows = cursor.execute(query, values).fetchall()
   conn.close()
 
   rows = []
@@ -50,6 +65,371 @@ def execute_query(
   return rows
 
 
+@dataclasses.dataclass
+class TransferStats:
+  """Database copies between the device and the local mirrors.
+
+  Attributes:
+    pulls: Databases pulled from the device.
+    bytes_pulled: Size of the pulled database directories.
+    pulls_avoided: Pulls skipped because the local mirror was up to date.
+    bytes_saved: Size of the mirrors used instead of pulling.
+    pushes: Databases pushed to the device.
+    bytes_pushed: Size of the pushed databases.
+  """
+
+  pulls: int = 0
+  bytes_pulled: int = 0
+  pulls_avoided: int = 0
+  bytes_saved: int = 0
+  pushes: int = 0
+  bytes_pushed: int = 0
+
+
+@dataclasses.dataclass
+class _Mirror:
+  """A local copy of a database directory on the device.
+
+  Attributes:
+    directory: Local directory with the copy.
+    version: Sizes and modification and change times of the files on the
+      device when they were copied.
+  """
+
+  directory: str
+  version: str
+
+
+# Local mirrors by controller id and database path on the device.
+_mirrors: dict[tuple[int, str], _Mirror] = {}
+_mirrors_lock = threading.Lock()
+_transfer_counters = TransferStats()
+
+
+def get_transfer_counters() -> TransferStats:
+  """Returns the totals over all database transfers in this process."""
+  with _mirrors_lock:
+    return dataclasses.replace(_transfer_counters)
+
+
+def reset_transfer_counters() -> None:
+  """Resets the totals returned by `get_transfer_counters`."""
+  global _transfer_counters
+  with _mirrors_lock:
+    _transfer_counters = TransferStats()
+
+
+def log_transfer_counters() -> None:
+  """Logs the totals returned by `get_transfer_counters`."""
+  counters = get_transfer_counters()
+  logging.info(
+      "SQLite databases: pulled %d times (%d bytes), reused local copies %d"
+      " times (%d bytes saved), pushed %d times (%d bytes).",
+      counters.pulls,
+      counters.bytes_pulled,
+      counters.pulls_avoided,
+      counters.bytes_saved,
+      counters.pushes,
+      counters.bytes_pushed,
+  )
+
+
+@atexit.register
+def clear_mirrors() -> None:
+  """Deletes all local database mirrors."""
+  with _mirrors_lock:
+    for mirror in _mirrors.values():
+      shutil.rmtree(mirror.directory, ignore_errors=True)
+    _mirrors.clear()
+
+
+def _directory_size(directory: str) -> int:
+  return sum(
+      os.path.getsize(os.path.join(directory, name))
+      for name in os.listdir(directory)
+  )
+
+
+class RemoteDatabase:
+  """A SQLite database on the device, accessed through a local copy.
+
+  The database directory is pulled at most once per handle, and not at all if
+  an earlier handle left a local copy and the files on the device have not
+  changed since. Queries and mutations run against the local copy, and
+  mutations are pushed back to the device by `commit()`.
+
+  Usage:
+
+    with sqlite_utils.RemoteDatabase(db_path, env, app_name) as db:
+      db.delete_all_rows(table_name)
+      db.insert_rows(rows, "id", table_name)
+      db.commit()
+      rows = db.get_rows(table_name, row_type)
+  """
+
+  def __init__(
+      self,
+      remote_db_file_path: str,
+      env: interface.AsyncEnv,
+      app_name: Optional[str] = None,
+      timeout_sec: Optional[float] = None,
+  ):
+    """Initializes the handle. Nothing is pulled until the database is used.
+
+    Args:
+      remote_db_file_path: The database path on the device.
+      env: The environment.
+      app_name: The name of the app that owns the database. It is closed after
+        committing, so that it loads the changes, and launched by
+        `create_if_missing`.
+      timeout_sec: Optional timeout in seconds for each copy.
+    """
+    self._remote_db_file_path = remote_db_file_path
+    self._remote_directory = os.path.dirname(remote_db_file_path)
+    self._app_name = app_name
+    self._env = env
+    self._timeout_sec = timeout_sec
+    self._key = (id(env.controller), remote_db_file_path)
+    self._directory: Optional[str] = None
+    self._modified = False
+
+  def __enter__(self) -> "RemoteDatabase":
+    return self
+
+  def __exit__(self, *unused_exc_info: Any) -> None:
+    self.close()
+
+  @property
+  def local_db_path(self) -> str:
+    """The path of the local copy, pulling it first if needed."""
+    if self._directory is None:
+      self._directory = self._pull()
+    return file_utils.convert_to_posix_path(
+        self._directory, os.path.basename(self._remote_db_file_path)
+    )
+
+  def _remote_version(self) -> str:
+    """Returns a fingerprint of the database files on the device, or ""."""
+    response = adb_utils.issue_generic_request(
+        [
+            "shell",
+            f"stat -c '%n %s %i %y %z' {shlex.quote(self._remote_directory)}/*",
+        ],
+        self._env.controller,
+        self._timeout_sec,
+    )
+    if response.status != adb_pb2.AdbResponse.Status.OK:
+      return ""
+    return response.generic.output.decode("utf-8", errors="replace").strip()
+
+  def _pull(self) -> str:
+    """Returns a local directory with an up to date copy of the database."""
+    global _transfer_counters
+    version = self._remote_version()
+    with _mirrors_lock:
+      mirror = _mirrors.get(self._key)
+      if mirror is not None and version and mirror.version == version:
+        _transfer_counters.pulls_avoided += 1
+        _transfer_counters.bytes_saved += _directory_size(mirror.directory)
+        return mirror.directory
+    self.invalidate()
+
+    directory = tempfile.mkdtemp()
+    try:
+      with self._env.controller.pull_file(
+          self._remote_db_file_path, self._timeout_sec
+      ) as local_db_directory:
+        shutil.copytree(local_db_directory, directory, dirs_exist_ok=True)
+    except Exception:
+      shutil.rmtree(directory, ignore_errors=True)
+      raise
+    with _mirrors_lock:
+      _transfer_counters.pulls += 1
+      _transfer_counters.bytes_pulled += _directory_size(directory)
+      _mirrors[self._key] = _Mirror(directory, version)
+    return directory
+
+  def invalidate(self) -> None:
+    """Discards the local copy, including uncommitted changes."""
+    with _mirrors_lock:
+      mirror = _mirrors.pop(self._key, None)
+    if mirror is not None:
+      shutil.rmtree(mirror.directory, ignore_errors=True)
+    self._directory = None
+    self._modified = False
+
+  def execute_query(
+      self,
+      query: str,
+      row_type: Type[sqlite_schema_utils.RowType],
+      values: tuple[Any, ...] = (),
+  ) -> list[sqlite_schema_utils.RowType]:
+    """Runs a query against the local copy; see `execute_query`."""
+    return execute_query(query, self.local_db_path, row_type, values)
+
+  def get_rows(
+      self,
+      table_name: str,
+      row_type: Type[sqlite_schema_utils.RowType],
+  ) -> list[sqlite_schema_utils.RowType]:
+    """Returns all rows of a table."""
+    return self.select_rows(table_name, row_type)
+
+  def select_rows(
+      self,
+      table_name: str,
+      row_type: Type[sqlite_schema_utils.RowType],
+      columns: Optional[Sequence[str]] = None,
+      where_in: Optional[Mapping[str, Iterable[Any]]] = None,
+      order_by: Sequence[str] = (),
+  ) -> list[sqlite_schema_utils.RowType]:
+    """Returns the rows of a table that match, filtered and sorted by SQLite.
+
+    Args:
+      table_name: The table.
+      row_type: The class type corresponding to the table's row structure.
+        Use `sqlite_schema_utils.GenericRow` when only some columns are
+        selected.
+      columns: The columns to return. All columns are returned if None.
+      where_in: Only return rows whose value of each column is one of the
+        given values.
+      order_by: Columns to sort the rows by.
+
+    Returns:
+      The matching rows.
+    """
+    query, values = sqlite_schema_utils.select_query(
+        table_name, columns, where_in, order_by
+    )
+    return self.execute_query(query, row_type, values)
+
+  def count_rows(
+      self,
+      table_name: str,
+      where_in: Optional[Mapping[str, Iterable[Any]]] = None,
+  ) -> int:
+    """Returns the number of rows of a table that match, counted by SQLite.
+
+    Args:
+      table_name: The table.
+      where_in: Only count rows whose value of each column is one of the given
+        values.
+
+    Returns:
+      The number of matching rows.
+    """
+    query, values = sqlite_schema_utils.count_query(table_name, where_in)
+    (row,) = self.execute_query(query, sqlite_schema_utils.GenericRow, values)
+    return row["count"]
+
+  def table_exists(self, table_name: str) -> bool:
+    """Returns whether a table exists, or False if there is no database."""
+    try:
+      return bool(
+          self.count_rows(
+              "sqlite_master", {"type": ["table"], "name": [table_name]}
+          )
+      )
+    except (FileNotFoundError, sqlite3.DatabaseError):
+      self.invalidate()
+      return False
+
+  def create_if_missing(self, table_name: str) -> None:
+    """Opens the app if the table does not exist.
+
+    Apps usually create their databases the first time they are launched.
+
+    Args:
+      table_name: A table the app creates.
+
+    Raises:
+      ValueError: If the handle has no app name.
+    """
+    if self._app_name is None:
+      raise ValueError("An app name is needed to create the database.")
+    if not self.table_exists(table_name):
+      adb_utils.launch_app(self._app_name, self._env.controller)
+      time.sleep(7.0)
+      self.invalidate()
+
+  def execute(self, statement: str, values: tuple[Any, ...] = ()) -> None:
+    """Runs a statement that modifies the local copy."""
+    self.execute_many([(statement, values)])
+
+  def execute_many(
+      self, statements: list[tuple[str, tuple[Any, ...]]]
+  ) -> None:
+    """Runs (statement, values) pairs on the local copy in one transaction."""
+    conn = sqlite3.connect(self.local_db_path)
+    try:
+      with conn:
+        for statement, values in statements:
+          conn.execute(statement, values)
+    finally:
+      conn.close()
+    self._modified = True
+
+  def delete_all_rows(self, table_name: str) -> None:
+    """Deletes all rows of a table."""
+    self.execute(f"DELETE FROM {table_name}")
+
+  def insert_rows(
+      self,
+      rows: list[sqlite_schema_utils.RowType],
+      exclude_key: str | None,
+      table_name: str,
+  ) -> None:
+    """Inserts rows into a table.
+
+    Args:
+      rows: The rows to insert.
+      exclude_key: Name of field to exclude adding to database. Typically an
+        auto incrementing key.
+      table_name: The table.
+    """
+    self.execute_many([
+        sqlite_schema_utils.insert_into_db(row, table_name, exclude_key)
+        for row in rows
+    ])
+
+  def commit(self) -> None:
+    """Pushes the changes to the device and closes the app to load them."""
+    global _transfer_counters
+    if not self._modified:
+      return
+    local_db_path = self.local_db_path
+    self._env.controller.push_file(
+        local_db_path, self._remote_db_file_path, self._timeout_sec
+    )
+    app_snapshot.mark_path_dirty(
+        self._remote_db_file_path, self._env.controller
+    )
+    if self._app_name is not None:
+      adb_utils.close_app(self._app_name, self._env.controller)
+    # Pushing replaces the directory on the device with just the database.
+    for name in os.listdir(self._directory):
+      path = os.path.join(self._directory, name)
+      if path != local_db_path and os.path.isfile(path):
+        os.remove(path)
+    version = self._remote_version()
+    with _mirrors_lock:
+      _transfer_counters.pushes += 1
+      _transfer_counters.bytes_pushed += os.path.getsize(local_db_path)
+      mirror = _mirrors.get(self._key)
+      if mirror is not None:
+        mirror.version = version
+    self._modified = False
+
+  def close(self) -> None:
+    """Discards uncommitted changes."""
+    if self._modified:
+      logging.warning(
+          "Discarding uncommitted changes to %s.", self._remote_db_file_path
+      )
+      self.invalidate()
+    self._directory = None
+
+
 def get_rows_from_remote_device(
     table_name: str,
     remote_db_file_path: str,
@@ -60,8 +440,8 @@ def get_rows_from_remote_device(
 ) -> list[sqlite_schema_utils.RowType]:
   """Retrieves rows from a table in a SQLite database located on a remote Android device.
 
-  This function first copies the database from the remote device to a
-  temporary local directory.
+  The database is read through a `RemoteDatabase`, so it is only copied from
+  the device if it changed since it was last copied.
 
   Args:
     table_name: The name of the table from which to retrieve rows.
@@ -73,7 +453,8 @@ def get_rows_from_remote_device(
     timeout_sec: Optional timeout in seconds for the database copy operation.
     n_retries: The number of times to try. This is relevant in cases where a
       database has not been created/being created when an app is launched for
-      the first time after clearing the database.
+      the first time after clearing the database. Each retry copies the
+      database again.
 
   Returns:
     All rows from the table.
@@ -81,20 +462,14 @@ def get_rows_from_remote_device(
   Raises:
     ValueError: If cannot query table.
   """
-  with env.controller.pull_file(
-      remote_db_file_path, timeout_sec
-  ) as local_db_directory:
-    local_db_path = file_utils.convert_to_posix_path(
-        local_db_directory, os.path.split(remote_db_file_path)[1]
-    )
+  with RemoteDatabase(
+      remote_db_file_path, env, timeout_sec=timeout_sec
+  ) as database:
     for _ in range(n_retries):
       try:
-        return execute_query(
-            f"SELECT * FROM {table_name};",
-            local_db_path,
-            row_type,
-        )
+        return database.get_rows(table_name, row_type)
       except sqlite3.OperationalError:
+        database.invalidate()
         time.sleep(1.0)
   raise ValueError(
       f"Failed to retrieve rows from {table_name} from"
@@ -118,16 +493,8 @@ def table_exists(
   Returns:
     True if the table exists in the database.
   """
-  try:
-    get_rows_from_remote_device(
-        table_name,
-        remote_db_file_path,
-        sqlite_schema_utils.GenericRow,
-        env,
-    )
-    return True
-  except (FileNotFoundError, ValueError):
-    return False
+  with RemoteDatabase(remote_db_file_path, env) as database:
+    return database.table_exists(table_name)
 
 
 def delete_all_rows_from_table(
@@ -146,28 +513,12 @@ def delete_all_rows_from_table(
     app_name: The name of the app that owns the database.
     timeout_sec: Timeout in seconds.
   """
-  if not table_exists(table_name, remote_db_file_path, env):
-    # If the database was never created, opening the app may create it.
-    adb_utils.launch_app(app_name, env.controller)
-    time.sleep(7.0)
-
-  with env.controller.pull_file(
-      remote_db_file_path, timeout_sec
-  ) as local_db_directory:
-    local_db_path = file_utils.convert_to_posix_path(
-        local_db_directory, os.path.split(remote_db_file_path)[1]
-    )
-
-    conn = sqlite3.connect(local_db_path)
-    cursor = conn.cursor()
-    delete_command = f"DELETE FROM {table_name}"
-    cursor.execute(delete_command)
-    conn.commit()
-    conn.close()
-    env.controller.push_file(local_db_path, remote_db_file_path, timeout_sec)
-    adb_utils.close_app(
-        app_name, env.controller
-    )  # Close app to register the changes.
+  with RemoteDatabase(
+      remote_db_file_path, env, app_name, timeout_sec
+  ) as database:
+    database.create_if_missing(table_name)
+    database.delete_all_rows(table_name)
+    database.commit()
 
 
 def insert_rows_to_remote_db(
@@ -191,22 +542,8 @@ def insert_rows_to_remote_db(
     env: The environment.
     timeout_sec: Optional timeout in seconds for the database copy operation.
   """
-  with env.controller.pull_file(
-      remote_db_file_path, timeout_sec
-  ) as local_db_directory:
-    local_db_path = file_utils.convert_to_posix_path(
-        local_db_directory, os.path.split(remote_db_file_path)[1]
-    )
-
-    conn = sqlite3.connect(local_db_path)
-    cursor = conn.cursor()
-    for row in rows:
-      insert_command, values = sqlite_schema_utils.insert_into_db(
-          row, table_name, exclude_key
-      )
-      cursor.execute(insert_command, values)
-    conn.commit()
-    conn.close()
-
-    env.controller.push_file(local_db_path, remote_db_file_path, timeout_sec)
-    adb_utils.close_app(app_name, env.controller)
+  with RemoteDatabase(
+      remote_db_file_path, env, app_name, timeout_sec
+  ) as database:
+    database.insert_rows(rows, exclude_key, table_name)
+    database.commit()
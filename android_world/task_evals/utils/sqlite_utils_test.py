@@ -12,12 +12,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import dataclasses
 import os
 import sqlite3
 from unittest import mock
 
 from absl.testing import absltest
 from android_env import env_interface
+from android_env.proto import adb_pb2
 from android_env.wrappers import a11y_grpc_wrapper
 from android_world.env import adb_utils
 from android_world.env import android_world_controller
@@ -25,11 +27,13 @@ from android_world.env import interface
 from android_world.task_evals.utils import sqlite_schema_utils
 from android_world.task_evals.utils import sqlite_test_utils
 from android_world.task_evals.utils import sqlite_utils
+from android_world.utils import app_snapshot
 from android_world.utils import file_test_utils
 from android_world.utils import file_utils
 
 
-class SqliteUtilsTest(absltest.TestCase):
+class _SqliteTestCase(absltest.TestCase):
+  """Uses a local database in place of one on the device."""
 
   def setUp(self):
     super().setUp()
@@ -73,6 +77,11 @@ class SqliteUtilsTest(absltest.TestCase):
             side_effect=file_test_utils.mock_remove_files,
         )
     )
+    sqlite_utils.clear_mirrors()
+    sqlite_utils.reset_transfer_counters()
+
+
+class SqliteUtilsTest(_SqliteTestCase):
 
   def test_get_rows_from_remote_device_success(self):
     expected_rows = sqlite_test_utils.get_db_rows()
@@ -140,5 +149,164 @@ class SqliteUtilsTest(absltest.TestCase):
     self.assertEqual(retrieved, original_rows + [new_row])
 
 
+class RemoteDatabaseTest(_SqliteTestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.enter_context(
+        mock.patch.object(
+            adb_utils, 'issue_generic_request', side_effect=self._stat_remote
+        )
+    )
+    self.mock_close_app = self.enter_context(
+        mock.patch.object(adb_utils, 'close_app', autospec=True)
+    )
+
+  def _stat_remote(self, args, env, timeout_sec=None):
+    """Fakes `stat` of the files in the database directory."""
+    del args, env, timeout_sec
+    directory = os.path.dirname(self.remote_db_path)
+    lines = []
+    for name in sorted(os.listdir(directory)):
+      stat = os.stat(os.path.join(directory, name))
+      lines.append(
+          f'{name} {stat.st_size} {stat.st_ino} {stat.st_mtime_ns}'
+          f' {stat.st_ctime_ns}'
+      )
+    return adb_pb2.AdbResponse(
+        status=adb_pb2.AdbResponse.Status.OK,
+        generic=adb_pb2.AdbResponse.GenericResponse(
+            output='\n'.join(lines).encode()
+        ),
+    )
+
+  def _rename_first_event_on_device(self, title: str) -> None:
+    conn = sqlite3.connect(self.remote_db_path)
+    conn.execute('UPDATE events SET title = ? WHERE id = 1', (title,))
+    conn.commit()
+    conn.close()
+
+  @mock.patch.object(app_snapshot, 'mark_path_dirty', autospec=True)
+  def test_pulls_and_pushes_once(self, mock_mark_path_dirty):
+    new_row = dataclasses.replace(sqlite_test_utils.get_db_rows()[0], id=6)
+
+    with sqlite_utils.RemoteDatabase(
+        self.remote_db_path, self.async_env_mock, 'TestApp'
+    ) as database:
+      self.assertTrue(database.table_exists(self.table_name))
+      self.assertFalse(database.table_exists('missing'))
+      database.delete_all_rows(self.table_name)
+      database.insert_rows([new_row], None, self.table_name)
+      database.commit()
+      rows = database.get_rows(self.table_name, self.row_type)
+
+    self.assertEqual(rows, [new_row])
+    self.mock_copy_db.assert_called_once()
+    self.mock_copy_data_to_device.assert_called_once()
+    self.mock_close_app.assert_called_once_with('TestApp', self.controller)
+    mock_mark_path_dirty.assert_called_once_with(
+        self.remote_db_path, self.controller
+    )
+    self.assertEqual(
+        sqlite_utils.execute_query(
+            'SELECT * FROM events;', self.remote_db_path, self.row_type
+        ),
+        [new_row],
+    )
+
+  def test_select_and_count_rows(self):
+    all_rows = sqlite_test_utils.get_db_rows()
+
+    with sqlite_utils.RemoteDatabase(
+        self.remote_db_path, self.async_env_mock
+    ) as database:
+      rows = database.select_rows(
+          self.table_name,
+          self.row_type,
+          where_in={'id': [4, 2, 99]},
+          order_by=['id'],
+      )
+      ids = database.select_rows(
+          self.table_name,
+          sqlite_schema_utils.GenericRow,
+          columns=['id'],
+          where_in={'id': [4, 2, 99]},
+          order_by=['id'],
+      )
+      count = database.count_rows(self.table_name, {'id': [4, 2, 99]})
+      total = database.count_rows(self.table_name)
+
+    self.assertEqual(rows, [all_rows[1], all_rows[3]])
+    self.assertEqual([row['id'] for row in ids], [2, 4])
+    self.assertEqual(count, 2)
+    self.assertEqual(total, len(all_rows))
+    self.mock_copy_db.assert_called_once()
+
+  def test_reuses_unchanged_copy(self):
+    for _ in range(3):
+      sqlite_utils.get_rows_from_remote_device(
+          self.table_name,
+          self.remote_db_path,
+          self.row_type,
+          self.async_env_mock,
+      )
+
+    self.mock_copy_db.assert_called_once()
+    counters = sqlite_utils.get_transfer_counters()
+    self.assertEqual(counters.pulls, 1)
+    self.assertEqual(counters.pulls_avoided, 2)
+    self.assertEqual(counters.bytes_saved, 2 * counters.bytes_pulled)
+
+  def test_reuses_copy_after_commit(self):
+    sqlite_utils.delete_all_rows_from_table(
+        self.table_name, self.remote_db_path, self.async_env_mock, 'TestApp'
+    )
+
+    rows = sqlite_utils.get_rows_from_remote_device(
+        self.table_name,
+        self.remote_db_path,
+        self.row_type,
+        self.async_env_mock,
+    )
+
+    self.assertEmpty(rows)
+    self.mock_copy_db.assert_called_once()
+
+  def test_pulls_again_when_device_copy_changes(self):
+    sqlite_utils.get_rows_from_remote_device(
+        self.table_name,
+        self.remote_db_path,
+        self.row_type,
+        self.async_env_mock,
+    )
+    self._rename_first_event_on_device('Changed on device')
+
+    rows = sqlite_utils.get_rows_from_remote_device(
+        self.table_name,
+        self.remote_db_path,
+        self.row_type,
+        self.async_env_mock,
+    )
+
+    self.assertEqual(rows[0].title, 'Changed on device')
+    self.assertEqual(self.mock_copy_db.call_count, 2)
+
+  def test_discards_uncommitted_changes(self):
+    with sqlite_utils.RemoteDatabase(
+        self.remote_db_path, self.async_env_mock
+    ) as database:
+      database.delete_all_rows(self.table_name)
+
+    rows = sqlite_utils.get_rows_from_remote_device(
+        self.table_name,
+        self.remote_db_path,
+        self.row_type,
+        self.async_env_mock,
+    )
+
+    self.assertEqual(rows, sqlite_test_utils.get_db_rows())
+    self.mock_copy_data_to_device.assert_not_called()
+
+
 if __name__ == '__main__':
   absltest.main()
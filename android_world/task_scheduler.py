@@ -0,0 +1,94 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Work-stealing scheduler for distributing task instances across workers."""
+
+import collections
+import threading
+from typing import Generic, Sequence, TypeVar
+
+T = TypeVar('T')
+
+
+class WorkStealingScheduler(Generic[T]):
+  """Distributes weighted work items across a fixed number of workers.
+
+  Items are first assigned to per-worker queues using the longest-processing-
+  time-first heuristic: the most expensive item goes to the least loaded
+  worker. Each worker consumes its own queue from the front (most expensive
+  first). When a worker runs out of work it steals from the back (cheapest
+  end) of the queue of the worker with the most remaining expected cost, so
+  that misestimated runtimes do not leave workers idle.
+
+  Attributes:
+    num_workers: The number of workers.
+    num_steals: The number of items that were stolen from another worker.
+  """
+
+  def __init__(
+      self, items: Sequence[tuple[T, float]], num_workers: int
+  ) -> None:
+    """Initializes the scheduler.
+
+    Args:
+      items: Pairs of (item, expected cost). Costs should be non-negative; they
+        are only used for ordering and balancing.
+      num_workers: The number of workers that will consume items.
+
+    Raises:
+      ValueError: If num_workers is not positive.
+    """
+    if num_workers < 1:
+      raise ValueError(f'num_workers must be positive, got {num_workers}.')
+    self.num_workers = num_workers
+    self.num_steals = 0
+    self._lock = threading.Lock()
+    self._queues: list[collections.deque[tuple[T, float]]] = [
+        collections.deque() for _ in range(num_workers)
+    ]
+    self._remaining_cost = [0.0] * num_workers
+
+    # Stable sort keeps the caller's order among items with equal cost.
+    for item, cost in sorted(items, key=lambda x: x[1], reverse=True):
+      worker_id = min(
+          range(num_workers), key=lambda i: (self._remaining_cost[i], i)
+      )
+      self._queues[worker_id].append((item, cost))
+      self._remaining_cost[worker_id] += cost
+
+  def __len__(self) -> int:
+    with self._lock:
+      return sum(len(q) for q in self._queues)
+
+  def next(self, worker_id: int) -> T | None:
+    """Returns the next item for a worker, or None if all work is done.
+
+    Args:
+      worker_id: The worker requesting work, in [0, num_workers).
+    """
+    with self._lock:
+      queue = self._queues[worker_id]
+      if queue:
+        item, cost = queue.popleft()
+        self._remaining_cost[worker_id] -= cost
+        return item
+
+      victims = [i for i in range(self.num_workers) if self._queues[i]]
+      if not victims:
+        return None
+      victim = max(victims, key=lambda i: self._remaining_cost[i])
+      item, cost = self._queues[victim].pop()
+      self._remaining_cost[victim] -= cost
+      self.num_steals += 1
+      return item
@@ -0,0 +1,77 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from absl.testing import absltest
+from android_world import task_scheduler
+
+
+class WorkStealingSchedulerTest(absltest.TestCase):
+
+  def test_single_worker_runs_longest_first(self):
+    scheduler = task_scheduler.WorkStealingScheduler(
+        [('a', 1.0), ('b', 5.0), ('c', 3.0)], num_workers=1
+    )
+
+    order = []
+    while (item := scheduler.next(0)) is not None:
+      order.append(item)
+
+    self.assertEqual(order, ['b', 'c', 'a'])
+    self.assertEqual(scheduler.num_steals, 0)
+
+  def test_balances_expected_cost_across_workers(self):
+    scheduler = task_scheduler.WorkStealingScheduler(
+        [('a', 4.0), ('b', 3.0), ('c', 2.0), ('d', 1.0)], num_workers=2
+    )
+
+    self.assertEqual(scheduler.next(0), 'a')
+    self.assertEqual(scheduler.next(1), 'b')
+    self.assertEqual(scheduler.next(1), 'c')
+    self.assertEqual(scheduler.next(0), 'd')
+    self.assertIsNone(scheduler.next(0))
+    self.assertIsNone(scheduler.next(1))
+
+  def test_idle_worker_steals_cheapest_item(self):
+    scheduler = task_scheduler.WorkStealingScheduler(
+        [('a', 10.0), ('b', 3.0), ('c', 2.0), ('d', 1.0)], num_workers=2
+    )
+
+    # Worker 0 owns 'a'; worker 1 owns 'b', 'c' and 'd'.
+    self.assertEqual(scheduler.next(0), 'a')
+    self.assertEqual(scheduler.next(0), 'd')
+    self.assertEqual(scheduler.num_steals, 1)
+    self.assertEqual(scheduler.next(1), 'b')
+    self.assertEqual(scheduler.next(1), 'c')
+    self.assertIsNone(scheduler.next(1))
+    self.assertEmpty(scheduler)
+
+  def test_every_item_is_returned_once(self):
+    items = [(i, float(i % 7)) for i in range(100)]
+    scheduler = task_scheduler.WorkStealingScheduler(items, num_workers=3)
+
+    seen = []
+    for worker_id in [0] * 100 + [1, 2] * 10:
+      item = scheduler.next(worker_id)
+      if item is not None:
+        seen.append(item)
+
+    self.assertCountEqual(seen, range(100))
+
+  def test_invalid_num_workers_raises(self):
+    with self.assertRaises(ValueError):
+      task_scheduler.WorkStealingScheduler([('a', 1.0)], num_workers=0)
+
+
+if __name__ == '__main__':
+  absltest.main()
@@ -12,31 +12,278 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-"""Utils for handling snapshots for apps."""
+"""Utils for handling snapshots for apps.
+
+Saving a snapshot also stores a manifest of the snapshot's files and their MD5
+hashes on the device. Restores use it to only copy back files whose contents
+differ and only delete files the snapshot does not have, instead of replacing
+the whole app data directory.
+
+While `track_app_state` is active for an environment, restores of apps that
+cannot have changed since their last restore are skipped.
+"""
+
+from collections.abc import Iterator
+import contextlib
+import dataclasses
+import re
+import shlex
 
 from absl import logging
 from android_env import env_interface
+from android_env.proto import adb_pb2
 from android_world.env import adb_utils
 from android_world.env import device_constants
 from android_world.utils import file_utils
 
 
+def _package_name(app_name: str) -> str:
+  return adb_utils.extract_package_name(adb_utils.get_adb_activity(app_name))
+
+
 def _app_data_path(app_name: str) -> str:
-  package_name = adb_utils.extract_package_name(
-      adb_utils.get_adb_activity(app_name)
+  return file_utils.convert_to_posix_path(
+      "/data/data/", _package_name(app_name)
   )
-  return file_utils.convert_to_posix_path("/data/data/", package_name)
 
 
 def _snapshot_path(app_name: str) -> str:
-  package_name = adb_utils.extract_package_name(
-      adb_utils.get_adb_activity(app_name)
-  )
   return file_utils.convert_to_posix_path(
-      device_constants.SNAPSHOT_DATA, package_name
+      device_constants.SNAPSHOT_DATA, _package_name(app_name)
   )
 
 
+def _manifest_path(app_name: str) -> str:
+  return _snapshot_path(app_name) + ".manifest"
+
+
+# Separates the sections of a directory listing.
+_SECTION_END = "--android-world-section-end--"
+
+# Longest shell command sent in one adb call when applying a restore.
+_MAX_COMMAND_LENGTH = 32 * 1024
+
+
+@dataclasses.dataclass
+class RestoreStats:
+  """What snapshot restores changed.
+
+  Attributes:
+    restores: Number of restores.
+    full_restores: Restores that replaced the whole app data directory, because
+      there was no manifest or incremental restores were disabled.
+    files_restored: Files and symlinks copied back from snapshots.
+    bytes_restored: Size of the files copied back.
+    files_deleted: Files, symlinks and directories deleted because they were
+      not in the snapshot.
+    restores_skipped: Restores not run because the app could not have changed
+      since its last restore.
+  """
+
+  restores: int = 0
+  full_restores: int = 0
+  files_restored: int = 0
+  bytes_restored: int = 0
+  files_deleted: int = 0
+  restores_skipped: int = 0
+
+  def add(self, other: "RestoreStats") -> None:
+    for field in dataclasses.fields(self):
+      setattr(
+          self,
+          field.name,
+          getattr(self, field.name) + getattr(other, field.name),
+      )
+
+
+# Totals over all restores in this process.
+_restore_counters = RestoreStats()
+
+
+def get_restore_counters() -> RestoreStats:
+  """Returns the totals over all snapshot restores in this process."""
+  return dataclasses.replace(_restore_counters)
+
+
+def reset_restore_counters() -> None:
+  """Resets the totals returned by `get_restore_counters`."""
+  global _restore_counters
+  _restore_counters = RestoreStats()
+
+
+@dataclasses.dataclass
+class _Tracker:
+  """Which apps of one environment may differ from their snapshots.
+
+  Attributes:
+    clean: Packages restored since they were last marked dirty.
+    stats: What restores did while tracking.
+  """
+
+  clean: set[str] = dataclasses.field(default_factory=set)
+  stats: RestoreStats = dataclasses.field(default_factory=RestoreStats)
+
+
+# Trackers of the environments whose app state is tracked, by id.
+_trackers: dict[int, _Tracker] = {}
+
+
+@contextlib.contextmanager
+def track_app_state(
+    env: env_interface.AndroidEnvInterface,
+) -> Iterator[RestoreStats]:
+  """Skips snapshot restores that cannot change anything, within a scope.
+
+  Inside the scope, an app is clean after it is restored, until it is marked
+  dirty, and restoring a clean app does nothing.
+
+  Code inside the scope that may change app data must mark the app dirty.
+  Writes to app databases through `sqlite_utils` mark the app dirty with
+  `mark_path_dirty`, and the suite runner marks every app that ran during a
+  task dirty with `mark_touched_apps_dirty`.
+
+  Args:
+    env: Android environment.
+
+  Yields:
+    What restores of `env` did in the scope, updated as they happen.
+
+  Raises:
+    RuntimeError: If the app state of `env` is already tracked.
+  """
+  if id(env) in _trackers:
+    raise RuntimeError("App state is already tracked for this environment.")
+  tracker = _trackers[id(env)] = _Tracker()
+  try:
+    yield tracker.stats
+  finally:
+    del _trackers[id(env)]
+    logging.info(
+        "Ran %d snapshot restores and skipped %d.",
+        tracker.stats.restores,
+        tracker.stats.restores_skipped,
+    )
+
+
+def mark_dirty(app_name: str, env: env_interface.AndroidEnvInterface) -> None:
+  """Records that the data of an app may have changed since its last restore.
+
+  Args:
+    app_name: The app.
+    env: Android environment.
+  """
+  tracker = _trackers.get(id(env))
+  # Apps without a known activity have no snapshot, so are never clean.
+  if tracker is not None and adb_utils.get_adb_activity(app_name):
+    tracker.clean.discard(_package_name(app_name))
+
+
+def mark_path_dirty(path: str, env: env_interface.AndroidEnvInterface) -> None:
+  """Records that a file in the data directory of an app may have changed.
+
+  Args:
+    path: The file on the device. Paths outside app data directories are
+      ignored.
+    env: Android environment.
+  """
+  tracker = _trackers.get(id(env))
+  match = re.match(r"/data/data/([^/]+)/", path)
+  if tracker is not None and match:
+    tracker.clean.discard(match.group(1))
+
+
+def mark_all_dirty(env: env_interface.AndroidEnvInterface) -> None:
+  """Records that the data of any app may have changed."""
+  tracker = _trackers.get(id(env))
+  if tracker is not None:
+    tracker.clean.clear()
+
+
+def mark_touched_apps_dirty(env: env_interface.AndroidEnvInterface) -> None:
+  """Marks every app that ran since it was last closed dirty.
+
+  These are the apps with recent tasks, i.e. that were in the foreground
+  since recent apps were last closed, and the apps with running processes.
+
+  Args:
+    env: Android environment.
+  """
+  tracker = _trackers.get(id(env))
+  if tracker is None or not tracker.clean:
+    return
+  response = adb_utils.issue_generic_request(
+      ["shell", "dumpsys activity recents; ps -A -o NAME"], env
+  )
+  if response.status != adb_pb2.AdbResponse.Status.OK:
+    logging.warning("Failed to list running apps; marking all apps dirty.")
+    tracker.clean.clear()
+    return
+  # Every package name appears as a separate token, e.g. in
+  # "realActivity=com.example/.MainActivity" or "com.example:service".
+  tokens = set(
+      re.findall(
+          r"[\w.]+",
+          response.generic.output.decode("utf-8", errors="replace"),
+      )
+  )
+  tracker.clean -= tokens
+
+
+@dataclasses.dataclass(frozen=True)
+class _Listing:
+  """The contents of a directory tree, with paths relative to its root.
+
+  Attributes:
+    directories: Subdirectories.
+    links: Symbolic links.
+    files: MD5 hash and size of each regular file.
+  """
+
+  directories: frozenset[str]
+  links: frozenset[str]
+  files: dict[str, tuple[str, int]]
+
+
+def _listing_command(path: str) -> str:
+  """Returns a shell command that lists a directory tree; see `_Listing`."""
+  return (
+      f"(cd {shlex.quote(path)} || exit 1;"
+      f" find . ! -name . -type d; echo {_SECTION_END};"
+      f" find . -type l; echo {_SECTION_END};"
+      f" find . -type f -exec md5sum {{}} +; echo {_SECTION_END};"
+      " find . -type f -exec stat -c '%s %n' {} +)"
+  )
+
+
+def _parse_listing(output: str) -> _Listing:
+  """Parses the output of `_listing_command`.
+
+  Args:
+    output: The output.
+
+  Returns:
+    The listing.
+
+  Raises:
+    ValueError: If the output is incomplete or malformed.
+  """
+  sections = output.replace("\r", "").split(_SECTION_END + "\n")
+  if len(sections) != 4:
+    raise ValueError(f"Expected 4 sections, got {len(sections)}.")
+  directories, links, hashes, sizes = (
+      [line for line in section.split("\n") if line] for section in sections
+  )
+  size_by_path = {}
+  for line in sizes:
+    size, path = line.split(" ", 1)
+    size_by_path[path] = int(size)
+  files = {}
+  for line in hashes:
+    md5, path = line.split(None, 1)
+    files[path] = (md5, size_by_path[path])
+  return _Listing(frozenset(directories), frozenset(links), files)
+
+
 def clear_snapshot(
     app_name: str,
     env: env_interface.AndroidEnvInterface,
@@ -49,6 +296,9 @@ def clear_snapshot(
   """
   snapshot_path = _snapshot_path(app_name)
   file_utils.clear_directory(snapshot_path, env)
+  adb_utils.issue_generic_request(
+      ["shell", "rm", "-f", _manifest_path(app_name)], env
+  )
 
 
 def save_snapshot(app_name: str, env: env_interface.AndroidEnvInterface):
@@ -75,14 +325,38 @@ def save_snapshot(app_name: str, env: env_interface.AndroidEnvInterface):
 
   file_utils.copy_dir(_app_data_path(app_name), snapshot_path, env)
 
+  manifest_path = _manifest_path(app_name)
+  adb_utils.check_ok(
+      adb_utils.issue_generic_request(
+          [
+              "shell",
+              f"{_listing_command(snapshot_path)}"
+              f" > {shlex.quote(manifest_path)}",
+          ],
+          env,
+      ),
+      f"Failed to write snapshot manifest {manifest_path}.",
+  )
 
-def restore_snapshot(app_name: str, env: env_interface.AndroidEnvInterface):
+
+def restore_snapshot(
+    app_name: str,
+    env: env_interface.AndroidEnvInterface,
+    incremental: bool = True,
+) -> RestoreStats:
   """Loads a snapshot of application data.
 
   Args:
     app_name: App package that will have its data overwritten with the stored
       snapshot.
     env: Android environment.
+    incremental: Whether to only rewrite what differs from the snapshot. The
+      whole app data directory is replaced if False, or if the snapshot has no
+      manifest.
+
+  Returns:
+    What the restore changed. It is also added to `get_restore_counters`.
+    Nothing is restored if the app is clean; see `track_app_state`.
 
   Raises:
     RuntimeError: when there is no available snapshot or a failure occurs while
@@ -90,10 +364,137 @@ def restore_snapshot(app_name: str, env: env_interface.AndroidEnvInterface):
   """
   adb_utils.close_app(app_name, env)
 
+  tracker = _trackers.get(id(env))
+  package_name = _package_name(app_name)
+  if tracker is not None and package_name in tracker.clean:
+    stats = RestoreStats(restores_skipped=1)
+    tracker.stats.add(stats)
+    _restore_counters.add(stats)
+    return stats
+
   snapshot_path = _snapshot_path(app_name)
   if not file_utils.check_directory_exists(snapshot_path, env):
     raise RuntimeError(f"Snapshot not found in {snapshot_path}.")
 
+  stats = None
+  if incremental:
+    stats = _restore_incrementally(app_name, env)
+  if stats is None:
+    stats = _restore_fully(app_name, env)
+  stats.restores = 1
+  if tracker is not None:
+    tracker.clean.add(package_name)
+    tracker.stats.add(stats)
+  _restore_counters.add(stats)
+  return stats
+
+
+def _restore_incrementally(
+    app_name: str, env: env_interface.AndroidEnvInterface
+) -> RestoreStats | None:
+  """Rewrites the files of an app that differ from its snapshot.
+
+  Args:
+    app_name: The app.
+    env: Android environment.
+
+  Returns:
+    What changed, or None if the snapshot has no usable manifest.
+
+  Raises:
+    RuntimeError: If the changes could not be applied.
+  """
+  snapshot_path = _snapshot_path(app_name)
+  app_data_path = _app_data_path(app_name)
+  response = adb_utils.issue_generic_request(
+      [
+          "shell",
+          f"cat {shlex.quote(_manifest_path(app_name))}"
+          f" && echo {_SECTION_END};"
+          f" {_listing_command(app_data_path)}",
+      ],
+      env,
+  )
+  adb_utils.check_ok(response, f"Failed to list {app_data_path}.")
+  output = response.generic.output.decode("utf-8", errors="replace")
+  # The manifest and its terminator have 4 section ends, followed by the 3 of
+  # the current listing.
+  parts = output.replace("\r", "").split(_SECTION_END + "\n")
+  try:
+    snapshot = _parse_listing((_SECTION_END + "\n").join(parts[:4]))
+    current = _parse_listing((_SECTION_END + "\n").join(parts[4:]))
+  except (ValueError, KeyError) as e:
+    logging.warning(
+        "No usable manifest for the %s snapshot (%s); restoring it fully.",
+        app_name,
+        e,
+    )
+    return None
+
+  # Entries whose type changed are deleted, then restored.
+  to_delete = sorted(
+      (current.directories - snapshot.directories)
+      | (current.links - snapshot.links)
+      | (current.files.keys() - snapshot.files.keys())
+  )
+  to_create = sorted(snapshot.directories - current.directories)
+  to_copy = sorted(
+      [link for link in snapshot.links if link not in current.links]
+      + [
+          path
+          for path, (md5, _) in snapshot.files.items()
+          if current.files.get(path, (None, 0))[0] != md5
+      ]
+  )
+
+  quote = shlex.quote
+  commands = [f"rm -rf {quote(path)}" for path in to_delete]
+  commands += [f"mkdir -p {quote(path)}" for path in to_create]
+  commands += [
+      f"cp -a {quote(snapshot_path + path[1:])} {quote(path)}"
+      for path in to_copy
+  ]
+  for path in to_create + to_copy:
+    commands.append(f"restorecon {quote(path)}")
+    commands.append(f"chmod 777 {quote(path)}")
+
+  def run(batch: list[str]) -> None:
+    done = "android_world_restored"
+    response = adb_utils.issue_generic_request(
+        [
+            "shell",
+            " && ".join([f"cd {quote(app_data_path)}", *batch, f"echo {done}"]),
+        ],
+        env,
+    )
+    adb_utils.check_ok(response, f"Failed to restore {app_name} snapshot.")
+    if done not in response.generic.output.decode("utf-8", errors="replace"):
+      raise RuntimeError(f"Failed to restore {app_name} snapshot.")
+
+  batch, length = [], 0
+  for command in commands:
+    if batch and length + len(command) > _MAX_COMMAND_LENGTH:
+      run(batch)
+      batch, length = [], 0
+    batch.append(command)
+    length += len(command) + len(" && ")
+  if batch:
+    run(batch)
+
+  return RestoreStats(
+      files_restored=len(to_copy),
+      bytes_restored=sum(
+          snapshot.files[path][1] for path in to_copy if path in snapshot.files
+      ),
+      files_deleted=len(to_delete),
+  )
+
+
+def _restore_fully(
+    app_name: str, env: env_interface.AndroidEnvInterface
+) -> RestoreStats:
+  """Replaces the data directory of an app with its snapshot."""
+  snapshot_path = _snapshot_path(app_name)
   app_data_path = _app_data_path(app_name)
   try:
     file_utils.clear_directory(app_data_path, env)
@@ -121,3 +522,4 @@ def restore_snapshot(app_name: str, env: env_interface.AndroidEnvInterface):
       ),
       "Failed to set app data permissions.",
   )
+  return RestoreStats(full_restores=1)
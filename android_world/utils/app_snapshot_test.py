@@ -0,0 +1,289 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+import subprocess
+import tempfile
+from unittest import mock
+
+from absl.testing import absltest
+from absl.testing import parameterized
+from android_env.proto import adb_pb2
+from android_world.env import adb_utils
+from android_world.utils import app_snapshot
+
+
+class _LocalShellEnv:
+  """Runs adb shell commands on the local machine."""
+
+  def __init__(self):
+    self.commands = []
+    # Canned outputs of commands that do not exist here.
+    self.outputs = {}
+
+  def execute_adb_call(self, call: adb_pb2.AdbRequest) -> adb_pb2.AdbResponse:
+    args = list(call.generic.args)
+    command = " ".join(args[1:])
+    self.commands.append(command)
+    response = adb_pb2.AdbResponse(status=adb_pb2.AdbResponse.Status.OK)
+    if args == ["shell", "whoami"]:
+      response.generic.output = b"root\n"
+    elif command in self.outputs:
+      response.generic.output = self.outputs[command]
+    else:
+      # SELinux contexts do not exist here.
+      response.generic.output = subprocess.run(
+          ["sh", "-c", "restorecon() { :; }; " + " ".join(args[1:])],
+          capture_output=True,
+          check=False,
+      ).stdout
+    return response
+
+
+def _write(path: str, content: str) -> None:
+  os.makedirs(os.path.dirname(path), exist_ok=True)
+  with open(path, "w") as f:
+    f.write(content)
+
+
+def _tree(root: str) -> dict[str, str]:
+  """Returns the contents of every file, link and directory under `root`."""
+  tree = {}
+  for directory, subdirectories, files in os.walk(root):
+    for name in subdirectories + files:
+      path = os.path.join(directory, name)
+      relative_path = os.path.relpath(path, root)
+      if os.path.islink(path):
+        tree[relative_path] = "-> " + os.readlink(path)
+      elif os.path.isdir(path):
+        tree[relative_path] = "dir"
+      else:
+        with open(path) as f:
+          tree[relative_path] = f.read()
+  return tree
+
+
+class _SnapshotTestCase(parameterized.TestCase):
+  """Saves a snapshot of a local directory standing in for app data."""
+
+  def setUp(self):
+    super().setUp()
+    root = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, root)
+    self.app_data = os.path.join(root, "data", "com.example")
+    self.snapshot = os.path.join(root, "snapshots", "com.example")
+    self.enter_context(
+        mock.patch.object(
+            app_snapshot, "_app_data_path", return_value=self.app_data
+        )
+    )
+    self.enter_context(
+        mock.patch.object(
+            app_snapshot, "_snapshot_path", return_value=self.snapshot
+        )
+    )
+    self.enter_context(
+        mock.patch.object(
+            adb_utils,
+            "get_adb_activity",
+            return_value="com.example/.MainActivity",
+        )
+    )
+    self.enter_context(mock.patch.object(adb_utils, "close_app"))
+    self.env = _LocalShellEnv()
+    app_snapshot.reset_restore_counters()
+
+    _write(os.path.join(self.app_data, "databases", "app.db"), "rows")
+    _write(os.path.join(self.app_data, "databases", "app.db-wal"), "wal")
+    _write(os.path.join(self.app_data, "shared_prefs", "prefs.xml"), "<a/>")
+    os.makedirs(os.path.join(self.app_data, "cache"))
+    os.symlink("databases/app.db", os.path.join(self.app_data, "db"))
+    self.expected = _tree(self.app_data)
+    app_snapshot.save_snapshot("app", self.env)
+
+
+class AppSnapshotTest(_SnapshotTestCase):
+
+  def test_parse_listing(self):
+    sep = app_snapshot._SECTION_END
+    listing = app_snapshot._parse_listing(
+        f"./a\n./a/b\n{sep}\n./l\n{sep}\n"
+        f"0cc175b9c0f1b6a831c399e269772661  ./a/my file\n{sep}\n"
+        "1 ./a/my file\n"
+    )
+
+    self.assertEqual(listing.directories, {"./a", "./a/b"})
+    self.assertEqual(listing.links, {"./l"})
+    self.assertEqual(
+        listing.files,
+        {"./a/my file": ("0cc175b9c0f1b6a831c399e269772661", 1)},
+    )
+    with self.assertRaises(ValueError):
+      app_snapshot._parse_listing(f"./a\n{sep}\n")
+
+  def test_restore_only_rewrites_changes(self):
+    prefs = os.path.join(self.app_data, "shared_prefs", "prefs.xml")
+    prefs_inode = os.stat(prefs).st_ino
+    _write(os.path.join(self.app_data, "databases", "app.db"), "changed")
+    os.remove(os.path.join(self.app_data, "databases", "app.db-wal"))
+    _write(os.path.join(self.app_data, "cache", "new", "file"), "extra")
+    _write(os.path.join(self.app_data, "files", "added.txt"), "extra")
+    os.remove(os.path.join(self.app_data, "db"))
+    os.makedirs(os.path.join(self.app_data, "db"))
+
+    stats = app_snapshot.restore_snapshot("app", self.env)
+
+    self.assertEqual(_tree(self.app_data), self.expected)
+    self.assertEqual(os.stat(prefs).st_ino, prefs_inode)
+    self.assertEqual(
+        stats,
+        app_snapshot.RestoreStats(
+            restores=1,
+            files_restored=3,
+            bytes_restored=len("rows") + len("wal"),
+            # cache/new, cache/new/file, files, files/added.txt and db.
+            files_deleted=5,
+        ),
+    )
+
+  def test_restore_without_changes_only_lists_files(self):
+    self.env.commands.clear()
+
+    stats = app_snapshot.restore_snapshot("app", self.env)
+
+    self.assertEqual(stats, app_snapshot.RestoreStats(restores=1))
+    self.assertLen(self.env.commands, 2)
+    self.assertEqual(_tree(self.app_data), self.expected)
+
+  def test_restore_without_manifest_is_full(self):
+    os.remove(self.snapshot + ".manifest")
+    _write(os.path.join(self.app_data, "databases", "app.db"), "changed")
+
+    stats = app_snapshot.restore_snapshot("app", self.env)
+
+    self.assertEqual(
+        stats, app_snapshot.RestoreStats(restores=1, full_restores=1)
+    )
+    self.assertEqual(_tree(self.app_data), self.expected)
+
+  def test_restore_not_incremental_is_full(self):
+    stats = app_snapshot.restore_snapshot("app", self.env, incremental=False)
+
+    self.assertEqual(stats.full_restores, 1)
+    self.assertEqual(_tree(self.app_data), self.expected)
+
+  def test_restore_counters(self):
+    _write(os.path.join(self.app_data, "databases", "app.db"), "changed")
+    app_snapshot.restore_snapshot("app", self.env)
+    app_snapshot.restore_snapshot("app", self.env, incremental=False)
+
+    self.assertEqual(
+        app_snapshot.get_restore_counters(),
+        app_snapshot.RestoreStats(
+            restores=2, full_restores=1, files_restored=1, bytes_restored=4
+        ),
+    )
+    app_snapshot.reset_restore_counters()
+    self.assertEqual(
+        app_snapshot.get_restore_counters(), app_snapshot.RestoreStats()
+    )
+
+  def test_restore_fails_without_snapshot(self):
+    shutil.rmtree(self.snapshot)
+
+    with self.assertRaisesRegex(RuntimeError, "Snapshot not found"):
+      app_snapshot.restore_snapshot("app", self.env)
+
+
+class TrackAppStateTest(_SnapshotTestCase):
+
+  def test_clean_restores_are_skipped(self):
+    with app_snapshot.track_app_state(self.env) as stats:
+      app_snapshot.restore_snapshot("app", self.env)
+      self.env.commands.clear()
+
+      self.assertEqual(
+          app_snapshot.restore_snapshot("app", self.env),
+          app_snapshot.RestoreStats(restores_skipped=1),
+      )
+      self.assertEmpty(self.env.commands)
+
+      app_snapshot.mark_dirty("app", self.env)
+      _write(os.path.join(self.app_data, "databases", "app.db"), "changed")
+      app_snapshot.restore_snapshot("app", self.env)
+
+    self.assertEqual(_tree(self.app_data), self.expected)
+    self.assertEqual(stats.restores, 2)
+    self.assertEqual(stats.restores_skipped, 1)
+    self.assertEqual(app_snapshot.get_restore_counters().restores_skipped, 1)
+
+  def test_restores_always_run_without_tracking(self):
+    app_snapshot.restore_snapshot("app", self.env)
+    app_snapshot.restore_snapshot("app", self.env)
+
+    self.assertEqual(app_snapshot.get_restore_counters().restores, 2)
+
+  @parameterized.named_parameters(
+      ("app_database", "/data/data/com.example/databases/app.db", 0),
+      ("other_app", "/data/data/com.example.other/databases/app.db", 1),
+      ("shared_storage", "/sdcard/Android/data/com.example/file", 1),
+  )
+  def test_mark_path_dirty(self, path, restores_skipped):
+    with app_snapshot.track_app_state(self.env) as stats:
+      app_snapshot.restore_snapshot("app", self.env)
+      app_snapshot.mark_path_dirty(path, self.env)
+      app_snapshot.restore_snapshot("app", self.env)
+
+    self.assertEqual(stats.restores, 2 - restores_skipped)
+    self.assertEqual(stats.restores_skipped, restores_skipped)
+
+  def test_mark_touched_apps_dirty(self):
+    self.env.outputs["dumpsys activity recents; ps -A -o NAME"] = (
+        b"* Recent #0: Task{1 #12 type=standard A=10123:com.example U=0}\n"
+        b"    realActivity=com.example/.MainActivity\n"
+        b"NAME\ninit\ncom.android.systemui\n"
+    )
+
+    with app_snapshot.track_app_state(self.env) as stats:
+      app_snapshot.restore_snapshot("app", self.env)
+      app_snapshot.mark_touched_apps_dirty(self.env)
+      app_snapshot.restore_snapshot("app", self.env)
+
+    self.assertEqual(stats.restores, 2)
+    self.assertEqual(stats.restores_skipped, 0)
+
+  def test_untouched_apps_stay_clean(self):
+    self.env.outputs["dumpsys activity recents; ps -A -o NAME"] = (
+        b"    realActivity=com.example.other/.MainActivity\n"
+        b"NAME\ncom.example.other:remote\n"
+    )
+
+    with app_snapshot.track_app_state(self.env) as stats:
+      app_snapshot.restore_snapshot("app", self.env)
+      app_snapshot.mark_touched_apps_dirty(self.env)
+      app_snapshot.restore_snapshot("app", self.env)
+
+    self.assertEqual(stats.restores, 1)
+    self.assertEqual(stats.restores_skipped, 1)
+
+  def test_tracking_twice_raises(self):
+    with app_snapshot.track_app_state(self.env):
+      with self.assertRaises(RuntimeError):
+        with app_snapshot.track_app_state(self.env):
+          pass
+
+
+if __name__ == "__main__":
+  absltest.main()
@@ -0,0 +1,162 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks copying directories to and from the device, per file and as tar.
+
+Uses a fake environment that runs adb shell commands on the local machine,
+with local paths standing in for device paths, and adds a fixed round trip per
+adb call plus the time to move the transferred bytes at a fixed bandwidth.
+
+  python -m android_world.utils.file_transfer_benchmark --round_trip_ms=30
+"""
+
+from collections.abc import Callable, Sequence
+import os
+import subprocess
+import tempfile
+import time
+
+from absl import app
+from absl import flags
+from android_env.proto import adb_pb2
+from android_world.env import adb_utils
+from android_world.utils import file_utils
+
+_ROUND_TRIP_MS = flags.DEFINE_float(
+    'round_trip_ms', 30.0, 'Simulated fixed cost of one adb call.'
+)
+_BANDWIDTH_MBPS = flags.DEFINE_float(
+    'bandwidth_mbps', 50.0, 'Simulated adb bandwidth, in MB/s.'
+)
+_FILE_SIZE = flags.DEFINE_integer('file_size', 4096, 'Bytes per file.')
+_NUM_FILES = flags.DEFINE_list(
+    'num_files', ['1', '50', '500'], 'Directory sizes to benchmark.'
+)
+
+
+class _FakeEnv:
+  """Runs adb calls against the local file system after simulated delays."""
+
+  def __init__(self):
+    self.num_calls = 0
+
+  def _run(self, command: str) -> bytes:
+    return subprocess.run(
+        ['sh', '-c', command],
+        capture_output=True,
+        check=False,
+        env={**os.environ, 'TIME_STYLE': 'full-iso'},
+    ).stdout
+
+  def execute_adb_call(self, call: adb_pb2.AdbRequest) -> adb_pb2.AdbResponse:
+    self.num_calls += 1
+    response = adb_pb2.AdbResponse(status=adb_pb2.AdbResponse.Status.OK)
+    transferred = 0
+    if call.HasField('push'):
+      with open(call.push.path, 'wb') as f:
+        f.write(call.push.content)
+      transferred = len(call.push.content)
+    elif call.HasField('pull'):
+      with open(call.pull.path, 'rb') as f:
+        response.pull.content = f.read()
+      transferred = len(response.pull.content)
+    else:
+      args = list(call.generic.args)
+      if args == ['shell', 'whoami']:
+        response.generic.output = b'root\n'
+      elif args[0] in ('shell', 'exec-out'):
+        response.generic.output = self._run(' '.join(args[1:]))
+      transferred = len(response.generic.output)
+    time.sleep(
+        _ROUND_TRIP_MS.value / 1e3 + transferred / (_BANDWIDTH_MBPS.value * 1e6)
+    )
+    return response
+
+
+def _pull_per_file(device_path: str, env: _FakeEnv) -> None:
+  """Pulls a directory the way `tmp_directory_from_device` used to."""
+  local_directory = tempfile.mkdtemp()
+  adb_utils.set_root_if_needed(env)
+  file_utils.check_directory_exists(device_path, env)
+  for file in file_utils.get_file_list_with_metadata(device_path, env):
+    response = env.execute_adb_call(
+        adb_pb2.AdbRequest(pull=adb_pb2.AdbRequest.Pull(path=file.full_path))
+    )
+    with open(os.path.join(local_directory, file.file_name), 'wb') as f:
+      f.write(response.pull.content)
+
+
+def _pull_archive(device_path: str, env: _FakeEnv, compress: bool) -> None:
+  with file_utils.tmp_directory_from_device(
+      device_path, env, compress=compress
+  ) as local_directory:
+    assert os.listdir(local_directory)
+
+
+def _push_per_file(local_path: str, device_path: str, env: _FakeEnv) -> None:
+  """Pushes a directory the way `copy_data_to_device` used to."""
+  for file_name in os.listdir(local_path):
+    file_utils.copy_file_to_device(
+        os.path.join(local_path, file_name),
+        os.path.join(device_path, file_name),
+        env,
+    )
+
+
+def _time(fn: Callable[[_FakeEnv], None]) -> tuple[float, int]:
+  """Returns the seconds and adb calls `fn` takes."""
+  env = _FakeEnv()
+  start = time.perf_counter()
+  fn(env)
+  return time.perf_counter() - start, env.num_calls
+
+
+def main(argv: Sequence[str]) -> None:
+  if len(argv) > 1:
+    raise app.UsageError('Too many command-line arguments.')
+  root = tempfile.mkdtemp()
+  file_utils._DEVICE_STAGING_DIRECTORY = root  # pylint: disable=protected-access
+  for num_files in map(int, _NUM_FILES.value):
+    local_path = os.path.join(root, f'local_{num_files}')
+    device_path = os.path.join(root, f'device_{num_files}')
+    os.makedirs(local_path)
+    os.makedirs(device_path)
+    for i in range(num_files):
+      with open(os.path.join(local_path, f'file_{i}.txt'), 'wb') as f:
+        # Half random, half repetitive, so compression helps but not fully.
+        f.write(os.urandom(_FILE_SIZE.value // 2))
+        f.write(b'x' * (_FILE_SIZE.value - _FILE_SIZE.value // 2))
+
+    runs = {
+        'push per file': lambda env: _push_per_file(
+            local_path, device_path, env
+        ),
+        'push tar': lambda env: file_utils.copy_data_to_device(
+            local_path, device_path, env
+        ),
+        'push tar.gz': lambda env: file_utils.copy_data_to_device(
+            local_path, device_path, env, compress=True
+        ),
+        'pull per file': lambda env: _pull_per_file(device_path, env),
+        'pull tar': lambda env: _pull_archive(device_path, env, False),
+        'pull tar.gz': lambda env: _pull_archive(device_path, env, True),
+    }
+    print(f'{num_files} files of {_FILE_SIZE.value} bytes:')
+    for name, fn in runs.items():
+      seconds, num_calls = _time(fn)
+      print(f'  {name:>14}: {seconds * 1e3:8.1f} ms, {num_calls:4d} adb calls')
+
+
+if __name__ == '__main__':
+  app.run(main)
@@ -17,11 +17,14 @@
 import contextlib
 import dataclasses
 import datetime
+import io
 import os
 import pathlib
 import random
+import shlex
 import shutil
 import string
+import tarfile
 import tempfile
 from typing import Iterator
 from typing import Optional
@@ -63,6 +66,10 @@ TMP_LOCAL_LOCATION = convert_to_posix_path(
 )
 
 
+# Directory on the device where archives are staged while being pushed.
+_DEVICE_STAGING_DIRECTORY = "/data/local/tmp"
+
+
 @dataclasses.dataclass(frozen=True)
 class FileWithMetadata:
   """File with its metadata like change time.
@@ -311,18 +318,155 @@ def check_directory_exists(
   return check_file_exists(path, env, bash_file_test="-d")
 
 
+def pull_directory_archive(
+    device_path: str,
+    env: env_interface.AndroidEnvInterface,
+    timeout_sec: Optional[float] = None,
+    compress: bool = False,
+) -> bytes:
+  """Fetches the files of a directory from the device as a tar archive.
+
+  Only the regular files directly in the directory are archived. The archive
+  is streamed to stdout on the device with `adb exec-out`, in one adb call, so
+  no file is written on the device.
+
+  Args:
+    device_path: The directory on the device.
+    env: The Android environment interface.
+    timeout_sec: A timeout for the ADB operation.
+    compress: Whether to gzip the archive on the device, which trades device
+      CPU time for less data to transfer.
+
+  Returns:
+    The archive, with paths relative to `device_path`.
+
+  Raises:
+    RuntimeError: If there is an adb communication error.
+  """
+  response = adb_utils.issue_generic_request(
+      [
+          "exec-out",
+          f"cd {shlex.quote(device_path)}"
+          " && find . -maxdepth 1 -type f"
+          f" | tar -c{'z' if compress else ''}f - -T -",
+      ],
+      env,
+      timeout_sec,
+  )
+  adb_utils.check_ok(response, f"Failed to archive {device_path}.")
+  return response.generic.output
+
+
+def _extract_top_level_files(archive: bytes, local_directory: str) -> None:
+  """Writes the regular files at the top level of a tar archive to a directory.
+
+  Args:
+    archive: A tar archive, optionally gzipped.
+    local_directory: Where to write the files.
+
+  Raises:
+    tarfile.TarError: If the archive can not be read.
+  """
+  with tarfile.open(fileobj=io.BytesIO(archive), mode="r:*") as tar:
+    for member in tar:
+      name = member.name.removeprefix("./")
+      if not member.isfile() or "/" in name:
+        continue
+      with open(convert_to_posix_path(local_directory, name), "wb") as f:
+        shutil.copyfileobj(tar.extractfile(member), f)
+
+
+def push_directory_archive(
+    local_path: str,
+    device_path: str,
+    env: env_interface.AndroidEnvInterface,
+    timeout_sec: Optional[float] = None,
+    compress: bool = False,
+) -> adb_pb2.AdbResponse:
+  """Copies the files of a local directory to the device as one tar archive.
+
+  The archive is pushed with one adb call and unpacked, made world-writable
+  and deleted with a second one. Subdirectories are not copied.
+
+  Args:
+    local_path: The local directory.
+    device_path: The directory on the device, which is created if needed.
+    env: The Android environment interface.
+    timeout_sec: A timeout for each ADB operation.
+    compress: Whether to gzip the archive.
+
+  Returns:
+    The response of the command that unpacked the archive.
+
+  Raises:
+    RuntimeError: If the archive could not be pushed or unpacked.
+  """
+  buffer = io.BytesIO()
+  with tarfile.open(fileobj=buffer, mode="w:gz" if compress else "w") as tar:
+    for file_name in sorted(os.listdir(local_path)):
+      file_path = convert_to_posix_path(local_path, file_name)
+      if os.path.isfile(file_path):
+        tar.add(file_path, arcname=file_name)
+
+  archive_path = convert_to_posix_path(
+      _DEVICE_STAGING_DIRECTORY,
+      "android_world_"
+      + "".join(random.choices(string.ascii_lowercase + string.digits, k=12))
+      + ".tar",
+  )
+  adb_utils.check_ok(
+      env.execute_adb_call(
+          adb_pb2.AdbRequest(
+              push=adb_pb2.AdbRequest.Push(
+                  content=buffer.getvalue(), path=archive_path
+              ),
+              timeout_sec=timeout_sec,
+          )
+      ),
+      f"Failed to push archive of {local_path}.",
+  )
+
+  archive = shlex.quote(archive_path)
+  destination = shlex.quote(device_path)
+  flags = "z" if compress else ""
+  done = "android_world_unpacked"
+  response = adb_utils.issue_generic_request(
+      [
+          "shell",
+          f"mkdir -p {destination}"
+          # Extracted files belong to the device user, not the host one.
+          f" && tar -xo{flags}f {archive} -C {destination}"
+          f" && cd {destination}"
+          f" && tar -t{flags}f {archive}"
+          ' | while IFS= read -r f; do chmod 777 "$f"; done'
+          f" && echo {done}; rm -f {archive}",
+      ],
+      env,
+      timeout_sec,
+  )
+  adb_utils.check_ok(response, f"Failed to unpack archive to {device_path}.")
+  if done not in response.generic.output.decode("utf-8", errors="replace"):
+    raise RuntimeError(f"Failed to unpack archive to {device_path}.")
+  return response
+
+
 @contextlib.contextmanager
 def tmp_directory_from_device(
     device_path: str,
     env: env_interface.AndroidEnvInterface,
     timeout_sec: Optional[float] = None,
+    compress: bool = False,
 ):
   """Copy a directory from the device to a local temporary directory using ADB.
 
+  Only the regular files directly in the directory are copied. They are
+  fetched as one tar archive, or one by one if the device can not produce it.
+
   Args:
     device_path: The path of the directory on the Android device.
     env: The Android environment interface.
     timeout_sec: A timeout for the ADB operations.
+    compress: Whether to compress the archive; see `pull_directory_archive`.
 
   Yields:
     A temporary folder that contains files copied from the device that is
@@ -344,19 +488,30 @@ def tmp_directory_from_device(
     raise FileNotFoundError(f"{device_path} does not exist.")
   try:
     os.makedirs(tmp_directory, exist_ok=True)
-    files = get_file_list_with_metadata(device_path, env, timeout_sec)
-    for file in files:
-      pull_response = env.execute_adb_call(
-          adb_pb2.AdbRequest(
-              pull=adb_pb2.AdbRequest.Pull(path=file.full_path),
-              timeout_sec=timeout_sec,
-          )
+    try:
+      _extract_top_level_files(
+          pull_directory_archive(device_path, env, timeout_sec, compress),
+          tmp_directory,
+      )
+    except (RuntimeError, tarfile.TarError, errors.AdbControllerError) as e:
+      logging.warning(
+          "Could not archive %s (%s), pulling files one by one.",
+          device_path,
+          e,
       )
-      adb_utils.check_ok(pull_response)
-      with open(
-          convert_to_posix_path(tmp_directory, file.file_name), "wb"
-      ) as f:
-        f.write(pull_response.pull.content)
+      files = get_file_list_with_metadata(device_path, env, timeout_sec)
+      for file in files:
+        pull_response = env.execute_adb_call(
+            adb_pb2.AdbRequest(
+                pull=adb_pb2.AdbRequest.Pull(path=file.full_path),
+                timeout_sec=timeout_sec,
+            )
+        )
+        adb_utils.check_ok(pull_response)
+        with open(
+            convert_to_posix_path(tmp_directory, file.file_name), "wb"
+        ) as f:
+          f.write(pull_response.pull.content)
 
     yield tmp_directory
 
@@ -450,14 +605,19 @@ def copy_data_to_device(
     remote_path: str,
     env: env_interface.AndroidEnvInterface,
     timeout_sec: Optional[float] = None,
+    compress: bool = False,
 ) -> adb_pb2.AdbResponse:
   """Copy a file or directory to the device from the local file system using ADB.
 
+  The files of a directory are pushed as one tar archive, or one by one if
+  that fails.
+
   Args:
     local_path: The path of the file or directory on the local file system.
     remote_path: The destination path on the Android device.
     env: The Android environment interface.
     timeout_sec: A timeout for the ADB operation.
+    compress: Whether to compress the archive of a directory.
 
   Returns:
     A response object containing the ADB operation result.
@@ -477,8 +637,21 @@ def copy_data_to_device(
       )
     return copy_file_to_device(local_path, remote_path, env, timeout_sec)
 
-  # Copying a directory over, push every file separately.
-  for file_path in os.listdir(local_path):
+  file_paths = os.listdir(local_path)
+  if len(file_paths) > 1:
+    try:
+      return push_directory_archive(
+          local_path, remote_path, env, timeout_sec, compress
+      )
+    except (RuntimeError, errors.AdbControllerError) as e:
+      logging.warning(
+          "Could not push %s as an archive (%s), pushing files one by one.",
+          local_path,
+          e,
+      )
+
+  # Push every file separately.
+  for file_path in file_paths:
     current_response = copy_file_to_device(
         convert_to_posix_path(local_path, file_path),
         convert_to_posix_path(remote_path, os.path.basename(file_path)),
@@ -13,13 +13,16 @@
 # limitations under the License.
 
 import datetime
+import io
 import os
 import shutil
+import tarfile
 import tempfile
 from unittest import mock
 
 from absl.testing import absltest
 from absl.testing import parameterized
+from android_env.components import errors
 from android_env.proto import adb_pb2
 from android_world.env import adb_utils
 from android_world.utils import file_utils
@@ -30,6 +33,23 @@ def create_file_with_contents(file_name: str, contents: bytes) -> str:
     f.write(contents)
 
 
+def create_tar_archive(files: dict[str, bytes], compress: bool) -> bytes:
+  buffer = io.BytesIO()
+  with tarfile.open(fileobj=buffer, mode='w:gz' if compress else 'w') as tar:
+    root = tarfile.TarInfo('.')
+    root.type = tarfile.DIRTYPE
+    tar.addfile(root)
+    for name, contents in files.items():
+      info = tarfile.TarInfo(name)
+      info.size = len(contents)
+      tar.addfile(info, io.BytesIO(contents))
+    link = tarfile.TarInfo('./link.txt')
+    link.type = tarfile.SYMTYPE
+    link.linkname = 'a.txt'
+    tar.addfile(link)
+  return buffer.getvalue()
+
+
 class FilesTest(parameterized.TestCase):
 
   def setUp(self):
@@ -135,6 +155,125 @@ class FilesTest(parameterized.TestCase):
       ):
         pass
 
+  @parameterized.parameters(False, True)
+  @mock.patch.object(adb_utils, 'set_root_if_needed')
+  @mock.patch.object(file_utils, 'check_directory_exists', return_value=True)
+  def test_tmp_directory_from_device_pulls_archive(
+      self, compress, unused_mock_check_directory_exists, unused_mock_set_root
+  ):
+    self.mock_issue_generic_request.return_value = adb_pb2.AdbResponse(
+        status=adb_pb2.AdbResponse.Status.OK,
+        generic=adb_pb2.AdbResponse.GenericResponse(
+            output=create_tar_archive(
+                {'./a.txt': b'a', './b c.db': b'bc', './sub/d.txt': b'd'},
+                compress,
+            )
+        ),
+    )
+
+    with file_utils.tmp_directory_from_device(
+        '/remote dir', self.mock_env, compress=compress
+    ) as tmp_directory:
+      self.assertCountEqual(os.listdir(tmp_directory), ['a.txt', 'b c.db'])
+      with open(os.path.join(tmp_directory, 'b c.db'), 'rb') as f:
+        self.assertEqual(f.read(), b'bc')
+
+    self.mock_issue_generic_request.assert_called_with(
+        [
+            'exec-out',
+            "cd '/remote dir' && find . -maxdepth 1 -type f | tar"
+            f" -c{'z' if compress else ''}f - -T -",
+        ],
+        self.mock_env,
+        None,
+    )
+    self.mock_env.execute_adb_call.assert_not_called()
+
+  def test_copy_data_to_device_pushes_directory_archive(self):
+    self.mock_env.execute_adb_call.return_value = adb_pb2.AdbResponse(
+        status=adb_pb2.AdbResponse.Status.OK
+    )
+    self.mock_issue_generic_request.return_value = adb_pb2.AdbResponse(
+        status=adb_pb2.AdbResponse.Status.OK,
+        generic=adb_pb2.AdbResponse.GenericResponse(
+            output=b'android_world_unpacked\n'
+        ),
+    )
+    temp_dir = tempfile.mkdtemp()
+    for file_name in ['file1.txt', 'file2.txt', 'file 3.txt']:
+      create_file_with_contents(
+          os.path.join(temp_dir, file_name), file_name.encode()
+      )
+    os.mkdir(os.path.join(temp_dir, 'subdir'))
+
+    response = file_utils.copy_data_to_device(
+        temp_dir, '/remote/dir', self.mock_env
+    )
+
+    self.assertEqual(response, self.mock_issue_generic_request.return_value)
+    self.mock_env.execute_adb_call.assert_called_once()
+    push = self.mock_env.execute_adb_call.call_args.args[0].push
+    self.assertStartsWith(push.path, '/data/local/tmp/android_world_')
+    with tarfile.open(fileobj=io.BytesIO(push.content)) as tar:
+      self.assertEqual(
+          {m.name: tar.extractfile(m).read() for m in tar},
+          {
+              'file1.txt': b'file1.txt',
+              'file2.txt': b'file2.txt',
+              'file 3.txt': b'file 3.txt',
+          },
+      )
+    self.mock_issue_generic_request.assert_called_once()
+    command = self.mock_issue_generic_request.call_args.args[0][1]
+    self.assertIn(f'tar -xof {push.path} -C /remote/dir', command)
+    self.assertIn('chmod 777', command)
+    self.assertIn(f'rm -f {push.path}', command)
+
+  def test_copy_data_to_device_falls_back_if_archive_fails(self):
+    self.mock_env.execute_adb_call.return_value = adb_pb2.AdbResponse(
+        status=adb_pb2.AdbResponse.Status.OK
+    )
+    # No tar on the device.
+    self.mock_issue_generic_request.return_value = adb_pb2.AdbResponse(
+        status=adb_pb2.AdbResponse.Status.OK,
+        generic=adb_pb2.AdbResponse.GenericResponse(
+            output=b'/system/bin/sh: tar: not found\n'
+        ),
+    )
+    temp_dir = tempfile.mkdtemp()
+    for file_name in ['file1.txt', 'file2.txt']:
+      create_file_with_contents(os.path.join(temp_dir, file_name), b'data')
+
+    file_utils.copy_data_to_device(temp_dir, '/remote/dir', self.mock_env)
+
+    pushed_paths = [
+        c.args[0].push.path
+        for c in self.mock_env.execute_adb_call.call_args_list
+    ]
+    self.assertLen(pushed_paths, 3)
+    self.assertCountEqual(
+        pushed_paths[1:], ['/remote/dir/file1.txt', '/remote/dir/file2.txt']
+    )
+
+  def test_copy_data_to_device_falls_back_on_adb_errors(self):
+    self.mock_env.execute_adb_call.return_value = adb_pb2.AdbResponse(
+        status=adb_pb2.AdbResponse.Status.OK
+    )
+
+    def issue_generic_request(args, unused_env, unused_timeout_sec=None):
+      if 'tar -x' in args[1]:
+        raise errors.AdbControllerError('adb failed')
+      return adb_pb2.AdbResponse(status=adb_pb2.AdbResponse.Status.OK)
+
+    self.mock_issue_generic_request.side_effect = issue_generic_request
+    temp_dir = tempfile.mkdtemp()
+    for file_name in ['file1.txt', 'file2.txt']:
+      create_file_with_contents(os.path.join(temp_dir, file_name), b'data')
+
+    file_utils.copy_data_to_device(temp_dir, '/remote/dir', self.mock_env)
+
+    self.assertLen(self.mock_env.execute_adb_call.call_args_list, 3)
+
   def test_copy_data_to_device_copies_file(self):
     """Test if copy_data_to_device correctly copies a single file."""
     file_contents = b'test file contents'
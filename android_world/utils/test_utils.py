@@ -251,3 +251,11 @@ class FakeAsyncEnv(interface.AsyncAndroidEnv):
   @property
   def logical_screen_size(self) -> tuple[int, int]:
     return (100, 100)
+
+  @property
+  def orientation(self) -> int:
+    return 0
+
+  @property
+  def physical_frame_boundary(self) -> tuple[int, int, int, int]:
+    return (0, 0, 100, 100)
@@ -67,6 +67,12 @@ _ADB_PATH = flags.DEFINE_string(
     _find_adb_directory(),
     "Path to adb. Set if not installed through SDK.",
 )
+_ADB_SHELL_SESSION = flags.DEFINE_boolean(
+    "adb_shell_session",
+    False,
+    "Whether to send adb shell commands through one persistent adb shell per"
+    " device instead of starting a new adb process for each command.",
+)
 _EMULATOR_SETUP = flags.DEFINE_boolean(
     "perform_emulator_setup",
     False,
@@ -82,6 +88,13 @@ _DEVICE_CONSOLE_PORT = flags.DEFINE_integer(
     " first connected device is port 5554, the second is 5556, and"
     " so on.",
 )
+_ENV_ENDPOINTS = flags.DEFINE_list(
+    "env_endpoints",
+    None,
+    "Optional list of console_port:grpc_port pairs, e.g."
+    " 5554:8554,5556:8556. If set, tasks are run in parallel with one agent per"
+    " emulator and --console_port is ignored.",
+)
 
 _SUITE_FAMILY = flags.DEFINE_enum(
     "suite_family",
@@ -121,6 +134,27 @@ _CHECKPOINT_DIR = flags.DEFINE_string(
     " the latest checkpoint. If the directory is empty or does not exist, a new"
     " directory will be created.",
 )
+_CHECKPOINT_FORMAT = flags.DEFINE_enum(
+    "checkpoint_format",
+    "incremental",
+    ["incremental", "columnar"],
+    "How to store checkpoints. 'incremental' writes one gzipped pickle per"
+    " task instance; 'columnar' stores metadata columns separately from"
+    " episode data and deduplicates screenshots.",
+)
+_ASYNC_CHECKPOINT = flags.DEFINE_boolean(
+    "async_checkpoint",
+    False,
+    "Whether to write checkpoints on a background thread so the next task can"
+    " start while the previous episode is being compressed.",
+)
+_SKIP_REDUNDANT_RESTORES = flags.DEFINE_boolean(
+    "skip_redundant_restores",
+    False,
+    "Whether to skip app snapshot restores when no task or episode touched the"
+    " app since its last restore. By default, apps are restored on every task"
+    " initialization and tear down.",
+)
 _OUTPUT_PATH = flags.DEFINE_string(
     "output_path",
     os.path.expanduser("~/android_world/runs"),
@@ -197,11 +231,25 @@ def _get_agent(
 
 def _main() -> None:
     """Runs eval suite and gets rewards back."""
-    env = env_launcher.load_and_setup_env(
-        console_port=_DEVICE_CONSOLE_PORT.value,
-        emulator_setup=_EMULATOR_SETUP.value,
-        adb_path=_ADB_PATH.value,
-    )
+    if _ENV_ENDPOINTS.value:
+        envs = env_launcher.load_and_setup_envs(
+            [
+                env_launcher.EnvEndpoint.from_string(endpoint)
+                for endpoint in _ENV_ENDPOINTS.value
+            ],
+            emulator_setup=_EMULATOR_SETUP.value,
+            adb_path=_ADB_PATH.value,
+            shell_session=_ADB_SHELL_SESSION.value,
+        )
+    else:
+        envs = [
+            env_launcher.load_and_setup_env(
+                console_port=_DEVICE_CONSOLE_PORT.value,
+                emulator_setup=_EMULATOR_SETUP.value,
+                adb_path=_ADB_PATH.value,
+                shell_session=_ADB_SHELL_SESSION.value,
+            )
+        ]
 
     n_task_combinations = _N_TASK_COMBINATIONS.value
     task_registry = registry.TaskRegistry()
@@ -214,13 +262,14 @@ def _main() -> None:
     )
     suite.suite_family = _SUITE_FAMILY.value
 
-    agent = _get_agent(env, _SUITE_FAMILY.value)
+    agents = [_get_agent(env, _SUITE_FAMILY.value) for env in envs]
 
-    if _SUITE_FAMILY.value.startswith("miniwob"):
-        # MiniWoB pages change quickly, don't need to wait for screen to stabilize.
-        agent.transition_pause = _MINIWOB_TRANSITION_PAUSE
-    else:
-        agent.transition_pause = None
+    for agent in agents:
+        if _SUITE_FAMILY.value.startswith("miniwob"):
+            # MiniWoB pages change quickly, don't need to wait for screen to stabilize.
+            agent.transition_pause = _MINIWOB_TRANSITION_PAUSE
+        else:
+            agent.transition_pause = None
 
     if _CHECKPOINT_DIR.value:
         checkpoint_dir = _CHECKPOINT_DIR.value
@@ -231,17 +280,34 @@ def _main() -> None:
         f"Starting eval with agent {_AGENT_NAME.value} and writing to"
         f" {checkpoint_dir}"
     )
-    suite_utils.run(
-        suite,
-        agent,
-        checkpointer=checkpointer_lib.IncrementalCheckpointer(checkpoint_dir),
-        demo_mode=False,
-    )
+    if _CHECKPOINT_FORMAT.value == "columnar":
+        checkpointer = checkpointer_lib.ColumnarCheckpointer(checkpoint_dir)
+    else:
+        checkpointer = checkpointer_lib.IncrementalCheckpointer(checkpoint_dir)
+    if _ASYNC_CHECKPOINT.value:
+        checkpointer = checkpointer_lib.AsyncCheckpointer(checkpointer)
+    if len(agents) > 1:
+        suite_utils.run_parallel(
+            suite,
+            agents,
+            checkpointer=checkpointer,
+            skip_redundant_restores=_SKIP_REDUNDANT_RESTORES.value,
+        )
+    else:
+        suite_utils.run(
+            suite,
+            agents[0],
+            checkpointer=checkpointer,
+            demo_mode=False,
+            skip_redundant_restores=_SKIP_REDUNDANT_RESTORES.value,
+        )
+    checkpointer.close()
     print(
         f"Finished running agent {_AGENT_NAME.value} on {_SUITE_FAMILY.value}"
         f" family. Wrote to {checkpoint_dir}."
     )
-    env.close()
+    for env in envs:
+        env.close()
 
 
 def main(argv: Sequence[str]) -> None: